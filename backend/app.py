@@ -2,32 +2,83 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 from config import Config
 from models import db
+from utils.db_pool import engine_options, pool_status
+from services.response_cache import response_cache
+from middleware.auth_middleware import token_verifier, admin_required
+from middleware.profiling import request_profiler
+from middleware.compression import response_compressor
+from services.password_hasher import password_hasher
+from services.query_fanout import query_fanout
+from services.search_history import search_history
+from services.dimensions import dimensions
 
 # Import route blueprints
 from routes.auth_routes import auth_bp
 from routes.product_routes import product_bp
 from routes.shop_routes import shop_bp
 from routes.review_routes import review_bp
+from routes.admin_routes import admin_bp
+from cli import register_commands
 
-def create_app():
+def create_app(config_object=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_object)
+    # Pool and driver options from the DB_* settings; explicit
+    # SQLALCHEMY_ENGINE_OPTIONS entries take precedence
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **engine_options(app.config),
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
     
     # Initialize extensions
     CORS(app)
     db.init_app(app)
+    response_cache.init_app(app)
+    token_verifier.init_app(app)
+    password_hasher.init_app(app)
+    query_fanout.init_app(app)
+    search_history.init_app(app)
+    dimensions.init_app(app)
+    # Opt-in: per-route latency/SQL metrics at /api/health/metrics
+    request_profiler.init_app(app)
+    response_compressor.init_app(app)
     
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(product_bp, url_prefix='/api/products')
     app.register_blueprint(shop_bp, url_prefix='/api/shops')
     app.register_blueprint(review_bp, url_prefix='/api/reviews')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    
+    # flask CLI commands (flask --app app import-inventory ...)
+    register_commands(app)
     
     # Health check endpoint
     @app.route('/api/health', methods=['GET'])
     def health_check():
         return jsonify({'status': 'healthy', 'message': 'NEARBUY API is running'})
     
+    # Detail response cache counters
+    @app.route('/api/health/cache', methods=['GET'])
+    def cache_stats():
+        return jsonify(response_cache.stats())
+    
+    # Search history writer counters
+    @app.route('/api/health/search-history', methods=['GET'])
+    def search_history_stats():
+        return jsonify(search_history.stats())
+    
+    # Compression ratio, CPU time and compressed-bytes cache per encoding
+    @app.route('/api/health/compression', methods=['GET'])
+    def compression_stats():
+        return jsonify(response_compressor.stats())
+    
+    # Connection pool occupancy and checkout wait histogram (admin only)
+    @app.route('/api/health/db-pool', methods=['GET'])
+    @admin_required
+    def db_pool_stats():
+        return jsonify(dict(pool_status(db.engine.pool), fanout=query_fanout.stats()))
+    
     return app
 
 if __name__ == '__main__':
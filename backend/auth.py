@@ -1,42 +0,0 @@
-from functools import wraps
-from flask import request, jsonify, current_app
-import jwt
-from datetime import datetime, timedelta
-
-def generate_token(user_id):
-    """Generate JWT token for user authentication"""
-    payload = {
-        'user_id': user_id,
-        'exp': datetime.utcnow() + timedelta(days=7)  # Token expires in 7 days
-    }
-    return jwt.encode(payload, current_app.config['SECRET_KEY'], algorithm='HS256')
-
-def verify_token(token):
-    """Verify JWT token and return user_id"""
-    try:
-        payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
-        return payload['user_id']
-    except jwt.ExpiredSignatureError:
-        return None
-    except jwt.InvalidTokenError:
-        return None
-
-def token_required(f):
-    """Decorator to require authentication for routes"""
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        token = request.headers.get('Authorization')
-        if not token:
-            return jsonify({'error': 'Token is missing'}), 401
-        
-        if token.startswith('Bearer '):
-            token = token[7:]
-        
-        user_id = verify_token(token)
-        if not user_id:
-            return jsonify({'error': 'Token is invalid or expired'}), 401
-        
-        request.current_user_id = user_id
-        return f(*args, **kwargs)
-    
-    return decorated
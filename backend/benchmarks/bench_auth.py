@@ -0,0 +1,91 @@
+"""
+Microbenchmark of per-request authentication overhead.
+
+Compares a protected route served through ``token_required`` with the
+verified-token cache disabled (every request runs a full ``jwt.decode``,
+as before) and enabled, against the same route without authentication.
+Both include the in-memory revocation check; its ``Data_Versions`` poll
+(every ``AUTH_REVOCATION_POLL_SECONDS``) runs against an in-memory SQLite
+database.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_auth [--requests 20000]
+"""
+import argparse
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify, request
+from models import db, DataVersion, RevokedToken
+from middleware.auth_middleware import generate_token, token_required, token_verifier
+from utils.cache import LRUCache
+
+def build_app():
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'benchmark-secret-key'
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        RevokedToken.__table__.create(db.engine)
+        DataVersion.__table__.create(db.engine)
+
+    @app.route('/open')
+    def open_route():
+        return jsonify({'ok': True})
+
+    @app.route('/protected')
+    @token_required
+    def protected_route():
+        return jsonify({'user_id': request.current_user_id})
+
+    return app
+
+def per_request_us(client, path, headers, requests, rounds=5):
+    """Best-of-``rounds`` mean latency of one request, in microseconds."""
+    client.get(path, headers=headers)  # warm up
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(requests // rounds):
+            client.get(path, headers=headers)
+        best = min(best, (time.perf_counter() - start) / (requests // rounds))
+    return best * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+
+    app = build_app()
+    with app.app_context():
+        token = generate_token(42)
+        secret = app.config['SECRET_KEY']
+    headers = {'Authorization': f'Bearer {token}'}
+    client = app.test_client()
+
+    # Function level: full decode vs cache hit
+    import jwt
+    decode = min(timeit.repeat(lambda: jwt.decode(token, secret, algorithms=['HS256']), number=args.requests, repeat=3))
+    with app.app_context():
+        token_verifier.verify(token, secret)
+        cached = min(timeit.repeat(lambda: token_verifier.verify(token, secret), number=args.requests, repeat=3))
+
+    # Request level: token cache disabled (maxsize 0) vs enabled
+    baseline = per_request_us(client, '/open', headers, args.requests)
+    token_verifier.verified = LRUCache(maxsize=0, ttl=None)
+    uncached_request = per_request_us(client, '/protected', headers, args.requests)
+    token_verifier.verified = LRUCache(maxsize=10000, ttl=None)
+    cached_request = per_request_us(client, '/protected', headers, args.requests)
+
+    print(f'jwt.decode per call:             {decode / args.requests * 1e6:8.2f} us')
+    print(f'verify (cache hit) per call:     {cached / args.requests * 1e6:8.2f} us')
+    print(f'request without auth:            {baseline:8.2f} us')
+    print(f'request, token cache disabled:   {uncached_request:8.2f} us  (auth overhead {uncached_request - baseline:.2f} us)')
+    print(f'request, token cache enabled:    {cached_request:8.2f} us  (auth overhead {cached_request - baseline:.2f} us)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark of result-row serialization for listing endpoints.
+
+Serializes search-shaped result rows (real SQLAlchemy rows with Numeric
+price/latitude/longitude, from an in-memory SQLite table) three ways: the
+hand-written per-row dicts the routes used to build, the compiled
+``RowSerializer`` dicts, and the column-oriented payload (``shape=columns``).
+Reports conversion time, conversion plus JSON encoding time and response size.
+Category and shop names are looked up in the dimension snapshot (not loaded
+here, so the lookups find nothing) the same way in every variant.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_serialization [--rows 10000]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, Numeric, select
+from routes.product_routes import search_result_serializer
+from services.dimensions import dimensions
+from utils.streaming import dumps, orjson
+
+def build_rows(count):
+    engine = create_engine('sqlite://')
+    metadata = MetaData()
+    results = Table(
+        'results', metadata,
+        Column('product_id', Integer, primary_key=True),
+        Column('product_name', String(100)),
+        Column('brand', String(50)),
+        Column('description', String(255)),
+        Column('color', String(30)),
+        Column('category_id', Integer),
+        Column('price', Numeric(10, 2)),
+        Column('stock', Integer),
+        Column('shop_id', Integer),
+        Column('city', String(50)),
+        Column('area', String(100)),
+        Column('latitude', Numeric(10, 6)),
+        Column('longitude', Numeric(10, 6))
+    )
+    metadata.create_all(engine)
+    rnd = random.Random(1)
+    with engine.begin() as connection:
+        connection.execute(results.insert(), [
+            {
+                'product_id': i,
+                'product_name': f'Product {i}',
+                'brand': rnd.choice(['Apple', 'Samsung', 'Tanishq', 'Levis']),
+                'description': 'A reasonably long product description used for benchmarking',
+                'color': rnd.choice(['Black', 'Gold', 'Red']),
+                'category_id': rnd.randint(1, 3),
+                'price': Decimal(rnd.randint(100, 999999)) / 100,
+                'stock': rnd.randint(1, 50),
+                'shop_id': i % 500,
+                'city': rnd.choice(['Mumbai', 'Delhi', 'Pune']),
+                'area': f'Area {i % 7}',
+                'latitude': Decimal('19.0') + Decimal(rnd.randint(0, 999999)) / 10**6,
+                'longitude': Decimal('72.8') + Decimal(rnd.randint(0, 999999)) / 10**6
+            } for i in range(1, count + 1)
+        ])
+        return connection.execute(select(results)).all()
+
+def per_row_dicts(rows):
+    """The hand-written conversion the routes used before RowSerializer."""
+    products = []
+    for result in rows:
+        products.append({
+            'product_id': result.product_id,
+            'product_name': result.product_name,
+            'brand': result.brand,
+            'description': result.description,
+            'color': result.color,
+            'category': dimensions.category_name(result.category_id),
+            'price': float(result.price),
+            'stock': result.stock,
+            'shop_name': dimensions.shop_name(result.shop_id),
+            'shop_id': result.shop_id,
+            'city': result.city,
+            'area': result.area,
+            'latitude': float(result.latitude) if result.latitude else None,
+            'longitude': float(result.longitude) if result.longitude else None
+        })
+    return {'products': products}
+
+def best_ms(fn, repeat=7):
+    return min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    variants = [
+        ('per-row dicts (before)', lambda: per_row_dicts(rows)),
+        ('compiled dicts', lambda: search_result_serializer.payload(rows, 'products')),
+        ('compiled columns', lambda: search_result_serializer.payload(rows, 'products', columnar=True))
+    ]
+    assert variants[0][1]() == variants[1][1]()
+
+    print(f'{args.rows} rows; JSON encoder: {"orjson" if orjson is not None else "json"}')
+    print(f'{"":24} {"convert ms":>11} {"+ encode ms":>12} {"bytes":>10}')
+    for name, build in variants:
+        convert = best_ms(build)
+        total = best_ms(lambda: dumps(build()))
+        size = len(dumps(build()))
+        print(f'{name:24} {convert:11.2f} {total:12.2f} {size:10d}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark of typeahead lookups (``/api/products/suggest``).
+
+Builds the suggestion index over synthetic product names, brands and
+categories (the ``benchmarks.datagen`` vocabulary) and measures the time of
+a top-k completion for prefixes of every length typed in the search box,
+plus the time to load the index and to add or remove one phrase.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_suggest [--products 100000] [--k 10]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import BRANDS, CATEGORIES, QUALIFIERS, WORDS
+from benchmarks.load_test import percentile
+from services.product_suggest import Phrase, normalize, _word_suffixes
+from utils.prefix_index import PrefixIndex
+
+def build_phrases(products, rnd):
+    phrases = {}
+    for product_id in range(1, products + 1):
+        for kind, text in (
+            ('product', f'{rnd.choice(BRANDS)} {rnd.choice(WORDS)} {rnd.choice(QUALIFIERS)} {product_id}'),
+            ('brand', rnd.choice(BRANDS)),
+            ('category', rnd.choice(CATEGORIES))
+        ):
+            key = normalize(text)
+            phrase = phrases.setdefault((kind, key), Phrase(kind, key, text, searches=rnd.randint(0, 50)))
+            phrase.products += 1
+    return phrases
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--lookups', type=int, default=20000)
+    args = parser.parse_args()
+
+    rnd = random.Random(1)
+    phrases = build_phrases(args.products, rnd)
+    index = PrefixIndex(k=args.k)
+    started = time.perf_counter()
+    index.load((phrase_id, _word_suffixes(phrase.key), phrase.order()) for phrase_id, phrase in phrases.items())
+    print(f'{len(phrases)} phrases loaded in {(time.perf_counter() - started) * 1000:.0f} ms')
+
+    vocabulary = [normalize(word) for word in WORDS + BRANDS + CATEGORIES]
+    print(f'{"prefix length":>13} {"p50 us":>8} {"p99 us":>8} {"max us":>8}')
+    for length in range(1, 9):
+        timings = []
+        for _ in range(args.lookups // 8):
+            prefix = rnd.choice(vocabulary)[:length]
+            started = time.perf_counter()
+            index.top(prefix, args.k)
+            timings.append((time.perf_counter() - started) * 1e6)
+        timings.sort()
+        print(f'{length:13d} {percentile(timings, 0.5):8.1f} {percentile(timings, 0.99):8.1f} {timings[-1]:8.1f}')
+
+    phrase = Phrase('product', 'apple phone pro 0', 'Apple phone pro 0', searches=1000)
+    phrase.products = 1
+    started = time.perf_counter()
+    index.add(('product', phrase.key), _word_suffixes(phrase.key), phrase.order())
+    added = time.perf_counter() - started
+    started = time.perf_counter()
+    index.remove(('product', phrase.key))
+    removed = time.perf_counter() - started
+    print(f'add {added * 1e6:.0f} us, remove {removed * 1e6:.0f} us')
+
+if __name__ == '__main__':
+    main()
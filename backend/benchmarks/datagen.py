@@ -0,0 +1,221 @@
+"""
+Synthetic NEARBUY dataset generator for benchmarks.
+
+Fills an empty database (normally a SQLite file) with categories, shops
+with addresses and weekly timings, products with images, offers, users,
+reviews (plus their rating summaries) and search history. Shops are spread
+uniformly over a disc of ``spread_km`` around a centre point, so radius
+queries see a realistic density. Output depends only on the parameters and
+the seed, so results from different commits are comparable.
+
+Usage (from the backend directory):
+    python -m benchmarks.datagen --db /tmp/nearbuy-bench.db [--shops 500] [--products 2000]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+from dataclasses import dataclass, asdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bcrypt import hashpw, gensalt
+from sqlalchemy import insert
+from models import (
+    db, User, ShopOwner, Shop, ShopAddress, ShopTiming, ProductCategory, Product,
+    ShopProduct, ProductReview, ProductRatingSummary, ProductImage, SearchHistory
+)
+from services import migrations, product_offers
+
+# Password of every generated user (login benchmark)
+PASSWORD = 'benchmark-password'
+
+CATEGORIES = ['Electronics', 'Jewelry', 'Clothing', 'Home & Kitchen', 'Books', 'Sports', 'Toys', 'Beauty']
+BRANDS = ['Apple', 'Samsung', 'Sony', 'Tanishq', 'Levis', 'Prestige', 'Nike', 'Lakme', 'Penguin', 'Lego']
+COLORS = ['Black', 'White', 'Gold', 'Silver', 'Red', 'Blue', 'Green']
+# Search terms are drawn from the same vocabulary as product names
+WORDS = ['phone', 'laptop', 'ring', 'chain', 'shirt', 'jeans', 'book', 'mixer', 'kettle', 'shoe',
+         'watch', 'tablet', 'earrings', 'jacket', 'novel', 'ball', 'puzzle', 'lipstick', 'speaker', 'camera']
+QUALIFIERS = ['pro', 'max', 'mini', 'classic', 'lite', 'plus', 'ultra', 'gold', 'smart', 'premium']
+CITIES = ['Mumbai', 'Thane', 'Navi Mumbai', 'Pune']
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Rows per INSERT statement
+INSERT_BATCH_SIZE = 1000
+
+@dataclass
+class DatasetSpec:
+    shops: int = 500
+    products: int = 2000
+    offers_per_product: int = 8
+    users: int = 200
+    reviews: int = 10000
+    searches: int = 5000
+    center_lat: float = 19.0760
+    center_lng: float = 72.8777
+    spread_km: float = 25.0
+    bcrypt_rounds: int = 12
+    seed: int = 1
+
+def random_point(rnd, lat, lng, spread_km):
+    """Uniformly distributed point within ``spread_km`` of (lat, lng)."""
+    distance = spread_km * math.sqrt(rnd.random())
+    bearing = rnd.uniform(0, 2 * math.pi)
+    d_lat = distance * math.cos(bearing) / 111.0
+    d_lng = distance * math.sin(bearing) / (111.0 * math.cos(math.radians(lat)))
+    return round(lat + d_lat, 6), round(lng + d_lng, 6)
+
+def _insert(model, rows):
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        db.session.execute(insert(model), rows[start:start + INSERT_BATCH_SIZE])
+
+def generate(spec):
+    """
+    Create the schema and fill it according to ``spec``. Needs an app context
+    on an empty database.
+
+    Args:
+        spec: DatasetSpec
+
+    Returns:
+        dict: Row counts per table
+    """
+    rnd = random.Random(spec.seed)
+    db.create_all()
+    # create_all builds the current schema, indexes included
+    migrations.stamp(db.session.connection())
+    created = datetime(2024, 1, 1)
+
+    _insert(ProductCategory, [
+        {'category_id': i, 'category_name': name, 'category_description': f'{name} products', 'created_at': created}
+        for i, name in enumerate(CATEGORIES, 1)
+    ])
+
+    _insert(ShopOwner, [
+        {'owner_id': i, 'owner_name': f'Owner {i}', 'phone': f'9{i:09d}', 'email': f'owner{i}@example.com'}
+        for i in range(1, spec.shops + 1)
+    ])
+    _insert(Shop, [
+        {'shop_id': i, 'shop_name': f'{rnd.choice(BRANDS)} Store {i}', 'owner_id': i,
+         'shop_image': f'/images/shops/{i}.jpg', 'created_at': created}
+        for i in range(1, spec.shops + 1)
+    ])
+    addresses = []
+    timings = []
+    for shop_id in range(1, spec.shops + 1):
+        latitude, longitude = random_point(rnd, spec.center_lat, spec.center_lng, spec.spread_km)
+        addresses.append({
+            'address_id': shop_id, 'shop_id': shop_id, 'city': rnd.choice(CITIES), 'country': 'India',
+            'pincode': f'400{rnd.randint(0, 999):03d}', 'landmark': f'Near landmark {shop_id % 50}',
+            'area': f'Area {shop_id % 40}', 'latitude': Decimal(str(latitude)), 'longitude': Decimal(str(longitude))
+        })
+        # Most shops keep day hours; some stay open past midnight, some close on Sundays
+        opening = time(rnd.choice([8, 9, 10, 11]), rnd.choice([0, 30]))
+        closing = time(2, 0) if shop_id % 10 == 0 else time(rnd.choice([19, 20, 21, 22]), 0)
+        for day in DAYS:
+            if day == 'Sunday' and shop_id % 7 == 0:
+                continue
+            timings.append({'shop_id': shop_id, 'day': day, 'open_time': opening, 'close_time': closing})
+    _insert(ShopAddress, addresses)
+    _insert(ShopTiming, timings)
+
+    products = []
+    images = []
+    offers = []
+    offers_per_product = min(spec.offers_per_product, spec.shops)
+    for product_id in range(1, spec.products + 1):
+        word = rnd.choice(WORDS)
+        products.append({
+            'product_id': product_id,
+            'product_name': f'{rnd.choice(BRANDS)} {word} {rnd.choice(QUALIFIERS)} {product_id}',
+            'category_id': rnd.randint(1, len(CATEGORIES)),
+            'brand': rnd.choice(BRANDS),
+            'description': f'{rnd.choice(QUALIFIERS).title()} {word} for everyday use, {rnd.choice(WORDS)} compatible',
+            'color': rnd.choice(COLORS),
+            'created_at': created + timedelta(minutes=product_id)
+        })
+        images.append({'product_id': product_id, 'image_url': f'/images/products/{product_id}.jpg'})
+        base_price = rnd.randint(100, 100000)
+        for shop_id in rnd.sample(range(1, spec.shops + 1), offers_per_product):
+            offers.append({
+                'shop_id': shop_id, 'product_id': product_id,
+                'price': Decimal(base_price * rnd.randint(85, 115)) / 100,
+                'stock': 0 if rnd.random() < 0.1 else rnd.randint(1, 50)
+            })
+    _insert(Product, products)
+    _insert(ProductImage, images)
+    _insert(ShopProduct, offers)
+
+    # One hash for everyone: bcrypt cost, not uniqueness, is what login measures
+    password = hashpw(PASSWORD.encode('utf-8'), gensalt(spec.bcrypt_rounds)).decode('utf-8')
+    _insert(User, [
+        {'user_id': i, 'name': f'User {i}', 'email': user_email(i), 'password': password,
+         'phone': f'8{i:09d}', 'created_at': created}
+        for i in range(1, spec.users + 1)
+    ])
+
+    reviews = []
+    summaries = {}
+    for review_id in range(1, spec.reviews + 1):
+        product_id = rnd.randint(1, spec.products)
+        rating = rnd.choice([1, 2, 3, 3.5, 4, 4, 4.5, 5, 5])
+        reviews.append({
+            'review_id': review_id, 'user_id': rnd.randint(1, spec.users), 'product_id': product_id,
+            'rating': Decimal(str(rating)), 'review_text': f'Review {review_id}: {rnd.choice(QUALIFIERS)} {rnd.choice(WORDS)}',
+            'created_at': created + timedelta(minutes=review_id)
+        })
+        summary = summaries.setdefault(product_id, {
+            'product_id': product_id, 'review_count': 0, 'rating_sum': Decimal(0),
+            'rating_1': 0, 'rating_2': 0, 'rating_3': 0, 'rating_4': 0, 'rating_5': 0
+        })
+        summary['review_count'] += 1
+        summary['rating_sum'] += Decimal(str(rating))
+        summary[f'rating_{min(5, max(1, int(rating)))}'] += 1
+    _insert(ProductReview, reviews)
+    _insert(ProductRatingSummary, list(summaries.values()))
+
+    _insert(SearchHistory, [
+        {'user_id': rnd.randint(1, spec.users), 'search_item': rnd.choice(WORDS),
+         'timestamp': created + timedelta(seconds=i)}
+        for i in range(spec.searches)
+    ])
+    # Bulk inserts bypass the ORM events that keep Product_Offers current
+    product_offers.rebuild(db.session.connection())
+    db.session.commit()
+
+    return {
+        'categories': len(CATEGORIES), 'shops': spec.shops, 'timings': len(timings), 'products': spec.products,
+        'offers': len(offers), 'users': spec.users, 'reviews': spec.reviews, 'searches': spec.searches
+    }
+
+def user_email(user_id):
+    return f'user{user_id}@example.com'
+
+def add_arguments(parser):
+    """Add a ``--<field>`` option for every DatasetSpec field."""
+    for name, default in asdict(DatasetSpec()).items():
+        parser.add_argument('--' + name.replace('_', '-'), type=type(default), default=default)
+
+def spec_from_args(args):
+    return DatasetSpec(**{name: getattr(args, name) for name in asdict(DatasetSpec())})
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', required=True, help='SQLite file to create (must not exist)')
+    add_arguments(parser)
+    args = parser.parse_args()
+    if os.path.exists(args.db):
+        parser.error(f'{args.db} already exists')
+
+    from benchmarks.load_test import benchmark_config
+    from app import create_app
+    app = create_app(benchmark_config(args.db, args.bcrypt_rounds))
+    with app.app_context():
+        counts = generate(spec_from_args(args))
+    print(', '.join(f'{count} {table}' for table, count in counts.items()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,335 @@
+"""
+Index advisor: which indexes the API's queries use, and which ones they lack.
+
+Generates (or reuses) a synthetic SQLite database (``benchmarks.datagen``),
+sends representative requests to the read and write routes through the test
+client, captures every distinct SQL statement they issue (with the
+parameters of its first execution) and runs ``EXPLAIN QUERY PLAN`` on each.
+It reports:
+
+- missing indexes: tables a statement reads in full (or through an index
+  SQLite builds on the fly) although it filters or joins them on some
+  columns, with the index those columns suggest
+- unused indexes: secondary indexes of the schema no captured statement used
+- with ``--plans``, every statement with its plan and the routes issuing it
+
+SQLite stands in for SQL Server here: the planners differ, so treat the
+report as the list of plans to confirm on the production database, not as
+a verdict. Recommended indexes ship as migrations (``migrations/``).
+
+Usage (from the backend directory):
+    python -m benchmarks.index_advisor [--db /tmp/nearbuy-advisor.db --keep-db] [--plans] [--json report.json]
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import has_request_context, request
+from sqlalchemy import event, inspect
+from benchmarks.datagen import DatasetSpec, PASSWORD, WORDS, generate, user_email
+from benchmarks.load_test import benchmark_config
+
+ADMIN_KEY = 'index-advisor-key'
+
+# Plan lines: a table read in full, and an index used to read one
+_SCAN = re.compile(r'^SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?')
+_SEARCH = re.compile(r'^SEARCH (\w+) USING (AUTOMATIC )?(?:COVERING )?(?:INTEGER PRIMARY KEY|PRIMARY KEY|INDEX(?: (\w+))?)\s*(?:\((.*)\))?')
+# Table references (with their alias), predicates on and ORDER BY of
+# qualified columns (IS [NOT] NULL is not selective enough to index)
+_TABLE = re.compile(
+    r'(?:FROM|JOIN|UPDATE|INTO)\s+"?(\w+)"?'
+    r'(?:\s+(?:AS\s+)?(?!(?:WHERE|ON|JOIN|LEFT|INNER|OUTER|CROSS|GROUP|ORDER|LIMIT|SET|VALUES)\b)"?(\w+)"?)?',
+    re.IGNORECASE
+)
+_PREDICATE = re.compile(
+    r'"?(\w+)"?\."?(\w+)"?\s*(=|IN\b|<=|>=|<|>|BETWEEN\b|LIKE\b)\s*(?:"?(\w+)"?\."?(\w+)"?)?', re.IGNORECASE
+)
+_ORDER_BY = re.compile(r'ORDER BY (.*?)(?: LIMIT | OFFSET |\)|$)', re.IGNORECASE)
+_ORDER_COLUMN = re.compile(r'^"?(\w+)"?\."?(\w+)"?(?: (?:ASC|DESC))?$', re.IGNORECASE)
+
+def requests_to_send(spec):
+    """``(method, path, body)`` of the requests whose statements are captured."""
+    lat, lng = spec.center_lat, spec.center_lng
+    word = WORDS[0]
+    return [
+        ('GET', f'/api/products/search?q={word}', None),
+        ('GET', f'/api/products/search?q={word}&city=Mum&min_price=100&max_price=5000&include_total=true', None),
+        ('GET', '/api/products/search?city=Pune', None),
+        ('GET', f'/api/products/search?category=Elec&lat={lat}&lng={lng}&radius=5', None),
+        ('GET', '/api/products/search?per_page=5', None),
+        ('GET', f'/api/products/search?q={word}&open_now=true', None),
+        ('GET', f'/api/products/best-offers?lat={lat}&lng={lng}&product_id=1', None),
+        ('GET', f'/api/products/best-offers?lat={lat}&lng={lng}&q={word}', None),
+        ('GET', '/api/products/1', None),
+        ('GET', '/api/products/2?review_limit=3', None),
+        ('GET', '/api/products/1/reviews?per_page=5', None),
+        ('GET', '/api/products/categories', None),
+        ('GET', f'/api/products/suggest?q={word[:2]}', None),
+        ('GET', '/api/products/search/recent', None),
+        ('GET', '/api/shops/1', None),
+        ('GET', f'/api/shops/nearby?lat={lat}&lng={lng}&radius=5&open_now=true', None),
+        ('POST', '/api/reviews', {'product_id': 3, 'rating': 4, 'review_text': 'Index advisor'}),
+        ('POST', '/api/admin/inventory', 'shop_id,product_id,price,stock\n1,1,99.00,5\n2,4,120.00,0\n'),
+        ('POST', '/api/auth/logout', None)
+    ]
+
+def capture(app, spec):
+    """
+    Send the requests and return the distinct statements they issued.
+
+    Returns:
+        dict: statement -> {'parameters': first parameters, 'routes': set of route labels}
+    """
+    from models import db
+    from services.search_history import search_history
+    statements = {}
+    # Requests are sent one at a time, so statements of fan-out worker
+    # threads (no request context) belong to the request being served
+    current = ['(startup)']
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')):
+            return
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        label = current[0]
+        if has_request_context() and request.url_rule is not None:
+            label = f'{request.method} {request.url_rule.rule}'
+        entry = statements.setdefault(statement, {'parameters': parameters, 'routes': set()})
+        entry['routes'].add(label)
+
+    client = app.test_client()
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            login = client.post('/api/auth/login', json={'email': user_email(1), 'password': PASSWORD})
+            token = login.get_json()['token']
+            headers = {'Authorization': f'Bearer {token}', 'X-Admin-Key': ADMIN_KEY}
+            for method, path, body in requests_to_send(spec):
+                current[0] = f'{method} {path.split("?")[0]}'
+                if isinstance(body, str):
+                    response = client.open(path, method=method, data=body, headers=dict(headers, **{'Content-Type': 'text/csv'}))
+                else:
+                    response = client.open(path, method=method, json=body, headers=headers)
+                if response.status_code >= 400:
+                    print(f'warning: {method} {path} answered {response.status_code}', file=sys.stderr)
+                response.close()
+            # The search history writer inserts from its own thread
+            current[0] = '(search history writer)'
+            search_history.shutdown()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+def referenced_tables(statement):
+    """Alias (or table name) -> table name, for the tables ``statement`` reads."""
+    aliases = {}
+    for table, alias in _TABLE.findall(statement):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+def index_columns(statement, aliases, table, preceding):
+    """
+    Columns an index on ``table`` should have for ``statement``, given the
+    tables the plan reads before it.
+
+    Equality predicates come first, including join conditions on a table
+    read earlier (a join column only helps the inner side of the join),
+    then range predicates. When every predicate is an equality, the table's
+    ORDER BY columns follow, so the index also returns rows in order.
+    """
+    equality, ranges = [], []
+    for alias, column, operator, other_alias, other_column in _PREDICATE.findall(statement):
+        own, other = aliases.get(alias), aliases.get(other_alias)
+        if other_alias:
+            # Join condition: the side whose other table is read first
+            if own == table and other in preceding:
+                target = (equality, column)
+            elif other == table and own in preceding:
+                target = (equality, other_column)
+            else:
+                continue
+        elif own == table:
+            target = (equality if operator.upper() in ('=', 'IN') else ranges, column)
+        else:
+            continue
+        columns, column = target
+        if column not in equality and column not in ranges:
+            columns.append(column)
+    columns = equality + ranges
+    if equality and not ranges:
+        columns += [column for column in order_columns(statement, aliases).get(table, []) if column not in columns]
+    return columns
+
+def order_columns(statement, aliases):
+    """Table -> its columns in the statement's ORDER BY, if that is a plain column list."""
+    match = _ORDER_BY.search(statement)
+    if not match:
+        return {}
+    columns = defaultdict(list)
+    for part in match.group(1).split(','):
+        column = _ORDER_COLUMN.match(part.strip())
+        if column is None or column.group(1) not in aliases:
+            return {}
+        columns[aliases[column.group(1)]].append(column.group(2))
+    return columns
+
+def explain(connection, statement, parameters):
+    """Detail lines of the statement's query plan."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+        return [row[3] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def analyze(engine, statements):
+    """
+    Plan every statement and collect missing and used indexes.
+
+    Returns:
+        dict: ``missing`` (one entry per table/columns), ``unused`` and ``statements``
+    """
+    schema = inspect(engine)
+    indexes = {
+        index['name']: (table, index['column_names'])
+        for table in schema.get_table_names()
+        for index in schema.get_indexes(table)
+    }
+    used = set()
+    missing = {}
+    planned = []
+    raw = engine.raw_connection()
+    try:
+        for statement, entry in statements.items():
+            plan = explain(raw, statement, entry['parameters'])
+            flat = ' '.join(statement.split())
+            aliases = referenced_tables(flat)
+            # Tables in the order the plan reads them (outer loops first)
+            read = []
+            for line in plan:
+                scan, search = _SCAN.match(line), _SEARCH.match(line)
+                if search:
+                    if search.group(3):
+                        used.add(search.group(3))
+                    if not search.group(2):
+                        read.append(aliases.get(search.group(1), search.group(1)))
+                        continue
+                    # SQLite builds an index per execution: the schema lacks one
+                    table = aliases.get(search.group(1), search.group(1))
+                    read.append(table)
+                    columns = [part.split('=')[0].strip() for part in (search.group(4) or '').split(' AND ')]
+                    columns = [column for column in columns if column]
+                elif scan:
+                    if scan.group(2):
+                        used.add(scan.group(2))
+                    table = aliases.get(scan.group(1), scan.group(1))
+                    columns = index_columns(flat, aliases, table, set(read))
+                    read.append(table)
+                    if not columns:
+                        # An intended full read (snapshot load, rebuild)
+                        continue
+                else:
+                    continue
+                if _leading_index(indexes, table, columns):
+                    continue
+                key = (table, tuple(columns))
+                finding = missing.setdefault(key, {'table': table, 'columns': list(columns), 'routes': set(), 'statements': 0})
+                finding['routes'].update(entry['routes'])
+                finding['statements'] += 1
+            planned.append({'statement': flat, 'routes': sorted(entry['routes']), 'plan': plan})
+    finally:
+        raw.close()
+
+    unused = [
+        {'index': name, 'table': table, 'columns': columns}
+        for name, (table, columns) in sorted(indexes.items())
+        if name not in used and not name.startswith('sqlite_autoindex')
+    ]
+    return {
+        'missing': [dict(finding, routes=sorted(finding['routes'])) for finding in missing.values()],
+        'unused': unused,
+        'statements': planned
+    }
+
+def _leading_index(indexes, table, columns):
+    # An existing index led by the first predicate column already serves it
+    return any(
+        index_table == table and index_columns and index_columns[0] == columns[0]
+        for index_table, index_columns in indexes.values()
+    )
+
+def print_report(report, show_plans):
+    print(f'{len(report["statements"])} distinct statements captured')
+    print('\nMissing indexes (full scans or automatic indexes on filtered/joined tables):')
+    if not report['missing']:
+        print('  none')
+    for finding in sorted(report['missing'], key=lambda f: (f['table'], f['columns'])):
+        print(f'  {finding["table"]}({", ".join(finding["columns"])})  '
+              f'{finding["statements"]} statement(s): {", ".join(finding["routes"])}')
+    print('\nUnused indexes:')
+    if not report['unused']:
+        print('  none')
+    for index in report['unused']:
+        print(f'  {index["index"]} ON {index["table"]}({", ".join(index["columns"])})')
+    if show_plans:
+        for entry in report['statements']:
+            print(f'\n{", ".join(entry["routes"])}\n  {entry["statement"]}')
+            for line in entry['plan']:
+                print(f'    {line}')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', help='SQLite file to use (default: a temporary file)')
+    parser.add_argument('--keep-db', action='store_true', help='Reuse --db if it exists and do not delete it')
+    parser.add_argument('--shops', type=int, default=200)
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--plans', action='store_true', help='Print every statement with its plan')
+    parser.add_argument('--json', dest='json_path', help='Also write the report to this file')
+    args = parser.parse_args()
+
+    spec = DatasetSpec(shops=args.shops, products=args.products, reviews=args.products * 5, bcrypt_rounds=4)
+    temp_dir = None
+    db_path = args.db
+    if not db_path:
+        temp_dir = tempfile.mkdtemp(prefix='nearbuy-advisor-')
+        db_path = os.path.join(temp_dir, 'nearbuy.db')
+
+    class AdvisorConfig(benchmark_config(db_path, spec.bcrypt_rounds)):
+        ADMIN_API_KEY = ADMIN_KEY
+
+    try:
+        from app import create_app
+        from models import db
+        app = create_app(AdvisorConfig)
+        if not (args.keep_db and os.path.exists(db_path)):
+            if os.path.exists(db_path):
+                os.remove(db_path)
+            with app.app_context():
+                generate(spec)
+        statements = capture(app, spec)
+        with app.app_context():
+            report = analyze(db.engine, statements)
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        elif db_path and not args.keep_db and os.path.exists(db_path):
+            os.remove(db_path)
+
+    print_report(report, args.plans)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'\nReport written to {args.json_path}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+"""
+Load test of the main API endpoints against a synthetic SQLite database.
+
+Generates a dataset (``benchmarks.datagen``), serves the app with the
+threaded werkzeug server on a free local port and drives each endpoint
+(search, product detail, shop detail, nearby, login) with ``--concurrency``
+keep-alive clients. Reports throughput and p50/p95/p99 latency per endpoint
+and writes them, with the commit, dataset and settings, to
+``benchmarks/results/<timestamp>-<commit>.json`` so runs on different commits
+can be compared (``--compare``). Client and server share one process, so
+absolute numbers are lower than under gunicorn; use ``--url`` to load an
+external server started on the same dataset (``--db`` with ``--keep-db``).
+
+Usage (from the backend directory):
+    python -m benchmarks.load_test [--requests 1000] [--concurrency 8] [--shops 500] [--compare results/x.json]
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timezone
+from dataclasses import asdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import make_server, WSGIRequestHandler
+from config import Config
+from benchmarks.datagen import PASSWORD, WORDS, add_arguments, spec_from_args, generate, random_point, user_email
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+ENDPOINTS = ['search', 'product_detail', 'shop_detail', 'nearby', 'login']
+
+def benchmark_config(db_path, bcrypt_rounds=12):
+    """Config class for the app under test, backed by the SQLite file ``db_path``."""
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.abspath(db_path)
+        # Pooled connections move between the server's request threads
+        SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'check_same_thread': False}}
+        BCRYPT_ROUNDS = bcrypt_rounds
+        # The database is generated after the app is created
+        DIMENSIONS_PRELOAD = False
+        SECRET_KEY = 'benchmark-secret-key'
+    return BenchmarkConfig
+
+class QuietHandler(WSGIRequestHandler):
+    # Keep-alive, so the numbers are not dominated by TCP connects
+    protocol_version = 'HTTP/1.1'
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+def request_factory(name, spec, rnd):
+    """``(method, path, body)`` of a random request to endpoint ``name``."""
+    if name == 'search':
+        return 'GET', '/api/products/search?' + urllib.parse.urlencode({'q': rnd.choice(WORDS), 'per_page': 20}), None
+    if name == 'product_detail':
+        return 'GET', f'/api/products/{rnd.randint(1, spec.products)}', None
+    if name == 'shop_detail':
+        return 'GET', f'/api/shops/{rnd.randint(1, spec.shops)}', None
+    if name == 'nearby':
+        lat, lng = random_point(rnd, spec.center_lat, spec.center_lng, spec.spread_km)
+        return 'GET', '/api/shops/nearby?' + urllib.parse.urlencode({'lat': lat, 'lng': lng, 'radius': 5}), None
+    if name == 'login':
+        body = {'email': user_email(rnd.randint(1, spec.users)), 'password': PASSWORD}
+        return 'POST', '/api/auth/login', json.dumps(body)
+    raise ValueError(f'Unknown endpoint {name}')
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return None
+    rank = min(max(math.ceil(fraction * len(ordered)), 1), len(ordered))
+    return ordered[rank - 1]
+
+def run_endpoint(host, port, name, spec, requests, concurrency, warmup, seed):
+    """
+    Send ``requests`` requests to ``name`` from ``concurrency`` client threads.
+
+    Returns:
+        dict: Request/error counts, wall time, throughput and latency percentiles (ms)
+    """
+    remaining = [requests]
+    lock = threading.Lock()
+    latencies = []
+    errors = []
+
+    def worker(worker_id, count_limit=None):
+        rnd = random.Random(seed * 1000 + worker_id)
+        connection = http.client.HTTPConnection(host, port, timeout=60)
+        own = []
+        sent = 0
+        while True:
+            if count_limit is not None:
+                if sent >= count_limit:
+                    break
+            else:
+                with lock:
+                    if remaining[0] <= 0:
+                        break
+                    remaining[0] -= 1
+            sent += 1
+            method, path, body = request_factory(name, spec, rnd)
+            headers = {'Content-Type': 'application/json'} if body else {}
+            started = time.perf_counter()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=60)
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            if count_limit is None:
+                if status == 200:
+                    own.append(elapsed)
+                else:
+                    with lock:
+                        errors.append(status)
+        connection.close()
+        with lock:
+            latencies.extend(own)
+
+    # Untimed warm-up (lazy indexes, caches, pool connections)
+    if warmup:
+        worker(-1, count_limit=warmup)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+
+    latencies.sort()
+    milliseconds = [value * 1000 for value in latencies]
+    error_counts = {}
+    for status in errors:
+        error_counts[str(status)] = error_counts.get(str(status), 0) + 1
+    return {
+        'requests': requests,
+        'succeeded': len(latencies),
+        'errors': error_counts,
+        'seconds': round(seconds, 3),
+        'throughput_rps': round(len(latencies) / seconds, 1) if seconds else None,
+        'latency_ms': {
+            'min': _round(milliseconds[0] if milliseconds else None),
+            'mean': _round(sum(milliseconds) / len(milliseconds) if milliseconds else None),
+            'p50': _round(percentile(milliseconds, 0.50)),
+            'p95': _round(percentile(milliseconds, 0.95)),
+            'p99': _round(percentile(milliseconds, 0.99)),
+            'max': _round(milliseconds[-1] if milliseconds else None)
+        }
+    }
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+def git_revision():
+    """``(commit, dirty)`` of the working tree, or ``(None, None)`` outside git."""
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=cwd,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=cwd,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status)
+
+def compare(current, baseline_path):
+    """Print per-endpoint changes against an earlier result file."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f'\nCompared with {baseline.get("commit")} ({baseline_path}):')
+    for name, result in current['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if not previous:
+            continue
+        changes = []
+        for key in ('p50', 'p95', 'p99'):
+            before, after = previous['latency_ms'].get(key), result['latency_ms'].get(key)
+            if before and after is not None:
+                changes.append(f'{key} {(after - before) / before * 100:+6.1f}%')
+        before, after = previous.get('throughput_rps'), result.get('throughput_rps')
+        if before and after is not None:
+            changes.append(f'throughput {(after - before) / before * 100:+6.1f}%')
+        print(f'  {name:15} ' + '  '.join(changes))
+    if baseline.get('dataset') != current['dataset']:
+        print('  (datasets differ; changes are not comparable)')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000, help='Timed requests per endpoint')
+    parser.add_argument('--login-requests', type=int, default=200, help='Timed login requests (bcrypt bound)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=50, help='Untimed requests per endpoint')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help='Comma-separated subset of ' + ', '.join(ENDPOINTS))
+    parser.add_argument('--db', help='SQLite file to use (default: a temporary file)')
+    parser.add_argument('--keep-db', action='store_true', help='Reuse --db if it exists and do not delete it')
+    parser.add_argument('--url', help='Load an already running server instead (e.g. http://127.0.0.1:5000)')
+    parser.add_argument('--output', help=f'Result file (default: {RESULTS_DIR}/<timestamp>-<commit>.json)')
+    parser.add_argument('--compare', help='Earlier result file to compare against')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    endpoints = [name.strip() for name in args.endpoints.split(',') if name.strip()]
+    for name in endpoints:
+        if name not in ENDPOINTS:
+            parser.error(f'unknown endpoint {name}')
+    spec = spec_from_args(args)
+
+    server = None
+    temp_dir = None
+    db_path = args.db
+    if not db_path and not args.url:
+        temp_dir = tempfile.mkdtemp(prefix='nearbuy-bench-')
+        db_path = os.path.join(temp_dir, 'nearbuy.db')
+    try:
+        if args.url:
+            target = urllib.parse.urlsplit(args.url)
+            host, port = target.hostname, target.port or 80
+        else:
+            from app import create_app
+            app = create_app(benchmark_config(db_path, spec.bcrypt_rounds))
+            if not (args.keep_db and os.path.exists(db_path)):
+                if os.path.exists(db_path):
+                    os.remove(db_path)
+                started = time.perf_counter()
+                with app.app_context():
+                    counts = generate(spec)
+                print(f'Generated {counts} in {time.perf_counter() - started:.1f}s')
+            server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+            host, port = '127.0.0.1', server.server_port
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        results = {}
+        for name in endpoints:
+            requests = args.login_requests if name == 'login' else args.requests
+            results[name] = run_endpoint(host, port, name, spec, requests, args.concurrency, args.warmup, spec.seed)
+            latency = results[name]['latency_ms']
+            print(f'{name:15} {results[name]["throughput_rps"]:>8} req/s  p50 {latency["p50"]:>8} ms  '
+                  f'p95 {latency["p95"]:>8} ms  p99 {latency["p99"]:>8} ms  errors {sum(results[name]["errors"].values())}')
+    finally:
+        if server is not None:
+            server.shutdown()
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        elif db_path and not args.keep_db and os.path.exists(db_path):
+            os.remove(db_path)
+
+    commit, dirty = git_revision()
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'dirty': dirty,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'server': args.url or 'werkzeug (threaded, in-process)',
+        'settings': {
+            'requests': args.requests,
+            'login_requests': args.login_requests,
+            'concurrency': args.concurrency,
+            'warmup': args.warmup
+        },
+        'dataset': asdict(spec),
+        'endpoints': results
+    }
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS_DIR, f'{stamp}-{commit or "nogit"}.json')
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Results written to {output}')
+
+    if args.compare:
+        compare(report, args.compare)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import json
+import os
+import click
+from flask.cli import with_appcontext
+from models import db
+from services import migrations, product_offers
+from services.inventory_import import InventoryImporter, read_rows, FORMATS, MAX_BATCH_SIZE
+
+def _format_of(path, fmt):
+    if fmt:
+        return fmt
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+def _load_checkpoint(checkpoint_path, source):
+    """Records already imported from ``source``, per its checkpoint file."""
+    try:
+        with open(checkpoint_path) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    if saved.get('source') != source['source'] or saved.get('size') != source['size']:
+        click.echo(f'Ignoring checkpoint {checkpoint_path}: it belongs to a different file')
+        return 0
+    return saved.get('position', 0)
+
+def _save_checkpoint(checkpoint_path, source, position):
+    # Write-then-rename so a crash never leaves a half-written checkpoint
+    temp_path = checkpoint_path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(dict(source, position=position), f)
+    os.replace(temp_path, checkpoint_path)
+
+@click.command('import-inventory')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension (.jsonl/.ndjson, else csv).')
+@click.option('--batch-size', default=MAX_BATCH_SIZE, show_default=True, help='Records per transaction.')
+@click.option('--checkpoint', 'checkpoint_path', help='Checkpoint file (default: PATH.checkpoint.json).')
+@click.option('--restart', is_flag=True, help='Ignore an existing checkpoint and start from the first record.')
+@with_appcontext
+def import_inventory_command(path, fmt, batch_size, checkpoint_path, restart):
+    """Upsert shop price/stock rows from a CSV or JSONL file into Shop_Product."""
+    checkpoint_path = checkpoint_path or path + '.checkpoint.json'
+    source = {'source': os.path.abspath(path), 'size': os.path.getsize(path)}
+    skip = 0 if restart else _load_checkpoint(checkpoint_path, source)
+    if skip:
+        click.echo(f'Resuming after record {skip}')
+
+    def report_batch(stats):
+        click.echo(
+            f"batch {stats['batch']}: up to record {stats['position']}, "
+            f"{stats['inserted']} inserted, {stats['updated']} updated, {stats['rejected']} rejected "
+            f"in {stats['seconds']:.3f}s ({stats['rows_per_second']} rows/s)"
+        )
+
+    importer = InventoryImporter(batch_size=batch_size, on_batch=report_batch)
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        report = importer.run(
+            read_rows(f, _format_of(path, fmt)),
+            skip=skip,
+            checkpoint=lambda position: _save_checkpoint(checkpoint_path, source, position)
+        )
+
+    for error in report['errors']:
+        click.echo(f"line {error['line']}: {error['error']}", err=True)
+    click.echo(
+        f"{report['inserted']} inserted, {report['updated']} updated, {report['rejected']} rejected "
+        f"in {report['seconds']}s ({report['rows_per_second']} rows/s)"
+    )
+    if report['failed']:
+        raise click.ClickException(
+            f"{report['failed']['error']}\nStopped after record {report['failed']['resume_from']}; "
+            f"run the command again to resume from the checkpoint"
+        )
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+@click.command('rebuild-offers')
+@with_appcontext
+def rebuild_offers_command():
+    """Rebuild Product_Offers and Product_Price_Ranges from the source tables."""
+    product_offers.rebuild(db.session.connection())
+    db.session.commit()
+    click.echo('Product_Offers and Product_Price_Ranges rebuilt')
+
+@click.command('migrate')
+@click.option('--to', 'target', type=int, help='Upgrade or downgrade to this version (default: the latest).')
+@click.option('--status', 'show_status', is_flag=True, help='List the migrations and whether each is applied.')
+@with_appcontext
+def migrate_command(target, show_status):
+    """Apply (or with --to, revert) schema migrations recorded in Schema_Migrations."""
+    if show_status:
+        for migration, applied_at in migrations.status(db.engine):
+            state = f'applied {applied_at:%Y-%m-%d %H:%M}' if applied_at else 'pending'
+            click.echo(f'{migration.version:>4} {migration.name:30} {state:24} {migration.description}')
+        return
+
+    current = max((migration.version for migration, applied_at in migrations.status(db.engine) if applied_at), default=0)
+    try:
+        if target is not None and target < current:
+            done = migrations.downgrade(
+                db.engine, target, on_migration=lambda m: click.echo(f'Reverting {m.version} {m.name}')
+            )
+        else:
+            done = migrations.upgrade(
+                db.engine, target, on_migration=lambda m: click.echo(f'Applying {m.version} {m.name}')
+            )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    if not done:
+        click.echo('Schema is up to date')
+
+def register_commands(app):
+    """Attach the ``flask`` CLI commands to ``app``."""
+    app.cli.add_command(import_inventory_command)
+    app.cli.add_command(rebuild_offers_command)
+    app.cli.add_command(migrate_command)
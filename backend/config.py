@@ -11,6 +11,143 @@ class Config:
     # URL encode the password to handle special characters
     ENCODED_PASSWORD = urllib.parse.quote_plus(PASSWORD)
     
-    SQLALCHEMY_DATABASE_URI = f'mssql+pyodbc://{USERNAME}:{ENCODED_PASSWORD}@{SERVER}/{DATABASE}?driver=ODBC+Driver+17+for+SQL+Server'
+    # DATABASE_URL (environment) overrides the connection built from the values above
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or f'mssql+pyodbc://{USERNAME}:{ENCODED_PASSWORD}@{SERVER}/{DATABASE}?driver=ODBC+Driver+17+for+SQL+Server'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = 'your-secret-key-change-this'  # Change this to a secure secret key
+    
+    # Connection pool, per worker process: DB_POOL_SIZE persistent connections
+    # plus up to DB_MAX_OVERFLOW extra under load; checkouts give up after
+    # DB_POOL_TIMEOUT seconds. Connections are replaced after DB_POOL_RECYCLE
+    # seconds and, with pre-ping, tested before use. Fast executemany sends
+    # bulk INSERT/UPDATE parameters in one round trip (pyodbc only).
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') != '0'
+    DB_FAST_EXECUTEMANY = os.environ.get('DB_FAST_EXECUTEMANY', '1') != '0'
+    # Record checkout wait times for /api/health/db-pool
+    DB_POOL_INSTRUMENT = os.environ.get('DB_POOL_INSTRUMENT', '1') != '0'
+    
+    # Detail endpoints run their independent queries concurrently on a shared
+    # pool of QUERY_FANOUT_WORKERS threads (0 runs them one after another),
+    # at most QUERY_FANOUT_PER_REQUEST at once per request. Each pooled query
+    # holds its own connection: keep workers well below the pool size.
+    QUERY_FANOUT_WORKERS = int(os.environ.get('QUERY_FANOUT_WORKERS', 8))
+    QUERY_FANOUT_PER_REQUEST = int(os.environ.get('QUERY_FANOUT_PER_REQUEST', 3))
+    
+    # Key expected in the X-Admin-Key header of admin endpoints; admin
+    # endpoints are disabled while it is unset
+    ADMIN_API_KEY = os.environ.get('ADMIN_API_KEY')
+    
+    # Spatial index for /api/shops/nearby: full reload interval in seconds
+    # (picks up address changes made by other processes; 0 disables)
+    GEO_INDEX_REFRESH_SECONDS = 300
+    
+    # Full-text product index: full reload interval in seconds (0 disables)
+    SEARCH_INDEX_REFRESH_SECONDS = 600
+    
+    # Typeahead (/api/products/suggest): most suggestions per request, the
+    # Search_History window that orders them by popularity, the full rebuild
+    # interval in seconds (0 disables) and the browser cache lifetime
+    SUGGEST_MAX_RESULTS = 20
+    SUGGEST_HISTORY_DAYS = 30
+    SUGGEST_REFRESH_SECONDS = 600
+    SUGGEST_MAX_AGE = 60
+    
+    # Product/shop detail response cache: 'local' (in-process LRU only),
+    # 'redis' (LRU in front of CACHE_REDIS_URL), 'shared-local' (LRU in front
+    # of an in-process stand-in for the shared store) or 'none'
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'local')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_LOCAL_MAXSIZE = 1024
+    CACHE_LOCAL_TTL = 60  # seconds
+    CACHE_SHARED_TTL = 300  # seconds
+    
+    # Verified JWTs remembered per process (until their exp) to skip re-decoding
+    AUTH_TOKEN_CACHE_SIZE = 10000
+    
+    # How often each process checks the Revoked_Tokens Data_Versions counter
+    # (and reloads the revocations when it changed): a logout takes up to
+    # this long to reach the other processes (0 checks on every verification)
+    AUTH_REVOCATION_POLL_SECONDS = 5
+    
+    # bcrypt cost factor for new hashes; logins rehash weaker stored hashes
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+    # Password hashing pool: concurrent hashes (default: min(4, CPUs)) and
+    # how many more may wait before requests get 429
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0)) or None
+    PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 16))
+    
+    # Search history: searches are queued and bulk-inserted by a background
+    # thread every SEARCH_HISTORY_BATCH_SIZE events or FLUSH_SECONDS; events
+    # beyond SEARCH_HISTORY_QUEUE_SIZE are dropped (and counted)
+    SEARCH_HISTORY_ENABLED = os.environ.get('SEARCH_HISTORY_ENABLED', '1') != '0'
+    SEARCH_HISTORY_BATCH_SIZE = 200
+    SEARCH_HISTORY_FLUSH_SECONDS = 2.0
+    SEARCH_HISTORY_QUEUE_SIZE = 10000
+    # Window for /api/products/search/popular, in minutes
+    SEARCH_HISTORY_WINDOW_MINUTES = 60
+    
+    # Inventory feeds (POST /api/admin/inventory): records per transaction, max 1000
+    INVENTORY_IMPORT_BATCH_SIZE = 1000
+    
+    # Opening hours index for open_now/open_at filters: time zone the
+    # Shop_Timings hours are in, and full reload interval in seconds (0 disables)
+    SHOP_TIMEZONE = os.environ.get('SHOP_TIMEZONE', 'Asia/Kolkata')
+    SHOP_HOURS_REFRESH_SECONDS = 600
+    
+    # /api/products/best-offers: score = price_weight * price + distance_weight * km,
+    # so the default weight prices each kilometer like 10 currency units; and
+    # the most relevant products considered for a text query
+    BEST_OFFERS_DISTANCE_WEIGHT = 10.0
+    BEST_OFFERS_MAX_PRODUCTS = 50
+    
+    # Cache-Control of successful GET responses, by blueprint; read endpoints
+    # send ETag/Last-Modified, so clients revalidate and get 304 when unchanged.
+    # Other responses (and blueprints not listed) are 'no-store'.
+    CACHE_CONTROL = {
+        'products': 'public, max-age=0, must-revalidate',
+        'shops': 'public, max-age=0, must-revalidate'
+    }
+    
+    # In-memory snapshot of categories, shops and shop addresses (used instead
+    # of joins and for /api/products/categories): loaded at startup, polled
+    # for Data_Versions changes every DIMENSIONS_POLL_SECONDS and fully
+    # reloaded every DIMENSIONS_REFRESH_SECONDS (0 disables either)
+    DIMENSIONS_PRELOAD = True
+    DIMENSIONS_POLL_SECONDS = 5
+    DIMENSIONS_REFRESH_SECONDS = 600
+    
+    # Request profiling (off by default): per-route latency histograms, SQL
+    # statement counts/time and JSON encoding time at /api/health/metrics;
+    # optionally echoed per request in a Server-Timing header. A statement run
+    # PROFILING_N_PLUS_ONE_THRESHOLD times in one request is flagged as N+1.
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '0') == '1'
+    PROFILING_SERVER_TIMING = os.environ.get('PROFILING_SERVER_TIMING', '0') == '1'
+    PROFILING_N_PLUS_ONE_THRESHOLD = 5
+    
+    # Response compression: JSON/text bodies of at least COMPRESSION_MIN_SIZE
+    # bytes are sent in the client's preferred encoding among
+    # COMPRESSION_ENCODINGS (ties go to the first listed; br needs the
+    # 'brotli' package and zstd 'zstandard'). Compressed bytes of responses
+    # with an ETag are kept for COMPRESSION_CACHE_SIZE URL/version/encoding
+    # combinations, entries up to COMPRESSION_CACHE_MAX_BYTES each.
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', '1') == '1'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_ENCODINGS = ('zstd', 'br', 'gzip')
+    COMPRESSION_LEVELS = {
+        'gzip': int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6)),
+        'br': int(os.environ.get('COMPRESSION_BR_LEVEL', 4)),
+        'zstd': int(os.environ.get('COMPRESSION_ZSTD_LEVEL', 3))
+    }
+    COMPRESSION_CACHE_SIZE = 256
+    COMPRESSION_CACHE_MAX_BYTES = 1024 * 1024
+    
+    # ASGI mode (uvicorn asgi:app): product detail is served by a coroutine
+    # view on the async engine, which uses the asyncio driver of the same
+    # database (mssql+aioodbc for SQL Server) unless ASYNC_DATABASE_URL is set;
+    # other requests run on ASGI_WSGI_WORKERS threads
+    ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL')
+    ASGI_WSGI_WORKERS = int(os.environ.get('ASGI_WSGI_WORKERS', 32))
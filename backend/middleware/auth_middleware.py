@@ -1,39 +1,232 @@
+import hashlib
+import hmac
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, current_app
+from sqlalchemy import bindparam, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 import jwt
-from config import Config
+from models import db, RevokedToken
+from services import data_versions
+from utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Revocation expiry of a token without ``exp`` (fits SQL Server's DATETIME)
+NEVER_EXPIRES = datetime(9999, 12, 31)
+
+# Unexpired revocations, reloaded when the table's Data_Versions counter changes
+_REVOKED_QUERY = select(RevokedToken.token_digest, RevokedToken.expires_at).where(
+    RevokedToken.expires_at > bindparam('now')
+)
+
+class TokenRevokedError(jwt.InvalidTokenError):
+    pass
+
+class TokenVerifier:
+    """
+    Verifies JWTs and remembers the ones that passed.
+
+    Verified tokens are kept in a bounded LRU keyed by the token's SHA-256
+    digest until their ``exp``, so repeat requests skip the HMAC check and
+    claim parsing.
+
+    Revocations are stored in ``Revoked_Tokens`` (until ``exp``), which every
+    worker process shares. Each process keeps the unexpired ones in memory
+    and reloads them when the table's ``Data_Versions`` counter, bumped in
+    the revoking transaction, has changed; the counter is read at most every
+    ``AUTH_REVOCATION_POLL_SECONDS``. A logout rejects the token at once in
+    its own process and within one poll interval in the others. Only tokens
+    with a valid signature get that far, and verification itself never
+    queries the database.
+    """
+
+    def __init__(self, maxsize=10000, poll_seconds=5):
+        self.verified = LRUCache(maxsize=maxsize, ttl=None)
+        self.poll_seconds = poll_seconds
+        self._revoked = {}  # digest -> exp (epoch seconds)
+        self._version = None
+        self._polled_at = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.verified = LRUCache(maxsize=app.config.get('AUTH_TOKEN_CACHE_SIZE', 10000), ttl=None)
+        self.poll_seconds = app.config.get('AUTH_REVOCATION_POLL_SECONDS', 5)
+
+    @staticmethod
+    def digest(token):
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def verify(self, token, secret_key):
+        """
+        Return the token's user_id.
+
+        Raises:
+            jwt.ExpiredSignatureError: If the token has expired
+            jwt.InvalidTokenError: If the token is invalid or revoked
+            SQLAlchemyError: If the revocations are due for a poll and
+                can't be read
+        """
+        digest = self.digest(token)
+        user_id = self.verified.get(digest)
+        if user_id is None:
+            payload = jwt.decode(token, secret_key, algorithms=['HS256'])
+            user_id = payload.get('user_id')
+            if user_id is None:
+                raise jwt.InvalidTokenError('Token has no user_id')
+            remaining = payload.get('exp', 0) - time.time()
+            if remaining > 0:
+                self.verified.set(digest, user_id, ttl=remaining)
+
+        if self._is_revoked(digest):
+            raise TokenRevokedError('Token has been revoked')
+        return user_id
+
+    def revoke(self, token, secret_key):
+        """
+        Reject ``token`` from now on, in every process, until it would have
+        expired anyway. Commits the current session.
+        """
+        try:
+            payload = jwt.decode(token, secret_key, algorithms=['HS256'])
+        except jwt.InvalidTokenError:
+            return
+        digest = self.digest(token)
+        exp = payload.get('exp')
+        expires_at = datetime.utcfromtimestamp(exp) if exp is not None else NEVER_EXPIRES
+
+        # Expired tokens fail verification anyway: drop their revocations
+        db.session.query(RevokedToken).filter(
+            RevokedToken.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+        if db.session.get(RevokedToken, digest.hex()) is None:
+            # Bumps the Revoked_Tokens counter the other processes poll
+            db.session.add(RevokedToken(token_digest=digest.hex(), expires_at=expires_at))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Revoked concurrently by another request
+            db.session.rollback()
+
+        with self._lock:
+            self._revoked[digest] = exp if exp is not None else float('inf')
+        self.verified.delete(digest)
+
+    def _is_revoked(self, digest):
+        self._ensure_fresh()
+        exp = self._revoked.get(digest)
+        return exp is not None and exp > time.time()
+
+    def _ensure_fresh(self):
+        polled_at = self._polled_at
+        if polled_at is not None and time.monotonic() - polled_at < self.poll_seconds:
+            return
+        with self._lock:
+            if self._polled_at is polled_at:
+                self._poll()
+
+    def _poll(self):
+        # The counter is read before the rows, so a revocation committed in
+        # between is picked up again by the next poll, never missed
+        table = RevokedToken.__tablename__
+        version = data_versions.read_versions([table])[table][0]
+        if version != self._version:
+            now = time.time()
+            revoked = {digest: exp for digest, exp in self._revoked.items() if exp > now}
+            for row in db.session.execute(_REVOKED_QUERY, {'now': datetime.utcnow()}):
+                revoked[bytes.fromhex(row.token_digest)] = _epoch(row.expires_at)
+            self._revoked = revoked
+            self._version = version
+        self._polled_at = time.monotonic()
+
+    def clear(self):
+        self.verified.clear()
+        with self._lock:
+            self._revoked = {}
+            self._version = self._polled_at = None
+
+def _epoch(expires_at):
+    if expires_at >= NEVER_EXPIRES:
+        return float('inf')
+    return (expires_at - datetime(1970, 1, 1)).total_seconds()
+
+token_verifier = TokenVerifier()
+
+data_versions.track(RevokedToken)
+
+def generate_token(user_id):
+    """Generate JWT token for user authentication"""
+    payload = {
+        'user_id': user_id,
+        'exp': datetime.utcnow() + timedelta(days=7)  # Token expires in 7 days
+    }
+    return jwt.encode(payload, current_app.config['SECRET_KEY'], algorithm='HS256')
+
+def verify_token(token):
+    """Verify JWT token and return user_id, or None if invalid, expired or revoked"""
+    try:
+        return token_verifier.verify(token, current_app.config['SECRET_KEY'])
+    except jwt.InvalidTokenError:
+        return None
+    except SQLAlchemyError as e:
+        # Optional authentication: without the revocation list, treat the
+        # request as anonymous rather than trusting the token
+        db.session.rollback()
+        logger.warning('Revoked_Tokens unavailable, ignoring token: %s', e)
+        return None
+
+def revoke_token(token):
+    """Revoke a JWT token (e.g. on logout)"""
+    token_verifier.revoke(token, current_app.config['SECRET_KEY'])
+
+def get_request_token():
+    """Bearer token from the Authorization header, or None"""
+    token = request.headers.get('Authorization')
+    if token and token.startswith('Bearer '):
+        token = token[7:]
+    return token or None
 
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = request.headers.get('Authorization')
-        
+        token = get_request_token()
+
         if not token:
             return jsonify({'error': 'Token is missing'}), 401
-        
+
         try:
-            # Remove 'Bearer ' prefix if present
-            if token.startswith('Bearer '):
-                token = token[7:]
-            
-            data = jwt.decode(token, Config.SECRET_KEY, algorithms=['HS256'])
-            request.current_user_id = data['user_id']
+            request.current_user_id = token_verifier.verify(token, current_app.config['SECRET_KEY'])
         except jwt.ExpiredSignatureError:
             return jsonify({'error': 'Token has expired'}), 401
+        except TokenRevokedError:
+            return jsonify({'error': 'Token has been revoked'}), 401
         except jwt.InvalidTokenError:
             return jsonify({'error': 'Token is invalid'}), 401
-        
+        except SQLAlchemyError as e:
+            # Without the revocation list a revoked token would pass: fail closed
+            db.session.rollback()
+            logger.warning('Revoked_Tokens unavailable, rejecting token: %s', e)
+            return jsonify({'error': 'Authentication is temporarily unavailable'}), 503
+
         return f(*args, **kwargs)
-    
+
     return decorated
 
-def generate_token(user_id):
-    import jwt
-    from datetime import datetime, timedelta
-    
-    payload = {
-        'user_id': user_id,
-        'exp': datetime.utcnow() + timedelta(days=7)  # Token expires in 7 days
-    }
+def admin_required(f):
+    """Require the X-Admin-Key header to match the configured ADMIN_API_KEY"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        expected = current_app.config.get('ADMIN_API_KEY')
+        if not expected:
+            return jsonify({'error': 'Admin API is disabled'}), 403
+        
+        provided = request.headers.get('X-Admin-Key', '')
+        if not hmac.compare_digest(provided.encode('utf-8'), expected.encode('utf-8')):
+            return jsonify({'error': 'Admin key is missing or invalid'}), 401
+        
+        return f(*args, **kwargs)
     
-    return jwt.encode(payload, Config.SECRET_KEY, algorithm='HS256')
+    return decorated
@@ -0,0 +1,252 @@
+import gzip
+import threading
+import time
+import zlib
+from flask import current_app, request
+from utils.cache import LRUCache
+from utils.http_cache import register_representation_cache
+
+try:
+    import brotli
+except ImportError:  # optional: br encoding
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: zstd encoding
+    zstandard = None
+
+# Content types worth compressing (JSON and text; images are compressed already)
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'application/javascript'}
+
+
+def _gzip(data, level):
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _gzip_stream(level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return (lambda data: compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)), compressor.flush
+
+
+def _brotli(data, level):
+    return brotli.compress(data, quality=level)
+
+
+def _brotli_stream(level):
+    compressor = brotli.Compressor(quality=level)
+    return (lambda data: compressor.process(data) + compressor.flush()), compressor.finish
+
+
+def _zstd(data, level):
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def _zstd_stream(level):
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    return (lambda data: compressor.compress(data) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)), compressor.flush
+
+
+# Encoding -> (whole-body compressor, streaming compressor factory), where installed
+CODECS = {'gzip': (_gzip, _gzip_stream)}
+if brotli is not None:
+    CODECS['br'] = (_brotli, _brotli_stream)
+if zstandard is not None:
+    CODECS['zstd'] = (_zstd, _zstd_stream)
+
+
+class EncodingStats:
+    """Per-encoding response count, bytes before/after and CPU time spent compressing."""
+
+    __slots__ = ('responses', 'streams', 'bytes_in', 'bytes_out', 'cpu_seconds', 'cache_hits')
+
+    def __init__(self):
+        self.responses = 0
+        self.streams = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+        self.cache_hits = 0
+
+
+class ResponseCompressor:
+    """
+    Negotiated gzip/br/zstd compression of JSON and text responses.
+
+    The encoding is the one the client's ``Accept-Encoding`` rates highest,
+    ties going to the first of ``COMPRESSION_ENCODINGS``; br and zstd need
+    the ``brotli`` and ``zstandard`` packages. Bodies under
+    ``COMPRESSION_MIN_SIZE`` bytes are sent as they are, streamed responses
+    are compressed chunk by chunk (each chunk is flushed, so streaming still
+    delivers rows as they are read).
+
+    Responses with a version-derived ETag (see ``utils.http_cache``) have
+    their compressed bytes cached per URL, ETag and encoding, so a repeat
+    request for unchanged data is answered from the cache without running
+    the view or compressing again. Views with side effects do them in their
+    validator (as search does) or opt out with
+    ``conditional(..., representations=False)``.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.min_size = 1024
+        self.encodings = ['gzip']
+        self.levels = {}
+        self.cache = LRUCache(maxsize=0, ttl=None)
+        self.cache_max_bytes = 0
+        self._stats = {}
+        self._skipped = {'small': 0, 'not_accepted': 0}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESSION_ENABLED', True)
+        if not self.enabled:
+            return
+        self.min_size = app.config.get('COMPRESSION_MIN_SIZE', 1024)
+        self.encodings = [
+            encoding for encoding in app.config.get('COMPRESSION_ENCODINGS', ('zstd', 'br', 'gzip'))
+            if encoding in CODECS
+        ]
+        self.levels = dict(app.config.get('COMPRESSION_LEVELS', {}))
+        self.cache = LRUCache(maxsize=app.config.get('COMPRESSION_CACHE_SIZE', 256), ttl=None)
+        self.cache_max_bytes = app.config.get('COMPRESSION_CACHE_MAX_BYTES', 1024 * 1024)
+        self._stats = {encoding: EncodingStats() for encoding in self.encodings}
+        app.after_request(self._compress)
+        register_representation_cache(self._cached)
+
+    def negotiate(self):
+        """Encoding to use for the current request, or None for identity."""
+        accept = request.accept_encodings
+        best, best_quality = None, 0
+        for encoding in self.encodings:
+            quality = accept[encoding]
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def _level(self, encoding):
+        return self.levels.get(encoding, {'gzip': 6, 'br': 4, 'zstd': 3}[encoding])
+
+    def _cache_key(self, etag, encoding):
+        return request.full_path, etag, encoding
+
+    def _cached(self, etag):
+        # utils.http_cache representation cache: the compressed bytes of this
+        # URL at this ETag, in the negotiated encoding
+        encoding = self.negotiate()
+        if encoding is None:
+            return None
+        entry = self.cache.get(self._cache_key(etag, encoding))
+        if entry is None:
+            return None
+        body, mimetype = entry
+        with self._lock:
+            self._stats[encoding].cache_hits += 1
+        response = current_app.response_class(body, mimetype=mimetype)
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def _compress(self, response):
+        if response.status_code == 304:
+            # Same Vary as the 200 it revalidates
+            response.vary.add('Accept-Encoding')
+            return response
+        if (response.status_code != 200 or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES and not response.mimetype.startswith('text/')):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self.negotiate()
+        if encoding is None:
+            with self._lock:
+                self._skipped['not_accepted'] += 1
+            return response
+
+        if response.is_streamed:
+            response.response = self._compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+            response.headers['Content-Encoding'] = encoding
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            with self._lock:
+                self._skipped['small'] += 1
+            return response
+
+        started = time.thread_time()
+        compressed = CODECS[encoding][0](data, self._level(encoding))
+        cpu = time.thread_time() - started
+        with self._lock:
+            stats = self._stats[encoding]
+            stats.responses += 1
+            stats.bytes_in += len(data)
+            stats.bytes_out += len(compressed)
+            stats.cpu_seconds += cpu
+
+        etag, weak = response.get_etag()
+        if etag and len(compressed) <= self.cache_max_bytes:
+            self.cache.set(self._cache_key(etag, encoding), (compressed, response.mimetype))
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def _compress_stream(self, chunks, encoding):
+        process, finish = CODECS[encoding][1](self._level(encoding))
+        bytes_in = bytes_out = 0
+        cpu = 0.0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                started = time.thread_time()
+                compressed = process(chunk)
+                cpu += time.thread_time() - started
+                bytes_in += len(chunk)
+                bytes_out += len(compressed)
+                if compressed:
+                    yield compressed
+            started = time.thread_time()
+            tail = finish()
+            cpu += time.thread_time() - started
+            bytes_out += len(tail)
+            if tail:
+                yield tail
+        finally:
+            with self._lock:
+                stats = self._stats[encoding]
+                stats.streams += 1
+                stats.bytes_in += bytes_in
+                stats.bytes_out += bytes_out
+                stats.cpu_seconds += cpu
+
+    def stats(self):
+        with self._lock:
+            encodings = {
+                encoding: {
+                    'responses': s.responses,
+                    'streams': s.streams,
+                    'bytes_in': s.bytes_in,
+                    'bytes_out': s.bytes_out,
+                    'ratio': round(s.bytes_out / s.bytes_in, 4) if s.bytes_in else None,
+                    'cpu_seconds': round(s.cpu_seconds, 6),
+                    'cache_hits': s.cache_hits
+                }
+                for encoding, s in self._stats.items()
+            }
+            skipped = dict(self._skipped)
+        return {
+            'enabled': self.enabled,
+            'min_size': self.min_size,
+            'encodings': encodings,
+            'skipped': skipped,
+            'cache': dict(self.cache.stats.as_dict(), size=len(self.cache), maxsize=self.cache.maxsize)
+        }
+
+
+response_compressor = ResponseCompressor()
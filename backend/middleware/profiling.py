@@ -0,0 +1,245 @@
+import bisect
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from flask import g, request, has_request_context, Response
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Profile of work a thread does on behalf of a request outside its context
+# (query fan-out workers), see RequestProfiler.run_detached
+_detached = threading.local()
+
+
+class RouteMetrics:
+    """Latency histogram and SQL/serialization totals of one route."""
+
+    __slots__ = ('buckets', 'count', 'seconds', 'sql_statements', 'db_seconds', 'serialize_seconds', 'n_plus_one')
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.seconds = 0.0
+        self.sql_statements = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.n_plus_one = 0
+
+
+class RequestProfiler:
+    """
+    Opt-in per-route request profiling (``PROFILING_ENABLED``).
+
+    For every request it measures wall time, the number of SQL statements
+    and the time spent executing them (SQLAlchemy cursor events), and the
+    time spent encoding JSON responses. Totals are kept per route and
+    rendered in the Prometheus text format. A statement executed at least
+    ``PROFILING_N_PLUS_ONE_THRESHOLD`` times in one request is counted (and
+    logged) as a likely N+1 query. With ``PROFILING_SERVER_TIMING`` the
+    per-request numbers are also sent in a ``Server-Timing`` header.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.server_timing = False
+        self.n_plus_one_threshold = 5
+        self._routes = defaultdict(RouteMetrics)
+        self._lock = threading.Lock()
+        self._listening = False
+
+    def init_app(self, app):
+        self.enabled = app.config.get('PROFILING_ENABLED', False)
+        if not self.enabled:
+            return
+        self.server_timing = app.config.get('PROFILING_SERVER_TIMING', False)
+        self.n_plus_one_threshold = app.config.get('PROFILING_N_PLUS_ONE_THRESHOLD', 5)
+
+        app.json = TimedJSONProvider(app)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.add_url_rule('/api/health/metrics', 'profiling_metrics', self._metrics_view, methods=['GET'])
+
+        if not self._listening:
+            # All engines, including ones created after this call
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(Engine, 'handle_error', _handle_error)
+            self._listening = True
+
+    def _start(self):
+        g._profile = _new_profile()
+
+    def profiling_request(self):
+        """Whether the current request is being profiled."""
+        return _current_profile() is not None
+
+    def run_detached(self, func):
+        """
+        ``(func(), profile)``: run ``func`` without a request context (on a
+        worker thread), counting its SQL statements in a profile of its own
+        for the requesting thread to ``merge``.
+        """
+        _detached.profile = profile = _new_profile()
+        try:
+            return func(), profile
+        finally:
+            _detached.profile = None
+
+    def merge(self, profile):
+        """Add a ``run_detached`` profile to the current request's."""
+        current = _current_profile()
+        if current is None:
+            return
+        # Statements that ran in parallel add up: db time can exceed wall time
+        current['sql_statements'] += profile['sql_statements']
+        current['db_seconds'] += profile['db_seconds']
+        current['statements'].update(profile['statements'])
+
+    def _finish(self, response):
+        profile = g.pop('_profile', None)
+        if profile is None:
+            return response
+        elapsed = time.perf_counter() - profile['started']
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+        repeated = [
+            (statement, count) for statement, count in profile['statements'].items()
+            if count >= self.n_plus_one_threshold
+        ]
+        for statement, count in repeated:
+            logger.warning('Possible N+1 on %s %s: executed %d times: %s',
+                           request.method, route, count, ' '.join(statement.split())[:200])
+
+        with self._lock:
+            metrics = self._routes[(request.method, route)]
+            position = bisect.bisect_left(LATENCY_BUCKETS, elapsed)
+            if position < len(LATENCY_BUCKETS):
+                metrics.buckets[position] += 1
+            metrics.count += 1
+            metrics.seconds += elapsed
+            metrics.sql_statements += profile['sql_statements']
+            metrics.db_seconds += profile['db_seconds']
+            metrics.serialize_seconds += profile['serialize_seconds']
+            metrics.n_plus_one += len(repeated)
+
+        if self.server_timing:
+            timings = [
+                f'app;dur={elapsed * 1000:.1f}',
+                f'db;dur={profile["db_seconds"] * 1000:.1f};desc="{profile["sql_statements"]} queries"',
+                f'ser;dur={profile["serialize_seconds"] * 1000:.1f}'
+            ]
+            if repeated:
+                timings.append(f'n1;desc="{len(repeated)} repeated statements"')
+            response.headers.add('Server-Timing', ', '.join(timings))
+        return response
+
+    def render(self):
+        """All route metrics in the Prometheus text exposition format."""
+        with self._lock:
+            routes = sorted(self._routes.items())
+            snapshot = [(key, list(m.buckets), m.count, m.seconds, m.sql_statements,
+                         m.db_seconds, m.serialize_seconds, m.n_plus_one) for key, m in routes]
+
+        lines = [
+            '# HELP nearbuy_request_duration_seconds Request latency by route.',
+            '# TYPE nearbuy_request_duration_seconds histogram'
+        ]
+        for (method, route), buckets, count, seconds, *_ in snapshot:
+            labels = f'method="{method}",route="{_escape(route)}"'
+            cumulative = 0
+            for bound, bucket in zip(LATENCY_BUCKETS, buckets):
+                cumulative += bucket
+                lines.append(f'nearbuy_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'nearbuy_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'nearbuy_request_duration_seconds_sum{{{labels}}} {seconds:.6f}')
+            lines.append(f'nearbuy_request_duration_seconds_count{{{labels}}} {count}')
+
+        counters = [
+            ('nearbuy_sql_statements_total', 'SQL statements executed, by route.', 4, '{}'),
+            ('nearbuy_db_seconds_total', 'Time spent executing SQL, by route.', 5, '{:.6f}'),
+            ('nearbuy_serialize_seconds_total', 'Time spent encoding JSON responses, by route.', 6, '{:.6f}'),
+            ('nearbuy_n_plus_one_total', 'Statements repeated at least the N+1 threshold within one request, by route.', 7, '{}')
+        ]
+        for name, help_text, field, value_format in counters:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for row in snapshot:
+                method, route = row[0]
+                lines.append(f'{name}{{method="{method}",route="{_escape(route)}"}} {value_format.format(row[field])}')
+        return '\n'.join(lines) + '\n'
+
+    def _metrics_view(self):
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that adds its encoding time to the request profile."""
+
+    def dumps(self, obj, **kwargs):
+        profile = g.get('_profile') if has_request_context() else None
+        if profile is None:
+            return super().dumps(obj, **kwargs)
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            profile['serialize_seconds'] += time.perf_counter() - started
+
+
+def _new_profile():
+    return {
+        'started': time.perf_counter(),
+        'sql_statements': 0,
+        'db_seconds': 0.0,
+        'serialize_seconds': 0.0,
+        'statements': Counter()
+    }
+
+
+def _current_profile():
+    if has_request_context():
+        return g.get('_profile')
+    return getattr(_detached, 'profile', None)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('profile_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('profile_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    profile = _current_profile()
+    if profile is None:
+        return
+    profile['sql_statements'] += 1
+    profile['db_seconds'] += elapsed
+    profile['statements'][statement] += 1
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute
+    if context.connection is not None:
+        started = context.connection.info.get('profile_started')
+        if started:
+            started.pop()
+
+
+request_profiler = RequestProfiler()
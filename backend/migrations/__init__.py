@@ -0,0 +1,9 @@
+"""
+Versioned schema migrations, applied by ``flask --app app migrate``.
+
+Add a module ``v<next version>_<name>.py`` with ``upgrade(connection)`` (and
+``downgrade(connection)`` where it can be reverted). Migrations must be
+idempotent: databases built from ``scripts/01-create-database.sql`` or
+``db.create_all()`` may already contain their changes. Update the models and
+``scripts/01-create-database.sql`` in the same change.
+"""
@@ -0,0 +1,26 @@
+"""
+Secondary indexes on the columns the routes filter and join on.
+
+Found by ``benchmarks/index_advisor.py``: without them the product offer
+refresh scans Shop_Product by product, the importer and shop detail scan it
+by shop, shop detail and the offer refresh scan Shop_Address and
+Shop_Timings by shop, and every review page scans Product_Reviews.
+"""
+from services.migrations import create_index, drop_index
+
+# (name, table, key columns, included columns)
+INDEXES = [
+    ('IX_Shop_Product_product', 'Shop_Product', ['product_id', 'stock'], ['shop_id', 'price']),
+    ('IX_Shop_Product_shop', 'Shop_Product', ['shop_id', 'product_id'], ['price', 'stock']),
+    ('IX_Shop_Address_shop', 'Shop_Address', ['shop_id'], []),
+    ('IX_Shop_Timings_shop', 'Shop_Timings', ['shop_id'], ['day', 'open_time', 'close_time']),
+    ('IX_Product_Reviews_product', 'Product_Reviews', ['product_id', 'review_id'], [])
+]
+
+def upgrade(connection):
+    for name, table, columns, include in INDEXES:
+        create_index(connection, name, table, columns, include)
+
+def downgrade(connection):
+    for name, table, _, _ in reversed(INDEXES):
+        drop_index(connection, name, table)
@@ -0,0 +1,14 @@
+"""
+Index Search_History by time for the typeahead popularity window.
+
+The suggest index counts the searches of the last SUGGEST_HISTORY_DAYS days
+on every rebuild; with the searched text included the count never reads the
+table itself.
+"""
+from services.migrations import create_index, drop_index
+
+def upgrade(connection):
+    create_index(connection, 'IX_Search_History_timestamp', 'Search_History', ['timestamp'], ['search_item'])
+
+def downgrade(connection):
+    drop_index(connection, 'IX_Search_History_timestamp', 'Search_History')
@@ -0,0 +1,22 @@
+"""
+Add Revoked_Tokens, the logout list shared by every API process.
+
+Revocations used to live in each worker's memory, so a token logged out on
+one worker stayed valid on the others until it expired.
+"""
+from sqlalchemy import Column, DateTime, MetaData, String, Table
+from services.migrations import create_index
+
+def _table():
+    return Table(
+        'Revoked_Tokens', MetaData(),
+        Column('token_digest', String(64), primary_key=True),
+        Column('expires_at', DateTime, nullable=False)
+    )
+
+def upgrade(connection):
+    _table().create(connection, checkfirst=True)
+    create_index(connection, 'IX_Revoked_Tokens_expires', 'Revoked_Tokens', ['expires_at'])
+
+def downgrade(connection):
+    _table().drop(connection, checkfirst=True)
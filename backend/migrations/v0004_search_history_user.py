@@ -0,0 +1,13 @@
+"""
+Index Search_History by user for GET /api/products/search/recent.
+
+The caller's recent searches are read by user in time order; with the
+searched text included the query never reads the table itself.
+"""
+from services.migrations import create_index, drop_index
+
+def upgrade(connection):
+    create_index(connection, 'IX_Search_History_user', 'Search_History', ['user_id', 'timestamp'], ['search_item'])
+
+def downgrade(connection):
+    drop_index(connection, 'IX_Search_History_user', 'Search_History')
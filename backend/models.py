@@ -39,6 +39,10 @@ class ShopAddress(db.Model):
     latitude = db.Column(db.Numeric(10, 6))
     longitude = db.Column(db.Numeric(10, 6))
 
+    __table_args__ = (
+        db.Index('IX_Shop_Address_shop', 'shop_id'),
+    )
+
 class ShopTiming(db.Model):
     __tablename__ = 'Shop_Timings'
     timing_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -47,6 +51,10 @@ class ShopTiming(db.Model):
     open_time = db.Column(db.Time)
     close_time = db.Column(db.Time)
 
+    __table_args__ = (
+        db.Index('IX_Shop_Timings_shop', 'shop_id', mssql_include=['day', 'open_time', 'close_time']),
+    )
+
 class ProductCategory(db.Model):
     __tablename__ = 'Product_Categories'
     category_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -72,6 +80,11 @@ class ShopProduct(db.Model):
     price = db.Column(db.Numeric(10, 2))
     stock = db.Column(db.Integer)
 
+    __table_args__ = (
+        db.Index('IX_Shop_Product_product', 'product_id', 'stock', mssql_include=['shop_id', 'price']),
+        db.Index('IX_Shop_Product_shop', 'shop_id', 'product_id', mssql_include=['price', 'stock'])
+    )
+
 class ProductReview(db.Model):
     __tablename__ = 'Product_Reviews'
     review_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -81,6 +94,60 @@ class ProductReview(db.Model):
     review_text = db.Column(db.String(1000))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('IX_Product_Reviews_product', 'product_id', 'review_id'),
+    )
+
+class ProductRatingSummary(db.Model):
+    __tablename__ = 'Product_Rating_Summary'
+    product_id = db.Column(db.Integer, db.ForeignKey('Products.product_id'), primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Numeric(12, 1), nullable=False, default=0)
+    # Histogram: number of reviews per whole star (4.5 counts as 4)
+    rating_1 = db.Column(db.Integer, nullable=False, default=0)
+    rating_2 = db.Column(db.Integer, nullable=False, default=0)
+    rating_3 = db.Column(db.Integer, nullable=False, default=0)
+    rating_4 = db.Column(db.Integer, nullable=False, default=0)
+    rating_5 = db.Column(db.Integer, nullable=False, default=0)
+
+class ProductOffer(db.Model):
+    __tablename__ = 'Product_Offers'
+    # One row per in-stock Shop_Product and address of its shop: the search
+    # and product detail join, kept up to date by services.product_offers
+    shop_product_id = db.Column(db.Integer, db.ForeignKey('Shop_Product.shop_product_id', ondelete='CASCADE'), primary_key=True)
+    address_id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, nullable=False)
+    shop_id = db.Column(db.Integer, nullable=False)
+    product_name = db.Column(db.String(200))
+    brand = db.Column(db.String(100))
+    description = db.Column(db.String(1000))
+    color = db.Column(db.String(50))
+    category_id = db.Column(db.Integer)
+    price = db.Column(db.Numeric(10, 2))
+    stock = db.Column(db.Integer)
+    city = db.Column(db.String(100))
+    area = db.Column(db.String(200))
+    landmark = db.Column(db.String(200))
+    latitude = db.Column(db.Numeric(10, 6))
+    longitude = db.Column(db.Numeric(10, 6))
+    review_count = db.Column(db.Integer)
+    rating_average = db.Column(db.Numeric(3, 2))
+
+    __table_args__ = (
+        db.Index('IX_Product_Offers_product', 'product_id', 'shop_product_id'),
+        db.Index('IX_Product_Offers_shop', 'shop_id'),
+        db.Index('IX_Product_Offers_city', 'city'),
+        db.Index('IX_Product_Offers_location', 'latitude', 'longitude')
+    )
+
+class ProductPriceRange(db.Model):
+    __tablename__ = 'Product_Price_Ranges'
+    # Rollup of Product_Offers per product
+    product_id = db.Column(db.Integer, db.ForeignKey('Products.product_id', ondelete='CASCADE'), primary_key=True)
+    min_price = db.Column(db.Numeric(10, 2))
+    max_price = db.Column(db.Numeric(10, 2))
+    shop_count = db.Column(db.Integer, nullable=False, default=0)
+
 class ProductImage(db.Model):
     __tablename__ = 'Product_Images'
     image_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -93,3 +160,32 @@ class SearchHistory(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('Users.user_id'))
     search_item = db.Column(db.String(255))
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('IX_Search_History_timestamp', 'timestamp', mssql_include=['search_item']),
+        db.Index('IX_Search_History_user', 'user_id', 'timestamp', mssql_include=['search_item']),
+    )
+
+class DataVersion(db.Model):
+    __tablename__ = 'Data_Versions'
+    # One row per tracked table, bumped in the transaction that changes it
+    table_name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class RevokedToken(db.Model):
+    __tablename__ = 'Revoked_Tokens'
+    # Logged-out JWTs (hex SHA-256 of the token), shared by all API processes
+    # until the token would have expired
+    token_digest = db.Column(db.String(64), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    __table_args__ = (
+        db.Index('IX_Revoked_Tokens_expires', 'expires_at'),
+    )
+
+class SchemaMigration(db.Model):
+    __tablename__ = 'Schema_Migrations'
+    # One row per applied migration (services.migrations)
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
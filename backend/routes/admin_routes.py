@@ -0,0 +1,32 @@
+import io
+from flask import Blueprint, request, jsonify, current_app
+from middleware.auth_middleware import admin_required
+from services.inventory_import import InventoryImporter, read_rows, FORMATS
+from utils.http_cache import apply_cache_control
+
+admin_bp = apply_cache_control(Blueprint('admin', __name__))
+
+@admin_bp.route('/inventory', methods=['POST'])
+@admin_required
+def import_inventory():
+    """
+    Upsert a CSV or JSONL price/stock feed sent as the raw request body.
+
+    The body is parsed as it streams in, a batch at a time. If a batch fails
+    the response carries ``failed.resume_from``; resending the same feed with
+    ``?resume_from=<n>`` skips the records already committed.
+    """
+    fmt = request.args.get('format')
+    if not fmt:
+        # application/x-ndjson, application/jsonl, ...; anything else is CSV
+        fmt = 'jsonl' if 'json' in request.mimetype else 'csv'
+    if fmt not in FORMATS:
+        return jsonify({'error': f'format must be one of: {", ".join(FORMATS)}'}), 400
+
+    skip = max(request.args.get('resume_from', 0, type=int), 0)
+    batch_size = request.args.get('batch_size', current_app.config.get('INVENTORY_IMPORT_BATCH_SIZE', 1000), type=int)
+
+    stream = io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline='')
+    report = InventoryImporter(batch_size=batch_size).run(read_rows(stream, fmt), skip=skip)
+
+    return jsonify(report), 500 if report['failed'] else 200
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from flask import request, jsonify, g
+from sqlalchemy.exc import SQLAlchemyError
+from models import ProductRatingSummary
+from routes.product_routes import (
+    REVIEWS_PER_PAGE, MAX_REVIEWS_PER_PAGE, product_shops_query, latest_reviews_query,
+    product_details_payload, review_key
+)
+from services.async_db import async_db
+from services.dimensions import dimensions
+from services.product_ratings import format_summary
+from services.resource_versions import product_keys, product_validator
+from services.response_cache import response_cache
+from utils.http_cache import async_conditional
+from utils.pagination import split_page
+
+logger = logging.getLogger(__name__)
+
+# Coroutine views the ASGI entry point runs on the event loop instead of
+# handing the request to the WSGI app, by Flask endpoint name. They must
+# answer exactly like the sync views they replace.
+ASYNC_VIEWS = {}
+
+def async_view(endpoint):
+    def register(view):
+        ASYNC_VIEWS[endpoint] = view
+        return view
+    return register
+
+async def _product_validator(product_id):
+    # The snapshot polls Data_Versions every few seconds; keep that off the
+    # loop. Done here so the view finds it fresh even without validators.
+    await asyncio.to_thread(dimensions.ensure_fresh)
+    try:
+        versions = await async_db.read_versions(product_keys(product_id))
+    except SQLAlchemyError as e:
+        logger.warning('Data_Versions unavailable, sending product without validators: %s', e)
+        return None
+    return product_validator(product_id, versions=versions, refresh_dimensions=False)
+
+@async_view('products.get_product_details')
+@async_conditional(_product_validator)
+async def get_product_details(product_id):
+    review_limit = request.args.get('review_limit', REVIEWS_PER_PAGE, type=int)
+    review_limit = min(max(review_limit, 1), MAX_REVIEWS_PER_PAGE)
+
+    try:
+        # The validator has refreshed the dimension snapshot
+        loader = lambda: _load_product_details(product_id, review_limit)
+        if review_limit == REVIEWS_PER_PAGE:
+            product_data = await response_cache.product_async(product_id, loader, g.get('etag'))
+        else:
+            product_data = await loader()
+        if product_data is None:
+            return jsonify({'error': 'Product not found or out of stock'}), 404
+
+        return jsonify(product_data)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+async def _load_product_details(product_id, review_limit):
+    # The three reads are independent: one round trip's wait instead of three
+    product_shops, reviews, summary = await async_db.gather(
+        async_db.all(product_shops_query(product_id)),
+        async_db.all(latest_reviews_query(product_id, review_limit)),
+        async_db.get(ProductRatingSummary, product_id)
+    )
+    if not product_shops:
+        return None
+    return product_details_payload(product_shops, split_page(reviews, review_key, review_limit), format_summary(summary))
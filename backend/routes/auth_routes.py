@@ -1,9 +1,16 @@
 from flask import Blueprint, request, jsonify
-from bcrypt import hashpw, checkpw, gensalt
 from models import db, User
-from middleware.auth_middleware import generate_token
+from services.password_hasher import password_hasher, HasherSaturated
+from middleware.auth_middleware import generate_token, get_request_token, revoke_token, token_required
+from utils.http_cache import apply_cache_control
 
-auth_bp = Blueprint('auth', __name__)
+auth_bp = apply_cache_control(Blueprint('auth', __name__))
+
+@auth_bp.errorhandler(HasherSaturated)
+def handle_hasher_saturated(e):
+    response = jsonify({'error': 'Too many authentication requests, please retry shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 429
 
 @auth_bp.route('/register', methods=['POST'])
 def register():
@@ -17,9 +24,8 @@ def register():
     if existing_user:
         return jsonify({'error': 'User already exists'}), 400
     
-    # Create new user with bcrypt hashing
-    password_bytes = data['password'].encode('utf-8')
-    hashed_password = hashpw(password_bytes, gensalt()).decode('utf-8')
+    # Create new user with bcrypt hashing (on the bounded hashing pool)
+    hashed_password = password_hasher.hash(data['password'])
     
     new_user = User(
         name=data.get('name', ''),
@@ -58,13 +64,20 @@ def login():
     if not user:
         return jsonify({'error': 'Invalid credentials'}), 401
     
-    # Verify password with bcrypt
-    password_bytes = data['password'].encode('utf-8')
-    stored_password = user.password.encode('utf-8')
-    
-    if not checkpw(password_bytes, stored_password):
+    # Verify password with bcrypt (on the bounded hashing pool)
+    if not password_hasher.verify(data['password'], user.password):
         return jsonify({'error': 'Invalid credentials'}), 401
     
+    # Upgrade hashes made with a lower cost factor than configured
+    if password_hasher.needs_rehash(user.password):
+        try:
+            user.password = password_hasher.hash(data['password'])
+            db.session.commit()
+        except HasherSaturated:
+            pass
+        except Exception:
+            db.session.rollback()
+    
     token = generate_token(user.user_id)
     return jsonify({
         'message': 'Login successful',
@@ -75,3 +88,9 @@ def login():
             'email': user.email
         }
     })
+
+@auth_bp.route('/logout', methods=['POST'])
+@token_required
+def logout():
+    revoke_token(get_request_token())
+    return jsonify({'message': 'Logged out successfully'})
@@ -1,181 +1,564 @@
-from flask import Blueprint, request, jsonify
-from models import db, Product, ProductCategory, ShopProduct, Shop, ShopAddress, ProductReview, User
-from middleware.auth_middleware import token_required
+import math
+from itertools import islice
+import numpy as np
+from flask import Blueprint, request, jsonify, current_app, g
+from sqlalchemy import func
+from models import db, ProductOffer, ProductPriceRange, ProductReview, SearchHistory, User
+from middleware.auth_middleware import token_required, verify_token, get_request_token
+from utils.helpers import haversine_distances, bounding_box
+from utils.pagination import decode_cursor, fetch_page, fetch_ranked_page, page_query, split_page
+from utils.sql import batched
+from services.product_search import product_search
+from services.product_suggest import product_suggest
+from services.response_cache import response_cache
+from services.query_fanout import query_fanout
+from services.product_ratings import rating_summary
+from services.search_history import search_history
+from services.shop_hours import shop_hours
+from services.best_offers import best_offers
+from services.dimensions import dimensions
+from services.resource_versions import product_validator, search_validator, categories_validator
+from utils.streaming import stream_format, stream_response
+from utils.serialization import RowSerializer, FLOAT, ISO, wants_columns
+from utils.http_cache import conditional, apply_cache_control
 
-product_bp = Blueprint('products', __name__)
+product_bp = apply_cache_control(Blueprint('products', __name__))
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+REVIEWS_PER_PAGE = 10
+MAX_REVIEWS_PER_PAGE = 50
+DEFAULT_BEST_OFFERS = 10
+MAX_BEST_OFFERS = 50
+DEFAULT_SUGGESTIONS = 8
+
+# Rows fetched from the database at a time when streaming
+STREAM_BATCH_SIZE = 500
+
+# Category and shop names come from the in-memory dimension snapshot
+search_result_serializer = RowSerializer(
+    'product_id', 'product_name', 'brand', 'description', 'color',
+    ('category', 'category_id', dimensions.category_name),
+    ('price', 'price', FLOAT),
+    'stock',
+    ('shop_name', 'shop_id', dimensions.shop_name),
+    'shop_id', 'city', 'area',
+    ('latitude', 'latitude', FLOAT),
+    ('longitude', 'longitude', FLOAT)
+)
+
+product_shop_serializer = RowSerializer(
+    'shop_id',
+    ('shop_name', 'shop_id', dimensions.shop_name),
+    ('shop_image', 'shop_id', dimensions.shop_image),
+    ('price', 'price', FLOAT),
+    'stock', 'city', 'area', 'landmark',
+    ('latitude', 'latitude', FLOAT),
+    ('longitude', 'longitude', FLOAT)
+)
+
+review_serializer = RowSerializer(
+    ('rating', 'rating', FLOAT),
+    'review_text',
+    ('created_at', 'created_at', ISO),
+    ('user_name', 'name')
+)
+
+best_offer_serializer = RowSerializer(
+    'product_id', 'product_name', 'brand', 'shop_id',
+    ('shop_name', 'shop_id', dimensions.shop_name),
+    ('price', 'price', FLOAT),
+    'stock', 'city', 'area',
+    ('latitude', 'latitude', FLOAT),
+    ('longitude', 'longitude', FLOAT)
+)
+
+category_serializer = RowSerializer(
+    'category_id', 'category_name',
+    ('description', 'category_description')
+)
+
+def _flag(name):
+    return request.args.get(name, '').lower() in ('1', 'true', 'yes')
+
+def _chain_filters(*filters):
+    """One ``batch_filter`` applying each of ``filters`` (None entries are skipped)"""
+    filters = [f for f in filters if f is not None]
+    if not filters:
+        return None
+    if len(filters) == 1:
+        return filters[0]
+    
+    def chained(batch):
+        for f in filters:
+            batch = f(batch)
+        return batch
+    return chained
+
+def _row_distances(rows, lat, lng):
+    lats = np.array([float(r.latitude) if r.latitude is not None else np.nan for r in rows])
+    lngs = np.array([float(r.longitude) if r.longitude is not None else np.nan for r in rows])
+    return haversine_distances(lat, lng, lats, lngs)
+
+def _within_radius(lat, lng, radius):
+    """``batch_filter`` keeping rows within ``radius`` km (exact Haversine cutoff)"""
+    def within_radius(batch):
+        if not batch:
+            return batch
+        keep = np.flatnonzero(_row_distances(batch, lat, lng) <= radius)
+        return [batch[i] for i in keep.tolist()]
+    return within_radius
+
+def _search_validators():
+    # Results also depend on the clock when filtering by opening hours
+    open_minute = shop_hours.minute_at(_flag('open_now'), request.args.get('open_at'))
+    # Recorded here, not in the view: a 304 or a stored representation
+    # answers the request without running it
+    _record_search()
+    return search_validator((stream_format(), open_minute))
+
+def _record_search():
+    # Once per search, not for every page of its results
+    query = request.args.get('q', '')
+    if query and request.args.get('page', 1, type=int) <= 1 and not request.args.get('cursor'):
+        token = get_request_token()
+        search_history.record(verify_token(token) if token else None, query)
 
 @product_bp.route('/search', methods=['GET'])
+@conditional(_search_validators)
 def search_products():
     query = request.args.get('q', '')
     city = request.args.get('city', '')
     category = request.args.get('category', '')
     min_price = request.args.get('min_price', type=float)
     max_price = request.args.get('max_price', type=float)
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    radius = request.args.get('radius', type=float)
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = request.args.get('per_page', type=int) or request.args.get('limit', DEFAULT_PER_PAGE, type=int)
+    per_page = min(max(per_page, 1), MAX_PER_PAGE)
+    cursor = request.args.get('cursor')
+    include_total = _flag('include_total')
+    
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, 2, (int, int))
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+    
+    try:
+        open_minute = shop_hours.minute_at(_flag('open_now'), request.args.get('open_at'))
+    except ValueError:
+        return jsonify({'error': 'open_at must be an ISO date-time or HH:MM'}), 400
     
     try:
-        # Build query with filters
+        # Category and shop names are looked up in the dimension snapshot
+        # rather than joined
+        dimensions.ensure_fresh()
+        # One row per in-stock offer and shop address, kept up to date by
+        # services.product_offers: a single-table scan instead of a join
         base_query = db.session.query(
-            Product.product_id,
-            Product.product_name,
-            Product.brand,
-            Product.description,
-            Product.color,
-            ProductCategory.category_name,
-            ShopProduct.price,
-            ShopProduct.stock,
-            Shop.shop_name,
-            Shop.shop_id,
-            ShopAddress.city,
-            ShopAddress.area,
-            ShopAddress.latitude,
-            ShopAddress.longitude
-        ).join(
-            ProductCategory, Product.category_id == ProductCategory.category_id
-        ).join(
-            ShopProduct, Product.product_id == ShopProduct.product_id
-        ).join(
-            Shop, ShopProduct.shop_id == Shop.shop_id
-        ).join(
-            ShopAddress, Shop.shop_id == ShopAddress.shop_id
-        ).filter(ShopProduct.stock > 0)
+            ProductOffer.product_id,
+            ProductOffer.product_name,
+            ProductOffer.brand,
+            ProductOffer.description,
+            ProductOffer.color,
+            ProductOffer.category_id,
+            ProductOffer.shop_product_id,
+            ProductOffer.price,
+            ProductOffer.stock,
+            ProductOffer.shop_id,
+            ProductOffer.city,
+            ProductOffer.area,
+            ProductOffer.latitude,
+            ProductOffer.longitude
+        ).filter(
+            # Uncategorized products never matched the category join either
+            ProductOffer.category_id.isnot(None)
+        )
         
-        # Apply filters
+        # Apply filters. Free text goes through the in-memory index; city is
+        # a prefix match and category is resolved against the in-memory
+        # category list so neither needs a leading-wildcard LIKE on a large table.
+        ranked_ids = None
         if query:
-            base_query = base_query.filter(Product.product_name.contains(query))
+            # Every match: the offer filters below can drop any of them, so
+            # capping the candidates here would lose lower-ranked matches
+            ranked = product_search.search(query)
+            ranked_ids = [product_id for product_id, _ in ranked]
+            if min_price or max_price:
+                ranked_ids = _priced_within(ranked_ids, min_price, max_price)
         if city:
-            base_query = base_query.filter(ShopAddress.city.contains(city))
+            base_query = base_query.filter(ProductOffer.city.startswith(city))
         if category:
-            base_query = base_query.filter(ProductCategory.category_name.contains(category))
+            base_query = base_query.filter(ProductOffer.category_id.in_(dimensions.category_ids_matching(category)))
         if min_price:
-            base_query = base_query.filter(ShopProduct.price >= min_price)
+            base_query = base_query.filter(ProductOffer.price >= min_price)
         if max_price:
-            base_query = base_query.filter(ShopProduct.price <= max_price)
+            base_query = base_query.filter(ProductOffer.price <= max_price)
+        
+        located = lat is not None and lng is not None
+        radius_filter = None
+        if located and radius is not None:
+            # Bounding box in SQL, exact Haversine cutoff on each fetched batch
+            min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius)
+            base_query = base_query.filter(
+                ProductOffer.latitude.between(min_lat, max_lat),
+                ProductOffer.longitude.between(min_lng, max_lng)
+            )
+            radius_filter = _within_radius(lat, lng, radius)
+        
+        # Opening hours come from the in-memory weekly index, not a join
+        batch_filter = _chain_filters(
+            radius_filter,
+            shop_hours.open_filter(open_minute) if open_minute is not None else None
+        )
+        
+        columnar = wants_columns()
+        stream = stream_format()
+        if stream:
+            # Every match in result order, read and sent a batch at a time;
+            # page/cursor don't apply, limit caps the row count
+            limit = request.args.get('limit', type=int)
+            rows = _search_rows(base_query, ranked_ids, batch_filter, lat if located else None, lng, columnar)
+            if limit:
+                rows = islice(rows, limit)
+            if columnar:
+                return stream_response(rows, 'rows', stream, head={'columns': _search_columns(located)})
+            return stream_response(rows, 'products', stream)
         
-        results = base_query.all()
+        if ranked_ids is not None:
+            # Most relevant products first, their offers in a stable order
+            results, has_next, next_cursor = fetch_ranked_page(
+                base_query,
+                ProductOffer.product_id,
+                ranked_ids,
+                row_id=lambda row: row.product_id,
+                tiebreak=lambda row: row.shop_product_id,
+                per_page=per_page,
+                page=page,
+                after=after,
+                batch_filter=batch_filter
+            )
+        else:
+            results, has_next, next_cursor = fetch_page(
+                base_query,
+                (ProductOffer.product_id, ProductOffer.shop_product_id),
+                key=lambda row: (row.product_id, row.shop_product_id),
+                per_page=per_page,
+                page=page,
+                after=after,
+                batch_filter=batch_filter
+            )
         
-        products = []
-        for result in results:
-            products.append({
-                'product_id': result.product_id,
-                'product_name': result.product_name,
-                'brand': result.brand,
-                'description': result.description,
-                'color': result.color,
-                'category': result.category_name,
-                'price': float(result.price),
-                'stock': result.stock,
-                'shop_name': result.shop_name,
-                'shop_id': result.shop_id,
-                'city': result.city,
-                'area': result.area,
-                'latitude': float(result.latitude) if result.latitude else None,
-                'longitude': float(result.longitude) if result.longitude else None
-            })
+        products = _format_search_rows(results, lat if located else None, lng, columnar)
         
-        return jsonify({'products': products, 'count': len(products)})
+        if columnar:
+            response = {'columns': _search_columns(located), 'rows': products}
+        else:
+            response = {'products': products}
+        response.update({
+            'count': len(products),
+            'page': page if after is None else None,
+            'per_page': per_page,
+            'has_next': has_next,
+            'next_cursor': next_cursor
+        })
+        if include_total:
+            # Matches of the SQL predicates; with a radius this counts the
+            # bounding box, so it is an upper-bound estimate
+            if ranked_ids is None:
+                response['estimated_total'] = base_query.count()
+            else:
+                response['estimated_total'] = sum(
+                    base_query.filter(ProductOffer.product_id.in_(batch)).count() for batch in batched(ranked_ids)
+                )
+        
+        return jsonify(response)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _priced_within(product_ids, min_price, max_price):
+    """
+    ``product_ids`` (in order) that have an offer that can be priced within
+    the bounds, going by their ``Product_Price_Ranges`` rollup, so ranked
+    pages don't fetch offers of products that can't match.
+    """
+    keep = set()
+    for batch in batched(product_ids):
+        query = db.session.query(ProductPriceRange.product_id).filter(ProductPriceRange.product_id.in_(batch))
+        if min_price:
+            query = query.filter(ProductPriceRange.max_price >= min_price)
+        if max_price:
+            query = query.filter(ProductPriceRange.min_price <= max_price)
+        keep.update(row.product_id for row in query)
+    return [product_id for product_id in product_ids if product_id in keep]
+
+def _search_columns(located):
+    return search_result_serializer.columns + (['distance'] if located else [])
+
+def _format_search_rows(rows, lat=None, lng=None, columnar=False):
+    """Search results as dicts (or lists), with a ``distance`` when a location is given"""
+    extra = {}
+    if lat is not None and rows:
+        # Distance from the user for every row in one vectorized pass
+        extra['distance'] = [
+            None if np.isnan(d) else round(d, 2)
+            for d in _row_distances(rows, lat, lng).tolist()
+        ]
+    if columnar:
+        return search_result_serializer.lists(rows, **extra)
+    return search_result_serializer.dicts(rows, **extra)
+
+def _search_rows(base_query, ranked_ids, batch_filter, lat=None, lng=None, columnar=False):
+    """
+    Every search result, in the same order as the paged responses, formatted
+    a batch at a time so only one batch of rows is held in memory.
+    """
+    if ranked_ids is None:
+        rows = iter(base_query.order_by(ProductOffer.product_id, ProductOffer.shop_product_id).yield_per(STREAM_BATCH_SIZE))
+        batches = iter(lambda: list(islice(rows, STREAM_BATCH_SIZE)), [])
+    else:
+        batches = _ranked_batches(base_query, ranked_ids)
+    for batch in batches:
+        if batch_filter is not None:
+            batch = batch_filter(batch)
+        yield from _format_search_rows(batch, lat, lng, columnar)
+
+def _ranked_batches(base_query, ranked_ids):
+    rank = {product_id: index for index, product_id in enumerate(ranked_ids)}
+    for ids in batched(ranked_ids):
+        batch = base_query.filter(ProductOffer.product_id.in_(ids)).all()
+        batch.sort(key=lambda row: (rank[row.product_id], row.shop_product_id))
+        yield batch
+
+@product_bp.route('/best-offers', methods=['GET'])
+def get_best_offers():
+    product_id = request.args.get('product_id', type=int)
+    query = request.args.get('q', '')
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    radius = request.args.get('radius', 10, type=float)
+    k = min(max(request.args.get('k', DEFAULT_BEST_OFFERS, type=int), 1), MAX_BEST_OFFERS)
+    price_weight = request.args.get('price_weight', 1.0, type=float)
+    distance_weight = request.args.get(
+        'distance_weight', current_app.config.get('BEST_OFFERS_DISTANCE_WEIGHT', 10.0), type=float
+    )
+    
+    if lat is None or lng is None:
+        return jsonify({'error': 'lat and lng are required'}), 400
+    if not product_id and not query:
+        return jsonify({'error': 'product_id or q is required'}), 400
+    if not all(math.isfinite(weight) and weight >= 0 for weight in (price_weight, distance_weight)):
+        return jsonify({'error': 'price_weight and distance_weight must be non-negative numbers'}), 400
+    try:
+        open_minute = shop_hours.minute_at(_flag('open_now'), request.args.get('open_at'))
+    except ValueError:
+        return jsonify({'error': 'open_at must be an ISO date-time or HH:MM'}), 400
+    
+    try:
+        if product_id:
+            product_ids = [product_id]
+        else:
+            ranked = product_search.search(query, current_app.config.get('BEST_OFFERS_MAX_PRODUCTS', 50))
+            product_ids = [ranked_id for ranked_id, _ in ranked]
+        
+        dimensions.ensure_fresh()
+        shop_filter = None
+        if open_minute is not None:
+            shop_filter = lambda shop_id: shop_hours.is_open(shop_id, open_minute)
+        
+        offers = best_offers(product_ids, lat, lng, radius, k, price_weight, distance_weight, shop_filter)
+        rows = [row for _, _, row in offers]
+        payload = best_offer_serializer.payload(
+            rows, 'offers', wants_columns(),
+            distance=[round(distance, 2) for _, distance, _ in offers],
+            score=[round(score, 2) for score, _, _ in offers]
+        )
+        payload.update({
+            'count': len(rows),
+            'price_weight': price_weight,
+            'distance_weight': distance_weight
+        })
+        return jsonify(payload)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@product_bp.route('/suggest', methods=['GET'])
+def suggest_products():
+    query = request.args.get('q', '')
+    max_results = current_app.config.get('SUGGEST_MAX_RESULTS', 20)
+    limit = min(max(request.args.get('limit', DEFAULT_SUGGESTIONS, type=int), 1), max_results)
+    response = jsonify({'query': query, 'suggestions': product_suggest.suggest(query, limit)})
+    # No validator to revalidate with; typing and deleting repeats prefixes
+    response.headers['Cache-Control'] = f"public, max-age={current_app.config.get('SUGGEST_MAX_AGE', 60)}"
+    return response
+
+@product_bp.route('/search/recent', methods=['GET'])
+@token_required
+def get_recent_searches():
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    # The caller's own searches, as written by the search history writer
+    last_searched = func.max(SearchHistory.timestamp)
+    rows = db.session.query(SearchHistory.search_item).filter(
+        SearchHistory.user_id == request.current_user_id,
+        SearchHistory.search_item.isnot(None)
+    ).group_by(SearchHistory.search_item).order_by(last_searched.desc()).limit(limit).all()
+    response = jsonify({'searches': [row.search_item for row in rows]})
+    # Per-user: never stored by shared caches
+    response.headers['Cache-Control'] = 'private, no-store'
+    return response
+
+@product_bp.route('/search/popular', methods=['GET'])
+def get_popular_searches():
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    window = request.args.get('window', type=int)
+    popular = search_history.aggregate.popular(limit, window)
+    return jsonify({
+        'searches': [{'search_item': term, 'count': count} for term, count in popular],
+        'window_minutes': min(window or search_history.aggregate.window_minutes, search_history.aggregate.window_minutes)
+    })
+
 @product_bp.route('/<int:product_id>', methods=['GET'])
+@conditional(product_validator)
 def get_product_details(product_id):
+    review_limit = request.args.get('review_limit', REVIEWS_PER_PAGE, type=int)
+    review_limit = min(max(review_limit, 1), MAX_REVIEWS_PER_PAGE)
+    
     try:
-        # Get product with all shop availability
-        product_shops = db.session.query(
-            Product.product_id,
-            Product.product_name,
-            Product.brand,
-            Product.description,
-            Product.color,
-            ProductCategory.category_name,
-            ShopProduct.price,
-            ShopProduct.stock,
-            Shop.shop_name,
-            Shop.shop_id,
-            Shop.shop_image,
-            ShopAddress.city,
-            ShopAddress.area,
-            ShopAddress.landmark,
-            ShopAddress.latitude,
-            ShopAddress.longitude
-        ).join(
-            ProductCategory, Product.category_id == ProductCategory.category_id
-        ).join(
-            ShopProduct, Product.product_id == ShopProduct.product_id
-        ).join(
-            Shop, ShopProduct.shop_id == Shop.shop_id
-        ).join(
-            ShopAddress, Shop.shop_id == ShopAddress.shop_id
-        ).filter(
-            Product.product_id == product_id,
-            ShopProduct.stock > 0
-        ).all()
-        
-        if not product_shops:
+        dimensions.ensure_fresh()
+        loader = lambda: _load_product_details(product_id, review_limit)
+        if review_limit == REVIEWS_PER_PAGE:
+            product_data = response_cache.product(product_id, loader, g.get('etag'))
+        else:
+            product_data = loader()
+        if product_data is None:
             return jsonify({'error': 'Product not found or out of stock'}), 404
         
-        # Get product reviews
-        reviews = db.session.query(
-            ProductReview.rating,
-            ProductReview.review_text,
-            ProductReview.created_at,
-            User.name
-        ).join(
-            User, ProductReview.user_id == User.user_id
-        ).filter(ProductReview.product_id == product_id).all()
+        return jsonify(product_data)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _load_product_details(product_id, review_limit):
+    # Shop availability, the most recent reviews (the aggregate covers the
+    # rest) and the rating aggregate are independent reads: run them together
+    product_shops, reviews, rating = query_fanout.run(
+        lambda: product_shops_query(product_id).all(),
+        lambda: latest_reviews_query(product_id, review_limit).all(),
+        lambda: rating_summary(product_id)
+    )
+    if not product_shops:
+        return None
+    return product_details_payload(product_shops, split_page(reviews, review_key, review_limit), rating)
+
+def product_shops_query(product_id):
+    """The product's in-stock offers, one per shop address."""
+    return db.session.query(
+        ProductOffer.product_id,
+        ProductOffer.product_name,
+        ProductOffer.brand,
+        ProductOffer.description,
+        ProductOffer.color,
+        ProductOffer.category_id,
+        ProductOffer.price,
+        ProductOffer.stock,
+        ProductOffer.shop_id,
+        ProductOffer.city,
+        ProductOffer.area,
+        ProductOffer.landmark,
+        ProductOffer.latitude,
+        ProductOffer.longitude
+    ).filter(
+        ProductOffer.product_id == product_id,
+        ProductOffer.category_id.isnot(None)
+    )
+
+def latest_reviews_query(product_id, review_limit):
+    """First page of a product's reviews, newest first (one extra row, see ``split_page``)."""
+    return page_query(_review_query(product_id), (ProductReview.review_id,), review_limit, descending=True)
+
+def review_key(review):
+    return (review.review_id,)
+
+def product_details_payload(product_shops, reviews, rating):
+    """Product detail response from its shop rows, ``split_page`` reviews and rating summary."""
+    reviews, _, reviews_next_cursor = reviews
+    first_result = product_shops[0]
+    return {
+        'product_id': first_result.product_id,
+        'product_name': first_result.product_name,
+        'brand': first_result.brand,
+        'description': first_result.description,
+        'color': first_result.color,
+        'category': dimensions.category_name(first_result.category_id),
+        'rating': rating,
+        'shops': product_shop_serializer.dicts(product_shops),
+        'reviews': review_serializer.dicts(reviews),
+        'reviews_next_cursor': reviews_next_cursor
+    }
+
+def _review_query(product_id):
+    return db.session.query(
+        ProductReview.review_id,
+        ProductReview.rating,
+        ProductReview.review_text,
+        ProductReview.created_at,
+        User.name
+    ).join(
+        User, ProductReview.user_id == User.user_id
+    ).filter(ProductReview.product_id == product_id)
+
+@product_bp.route('/<int:product_id>/reviews', methods=['GET'])
+@conditional(product_validator)
+def get_product_reviews(product_id):
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = request.args.get('per_page', REVIEWS_PER_PAGE, type=int)
+    per_page = min(max(per_page, 1), MAX_REVIEWS_PER_PAGE)
+    cursor = request.args.get('cursor')
+    
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, 1, (int,))
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+    
+    try:
+        # Most recent first
+        reviews, has_next, next_cursor = fetch_page(
+            _review_query(product_id),
+            (ProductReview.review_id,),
+            key=review_key,
+            per_page=per_page,
+            page=page,
+            after=after,
+            descending=True
+        )
         
-        # Format response
-        first_result = product_shops[0]
-        product_data = {
-            'product_id': first_result.product_id,
-            'product_name': first_result.product_name,
-            'brand': first_result.brand,
-            'description': first_result.description,
-            'color': first_result.color,
-            'category': first_result.category_name,
-            'shops': [],
-            'reviews': []
+        response = {
+            'product_id': product_id,
+            'rating': rating_summary(product_id)
         }
+        response.update(review_serializer.payload(reviews, 'reviews', wants_columns()))
+        response.update({
+            'page': page if after is None else None,
+            'per_page': per_page,
+            'has_next': has_next,
+            'next_cursor': next_cursor
+        })
         
-        # Add shop availability
-        for shop in product_shops:
-            product_data['shops'].append({
-                'shop_id': shop.shop_id,
-                'shop_name': shop.shop_name,
-                'shop_image': shop.shop_image,
-                'price': float(shop.price),
-                'stock': shop.stock,
-                'city': shop.city,
-                'area': shop.area,
-                'landmark': shop.landmark,
-                'latitude': float(shop.latitude) if shop.latitude else None,
-                'longitude': float(shop.longitude) if shop.longitude else None
-            })
-        
-        # Add reviews
-        for review in reviews:
-            product_data['reviews'].append({
-                'rating': float(review.rating),
-                'review_text': review.review_text,
-                'created_at': review.created_at.isoformat(),
-                'user_name': review.name
-            })
-        
-        return jsonify(product_data)
+        return jsonify(response)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @product_bp.route('/categories', methods=['GET'])
+@conditional(categories_validator)
 def get_categories():
     try:
-        categories = ProductCategory.query.all()
-        return jsonify({
-            'categories': [
-                {
-                    'category_id': cat.category_id,
-                    'category_name': cat.category_name,
-                    'description': cat.category_description
-                } for cat in categories
-            ]
-        })
+        # Served from memory
+        dimensions.ensure_fresh()
+        return jsonify(category_serializer.payload(dimensions.categories, 'categories', wants_columns()))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
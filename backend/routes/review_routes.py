@@ -1,8 +1,11 @@
+from decimal import Decimal, InvalidOperation
 from flask import Blueprint, request, jsonify
 from models import db, ProductReview
 from middleware.auth_middleware import token_required
+from services.product_ratings import record_review
+from utils.http_cache import apply_cache_control
 
-review_bp = Blueprint('reviews', __name__)
+review_bp = apply_cache_control(Blueprint('reviews', __name__))
 
 @review_bp.route('', methods=['POST'])
 @token_required
@@ -12,15 +15,24 @@ def add_review():
     if not data or not data.get('product_id') or not data.get('rating'):
         return jsonify({'error': 'Product ID and rating are required'}), 400
     
+    try:
+        rating = Decimal(str(data['rating']))
+    except InvalidOperation:
+        return jsonify({'error': 'Rating must be a number'}), 400
+    if not rating.is_finite() or not Decimal('1') <= rating <= Decimal('5'):
+        return jsonify({'error': 'Rating must be between 1 and 5'}), 400
+    
     try:
         new_review = ProductReview(
             user_id=request.current_user_id,
             product_id=data['product_id'],
-            rating=data['rating'],
+            rating=rating,
             review_text=data.get('review_text', '')
         )
         
         db.session.add(new_review)
+        # Keep the product's rating aggregate in the same transaction
+        record_review(data['product_id'], rating)
         db.session.commit()
         
         return jsonify({'message': 'Review added successfully'}), 201
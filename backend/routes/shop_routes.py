@@ -1,132 +1,214 @@
-from flask import Blueprint, request, jsonify
-from models import db, Shop, ShopOwner, ShopAddress, ShopTiming, Product, ProductCategory, ShopProduct
+from flask import Blueprint, request, jsonify, g
+from models import db, Shop, ShopOwner, ShopAddress, ShopTiming, Product, ShopProduct
+from services.shop_locator import shop_locator
+from services.shop_hours import shop_hours
+from services.response_cache import response_cache
+from services.query_fanout import query_fanout
+from services.dimensions import dimensions
+from services.resource_versions import shop_validator
+from utils.streaming import stream_format, stream_response
+from utils.serialization import RowSerializer, FLOAT, HH_MM, wants_columns
+from utils.http_cache import conditional, apply_cache_control
 
-shop_bp = Blueprint('shops', __name__)
+# Rows fetched from the database at a time when streaming
+STREAM_BATCH_SIZE = 500
+
+shop_bp = apply_cache_control(Blueprint('shops', __name__))
+
+shop_product_serializer = RowSerializer(
+    'product_id', 'product_name', 'brand',
+    ('category', 'category_id', dimensions.category_name),
+    ('price', 'price', FLOAT),
+    'stock'
+)
+
+timing_serializer = RowSerializer(
+    'day',
+    ('open_time', 'open_time', HH_MM),
+    ('close_time', 'close_time', HH_MM)
+)
+
+shop_header_serializer = RowSerializer('shop_id', 'shop_name', 'shop_image', 'owner_name', 'phone')
+
+address_serializer = RowSerializer(
+    'city', 'area', 'landmark', 'pincode',
+    ('latitude', 'latitude', FLOAT),
+    ('longitude', 'longitude', FLOAT)
+)
+
+nearby_shop_serializer = RowSerializer(
+    'shop_id', 'shop_name', 'shop_image', 'city', 'area', 'landmark',
+    ('latitude', 'latitude', FLOAT),
+    ('longitude', 'longitude', FLOAT)
+)
 
 @shop_bp.route('/<int:shop_id>', methods=['GET'])
+@conditional(lambda shop_id: shop_validator(shop_id, (stream_format(),)))
 def get_shop_details(shop_id):
+    stream = stream_format()
     try:
-        shop_data = db.session.query(
-            Shop.shop_id,
-            Shop.shop_name,
-            Shop.shop_image,
-            ShopOwner.owner_name,
-            ShopOwner.phone,
-            ShopAddress.city,
-            ShopAddress.area,
-            ShopAddress.landmark,
-            ShopAddress.pincode,
-            ShopAddress.latitude,
-            ShopAddress.longitude
-        ).join(
-            ShopOwner, Shop.owner_id == ShopOwner.owner_id
-        ).join(
-            ShopAddress, Shop.shop_id == ShopAddress.shop_id
-        ).filter(Shop.shop_id == shop_id).first()
+        dimensions.ensure_fresh()
+        if stream:
+            # Uncached: shop fields first, then products as they are read
+            shop_info = _load_shop_header(shop_id)
+            if shop_info is None:
+                return jsonify({'error': 'Shop not found'}), 404
+            products = (shop_product_serializer.to_dict(product) for product in
+                        _shop_products_query(shop_id).yield_per(STREAM_BATCH_SIZE))
+            return stream_response(products, 'products', stream, head=shop_info)
         
-        if not shop_data:
+        shop_info = response_cache.shop(shop_id, lambda: _load_shop_details(shop_id), g.get('etag'))
+        if shop_info is None:
             return jsonify({'error': 'Shop not found'}), 404
         
-        # Get shop timings
-        timings = ShopTiming.query.filter_by(shop_id=shop_id).all()
-        
-        # Get shop products
-        products = db.session.query(
-            Product.product_id,
-            Product.product_name,
-            Product.brand,
-            ProductCategory.category_name,
-            ShopProduct.price,
-            ShopProduct.stock
-        ).join(
-            ShopProduct, Product.product_id == ShopProduct.product_id
-        ).join(
-            ProductCategory, Product.category_id == ProductCategory.category_id
-        ).filter(
-            ShopProduct.shop_id == shop_id,
-            ShopProduct.stock > 0
-        ).all()
-        
-        shop_info = {
-            'shop_id': shop_data.shop_id,
-            'shop_name': shop_data.shop_name,
-            'shop_image': shop_data.shop_image,
-            'owner_name': shop_data.owner_name,
-            'phone': shop_data.phone,
-            'address': {
-                'city': shop_data.city,
-                'area': shop_data.area,
-                'landmark': shop_data.landmark,
-                'pincode': shop_data.pincode,
-                'latitude': float(shop_data.latitude) if shop_data.latitude else None,
-                'longitude': float(shop_data.longitude) if shop_data.longitude else None
-            },
-            'timings': [
-                {
-                    'day': timing.day,
-                    'open_time': timing.open_time.strftime('%H:%M') if timing.open_time else None,
-                    'close_time': timing.close_time.strftime('%H:%M') if timing.close_time else None
-                } for timing in timings
-            ],
-            'products': [
-                {
-                    'product_id': product.product_id,
-                    'product_name': product.product_name,
-                    'brand': product.brand,
-                    'category': product.category_name,
-                    'price': float(product.price),
-                    'stock': product.stock
-                } for product in products
-            ]
-        }
-        
         return jsonify(shop_info)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _load_shop_details(shop_id):
+    # Shop, timings and products are independent reads: run them together
+    shop_data, timings, products = query_fanout.run(
+        lambda: _shop_query(shop_id).first(),
+        lambda: _timings_query(shop_id).all(),
+        lambda: _shop_products_query(shop_id).all()
+    )
+    if not shop_data:
+        return None
+    shop_info = _shop_header(shop_data, timings)
+    shop_info['products'] = shop_product_serializer.dicts(products)
+    return shop_info
+
+def _load_shop_header(shop_id):
+    """Shop, owner, address and timings of a shop, or None if it doesn't exist"""
+    shop_data, timings = query_fanout.run(
+        lambda: _shop_query(shop_id).first(),
+        lambda: _timings_query(shop_id).all()
+    )
+    if not shop_data:
+        return None
+    return _shop_header(shop_data, timings)
+
+def _shop_query(shop_id):
+    return db.session.query(
+        Shop.shop_id,
+        Shop.shop_name,
+        Shop.shop_image,
+        ShopOwner.owner_name,
+        ShopOwner.phone,
+        ShopAddress.city,
+        ShopAddress.area,
+        ShopAddress.landmark,
+        ShopAddress.pincode,
+        ShopAddress.latitude,
+        ShopAddress.longitude
+    ).join(
+        ShopOwner, Shop.owner_id == ShopOwner.owner_id
+    ).join(
+        ShopAddress, Shop.shop_id == ShopAddress.shop_id
+    ).filter(Shop.shop_id == shop_id)
+
+def _timings_query(shop_id):
+    return db.session.query(
+        ShopTiming.day,
+        ShopTiming.open_time,
+        ShopTiming.close_time
+    ).filter(ShopTiming.shop_id == shop_id)
+
+def _shop_header(shop_data, timings):
+    header = shop_header_serializer.to_dict(shop_data)
+    header['address'] = address_serializer.to_dict(shop_data)
+    header['timings'] = timing_serializer.dicts(timings)
+    return header
+
+def _shop_products_query(shop_id):
+    """In-stock products of a shop"""
+    return db.session.query(
+        Product.product_id,
+        Product.product_name,
+        Product.brand,
+        Product.category_id,
+        ShopProduct.price,
+        ShopProduct.stock
+    ).join(
+        ShopProduct, Product.product_id == ShopProduct.product_id
+    ).filter(
+        ShopProduct.shop_id == shop_id,
+        ShopProduct.stock > 0,
+        # Uncategorized products never matched the category join either
+        Product.category_id.isnot(None)
+    ).order_by(ShopProduct.shop_product_id)
+
 @shop_bp.route('/nearby', methods=['GET'])
 def get_nearby_shops():
     lat = request.args.get('lat', type=float)
     lng = request.args.get('lng', type=float)
-    radius = request.args.get('radius', 10, type=int)  # Default 10km radius
+    radius = request.args.get('radius', 10, type=float)  # Default 10km radius
+    limit = request.args.get('limit', type=int)
+    open_now = request.args.get('open_now', '').lower() in ('1', 'true', 'yes')
     
     try:
-        shops = db.session.query(
-            Shop.shop_id,
-            Shop.shop_name,
-            Shop.shop_image,
-            ShopAddress.city,
-            ShopAddress.area,
-            ShopAddress.landmark,
-            ShopAddress.latitude,
-            ShopAddress.longitude
-        ).join(
-            ShopAddress, Shop.shop_id == ShopAddress.shop_id
-        ).all()
-        
-        nearby_shops = []
-        for shop in shops:
-            shop_data = {
-                'shop_id': shop.shop_id,
-                'shop_name': shop.shop_name,
-                'shop_image': shop.shop_image,
-                'city': shop.city,
-                'area': shop.area,
-                'landmark': shop.landmark,
-                'latitude': float(shop.latitude) if shop.latitude else None,
-                'longitude': float(shop.longitude) if shop.longitude else None
-            }
-            
-            # Simple distance calculation - in production, use proper geospatial queries
-            if lat and lng and shop.latitude and shop.longitude:
-                lat_diff = abs(float(shop.latitude) - lat)
-                lng_diff = abs(float(shop.longitude) - lng)
-                # Rough distance check - replace with proper geospatial calculation
-                if lat_diff < 0.1 and lng_diff < 0.1:  # Approximately within radius
-                    nearby_shops.append(shop_data)
+        open_minute = shop_hours.minute_at(open_now, request.args.get('open_at'))
+    except ValueError:
+        return jsonify({'error': 'open_at must be an ISO date-time or HH:MM'}), 400
+    
+    try:
+        # Shops and addresses are served from the dimension snapshot
+        dimensions.ensure_fresh()
+        distances = None
+        if lat is not None and lng is not None:
+            # Radius / k-nearest lookup against the in-memory spatial index
+            if open_minute is not None:
+                # Closed shops can't count towards the k nearest
+                matches = [match for match in shop_locator.within(lat, lng, radius)
+                           if shop_hours.is_open(match[1], open_minute)]
+                if limit is not None and limit > 0:
+                    matches = matches[:limit]
+            elif limit is not None and limit > 0:
+                matches = shop_locator.nearest(lat, lng, limit, max_distance=radius)
             else:
-                nearby_shops.append(shop_data)
+                matches = shop_locator.within(lat, lng, radius)
+            distances = {address_id: distance for address_id, _, distance in matches}
+            shops = _nearest_first(distances)
+        else:
+            shops = dimensions.locations()
+            if open_minute is not None:
+                shops = (shop for shop in shops if shop_hours.is_open(shop.shop_id, open_minute))
+        
+        columnar = wants_columns()
+        stream = stream_format()
+        if stream:
+            rows = _nearby_rows(shops, distances, columnar)
+            if columnar:
+                columns = nearby_shop_serializer.columns + (['distance'] if distances is not None else [])
+                return stream_response(rows, 'rows', stream, head={'columns': columns})
+            return stream_response(rows, 'shops', stream)
         
-        return jsonify({'shops': nearby_shops})
+        shops = list(shops)
+        extra = {}
+        if distances is not None:
+            extra['distance'] = [round(distances[shop.address_id], 2) for shop in shops]
+        return jsonify(nearby_shop_serializer.payload(shops, 'shops', columnar, **extra))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+def _nearby_rows(shops, distances, columnar):
+    for shop in shops:
+        if columnar:
+            item = nearby_shop_serializer.to_list(shop)
+            if distances is not None:
+                item.append(round(distances[shop.address_id], 2))
+        else:
+            item = nearby_shop_serializer.to_dict(shop)
+            if distances is not None:
+                item['distance'] = round(distances[shop.address_id], 2)
+        yield item
+
+def _nearest_first(distances):
+    """
+    Snapshot locations of the addresses in ``distances`` (ordered nearest
+    first); addresses the snapshot doesn't have yet are skipped.
+    """
+    for address_id in distances:
+        location = dimensions.location(address_id)
+        if location is not None:
+            yield location
@@ -0,0 +1,64 @@
+import asyncio
+from services import data_versions
+from utils.db_pool import async_database_uri, async_engine_options
+from utils.sql import batched
+
+try:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+except ImportError:  # asyncio extension unavailable (needs greenlet)
+    create_async_engine = None
+
+class AsyncDatabase:
+    """
+    Asyncio engine over the application database, used by the views the
+    ASGI entry point serves without a thread (``routes.async_routes``).
+
+    Every statement runs on its own session, so independent reads can be
+    awaited together (``gather``) and overlap their round trips instead of
+    queueing on one connection. The pool uses the same ``DB_*`` limits as
+    the sync engine. Needs an asyncio driver (``aioodbc`` for SQL Server).
+    """
+
+    def __init__(self):
+        self.engine = None
+        self._sessions = None
+
+    def init_app(self, app):
+        if create_async_engine is None:
+            raise RuntimeError('SQLAlchemy asyncio support (greenlet) is required for async database access')
+        uri = app.config.get('ASYNC_DATABASE_URL') or async_database_uri(app.config['SQLALCHEMY_DATABASE_URI'])
+        self.engine = create_async_engine(uri, **async_engine_options(app.config))
+        self._sessions = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def all(self, statement):
+        """Every row of a SELECT (a ``select()`` or an ORM query's ``.statement``)."""
+        if hasattr(statement, 'statement'):
+            statement = statement.statement
+        async with self._sessions() as session:
+            return (await session.execute(statement)).all()
+
+    async def get(self, model, primary_key):
+        """The ``model`` instance with ``primary_key``, or None."""
+        async with self._sessions() as session:
+            return await session.get(model, primary_key)
+
+    async def gather(self, *reads):
+        """Await several reads (coroutines of this class) concurrently, results in order."""
+        return await asyncio.gather(*reads)
+
+    async def read_versions(self, keys):
+        """``data_versions.read_versions`` without blocking the event loop."""
+        keys = list(keys)
+        batches = [
+            self.all(data_versions.versions_query(batch)) for batch in batched(keys)
+        ]
+        versions = {}
+        for rows in await self.gather(*batches):
+            versions.update(data_versions.version_rows(rows))
+        return data_versions.with_missing_versions(keys, versions)
+
+    async def dispose(self):
+        if self.engine is not None:
+            await self.engine.dispose()
+
+async_db = AsyncDatabase()
@@ -0,0 +1,71 @@
+import heapq
+from models import db, ProductOffer
+from utils.helpers import bounding_box
+from utils.sql import batched
+from services.shop_locator import shop_locator
+
+# Offer rows read from the database at a time
+FETCH_BATCH_SIZE = 500
+
+def offer_score(price, distance, price_weight, distance_weight):
+    """Lower is better: weighted price plus weighted distance (km)."""
+    return price_weight * price + distance_weight * distance
+
+def best_offers(product_ids, lat, lng, radius, k, price_weight=1.0, distance_weight=10.0, shop_filter=None):
+    """
+    The ``k`` best in-stock offers for ``product_ids`` within ``radius`` km.
+
+    Candidate shops come from the spatial index, so only offers from shops
+    inside the radius are read (the SQL query is also limited to the
+    radius' bounding box). Offers are streamed through a heap bounded at
+    ``k`` entries instead of being sorted.
+
+    Args:
+        product_ids: Products to consider
+        lat, lng: User location
+        radius: Search radius in kilometers
+        k: Number of offers to return
+        price_weight, distance_weight: Score weights (``offer_score``)
+        shop_filter: Optional ``shop_filter(shop_id)`` that must be true
+
+    Returns:
+        list: ``(score, distance_km, row)`` best first
+    """
+    distances = {}
+    for address_id, shop_id, distance in shop_locator.within(lat, lng, radius):
+        if shop_filter is None or shop_filter(shop_id):
+            distances[address_id] = distance
+    if not distances or not product_ids:
+        return []
+
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius)
+    offer_query = db.session.query(
+        ProductOffer.product_id,
+        ProductOffer.product_name,
+        ProductOffer.brand,
+        ProductOffer.shop_product_id,
+        ProductOffer.price,
+        ProductOffer.stock,
+        ProductOffer.shop_id,
+        ProductOffer.address_id,
+        ProductOffer.city,
+        ProductOffer.area,
+        ProductOffer.latitude,
+        ProductOffer.longitude
+    ).filter(
+        ProductOffer.latitude.between(min_lat, max_lat),
+        ProductOffer.longitude.between(min_lng, max_lng)
+    )
+
+    def scored():
+        for batch in batched(product_ids):
+            batch_query = offer_query.filter(ProductOffer.product_id.in_(batch))
+            for row in batch_query.yield_per(FETCH_BATCH_SIZE):
+                distance = distances.get(row.address_id)
+                if distance is None:
+                    continue
+                score = offer_score(float(row.price), distance, price_weight, distance_weight)
+                yield score, distance, row
+
+    # Ties: nearer first, then the older offer
+    return heapq.nsmallest(k, scored(), key=lambda offer: (offer[0], offer[1], offer[2].shop_product_id))
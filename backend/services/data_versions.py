@@ -0,0 +1,138 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import event, insert, update, select, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models import db, DataVersion
+from utils.sql import batched
+
+# Model -> [(bump the table's own version, row_keys(values) or None), ...]
+_tracked = defaultdict(list)
+
+def row_key(model, row_id):
+    """Version key of one entity, e.g. ``Products:42`` (None without an id)."""
+    return f'{model.__tablename__}:{row_id}' if row_id is not None else None
+
+def track(model, table=True, rows=None):
+    """
+    Maintain ``Data_Versions`` counters for ``model``: with ``table``, the
+    table's own counter (key: the table name); with ``rows``, the counters
+    of the keys ``rows(values)`` returns for every changed row (``values``
+    maps column attribute names to the row's values).
+
+    Skip ``table`` for tables written on hot paths: every transaction
+    changing the table updates that one counter row. Registrations for the
+    same model add up.
+    """
+    _tracked[model].append((table, rows))
+
+def bump(connection, keys):
+    """
+    Increment the versions of ``keys`` on ``connection``, in its current
+    transaction, so the new versions commit (or roll back) with the change.
+    Missing counters are created. Keys are updated in sorted order so
+    concurrent transactions lock them in the same order.
+    """
+    keys = sorted(set(keys))
+    now = datetime.utcnow()
+    for batch in batched(keys):
+        increment = update(DataVersion).where(
+            DataVersion.table_name.in_(batch)
+        ).values(version=DataVersion.version + 1, updated_at=now)
+        if connection.execute(increment).rowcount == len(batch):
+            continue
+        existing = {
+            row.table_name for row in
+            connection.execute(select(DataVersion.table_name).where(DataVersion.table_name.in_(batch)))
+        }
+        missing = [key for key in batch if key not in existing]
+        try:
+            with connection.begin_nested():
+                connection.execute(insert(DataVersion), [
+                    {'table_name': key, 'version': 1, 'updated_at': now} for key in missing
+                ])
+        except IntegrityError:
+            # Another transaction created some of them first
+            for key in missing:
+                single = update(DataVersion).where(
+                    DataVersion.table_name == key
+                ).values(version=DataVersion.version + 1, updated_at=now)
+                if not connection.execute(single).rowcount:
+                    connection.execute(insert(DataVersion).values(table_name=key, version=1, updated_at=now))
+
+def keys_for(model, rows):
+    """Version keys to bump for changed ``rows`` (dicts of column values) of ``model``."""
+    keys = set()
+    if not rows:
+        return keys
+    for table, row_keys in _tracked.get(model, ()):
+        if table:
+            keys.add(model.__tablename__)
+        if row_keys is not None:
+            for values in rows:
+                keys.update(key for key in row_keys(values) if key is not None)
+    return keys
+
+def bump_rows(model, rows):
+    """Bump versions for rows written outside the ORM unit of work (bulk writes)."""
+    keys = keys_for(model, rows)
+    if keys:
+        bump(db.session.connection(), keys)
+
+def read_versions(keys):
+    """
+    Current ``{key: (version, updated_at)}`` of ``keys``; keys without a
+    counter are reported as ``(0, None)``.
+    """
+    keys = list(keys)
+    versions = {}
+    for batch in batched(keys):
+        versions.update(version_rows(db.session.execute(versions_query(batch))))
+    return with_missing_versions(keys, versions)
+
+def versions_query(keys):
+    """SELECT of the counters of ``keys`` (one ``batched`` batch)."""
+    return select(DataVersion.table_name, DataVersion.version, DataVersion.updated_at).where(
+        DataVersion.table_name.in_(keys)
+    )
+
+def version_rows(rows):
+    return ((row.table_name, (row.version, row.updated_at)) for row in rows)
+
+def with_missing_versions(keys, versions):
+    for key in keys:
+        versions.setdefault(key, (0, None))
+    return versions
+
+def row_values(obj, modified):
+    """Current column values of ``obj`` and, if a column changed, the previous ones."""
+    state = inspect(obj)
+    current = {attr.key: getattr(obj, attr.key) for attr in state.mapper.column_attrs}
+    yield current
+    if modified:
+        previous = dict(current)
+        for attr in state.mapper.column_attrs:
+            deleted = state.attrs[attr.key].history.deleted
+            if deleted:
+                previous[attr.key] = deleted[0]
+        if previous != current:
+            yield previous
+
+@event.listens_for(Session, 'after_flush')
+def _bump_changed(session, flush_context):
+    if not _tracked:
+        return
+    changed = {}
+    for objects, modified in ((session.new, False), (session.dirty, True), (session.deleted, False)):
+        for obj in objects:
+            model = type(obj)
+            if model not in _tracked:
+                continue
+            if modified and not session.is_modified(obj, include_collections=False):
+                continue
+            changed.setdefault(model, []).extend(row_values(obj, modified))
+    keys = set()
+    for model, rows in changed.items():
+        keys |= keys_for(model, rows)
+    if keys:
+        bump(session.connection(), keys)
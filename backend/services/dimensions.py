@@ -0,0 +1,205 @@
+import logging
+import threading
+import time
+import zlib
+from collections import namedtuple
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+from models import db, ProductCategory, Shop, ShopAddress
+from services import model_events, data_versions
+
+logger = logging.getLogger(__name__)
+
+Category = namedtuple('Category', ['category_id', 'category_name', 'category_description'])
+ShopInfo = namedtuple('ShopInfo', ['shop_id', 'shop_name', 'shop_image'])
+# An address with its shop's name and image (one row of Shops JOIN Shop_Address)
+ShopLocation = namedtuple('ShopLocation', [
+    'address_id', 'shop_id', 'shop_name', 'shop_image', 'city', 'area', 'landmark',
+    'pincode', 'latitude', 'longitude'
+])
+
+# Snapshot parts and the tables each is built from
+DIMENSIONS = {
+    'categories': (ProductCategory,),
+    'shops': (Shop, ShopAddress)
+}
+
+class DimensionSnapshot:
+    """
+    In-process copy of the small, rarely changing tables that hot queries
+    used to join just for names: categories, shop names/images and shop
+    addresses.
+
+    Every change to those tables bumps their ``Data_Versions`` row in the
+    same transaction (``services.data_versions``). The snapshot polls the
+    versions every ``DIMENSIONS_POLL_SECONDS`` and reloads only the parts
+    whose tables changed; commits made by this process mark their part
+    stale immediately. Each part has a validator (``etag``) that changes
+    whenever its content does.
+    """
+
+    def __init__(self):
+        self._categories = []
+        self._category_names = {}
+        self._shops = {}
+        self._locations = {}
+        self._versions = {}
+        self._etags = {}
+        self._updated_at = {}
+        self._stale = set()
+        self._loaded_at = None
+        self._polled_at = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        if not app.config.get('DIMENSIONS_PRELOAD', True):
+            return
+        # Warm at startup; a database that isn't reachable yet only defers
+        # the load to the first request
+        with app.app_context():
+            try:
+                with self._lock:
+                    self.reload()
+            except SQLAlchemyError as e:
+                logger.warning('Dimension snapshot not preloaded: %s', e)
+            finally:
+                db.session.remove()
+
+    def ensure_fresh(self):
+        config = current_app.config
+        refresh = config.get('DIMENSIONS_REFRESH_SECONDS', 600)
+        poll = config.get('DIMENSIONS_POLL_SECONDS', 5)
+        now = time.monotonic()
+        loaded_at, polled_at = self._loaded_at, self._polled_at
+        if loaded_at is None or (refresh and now - loaded_at >= refresh):
+            with self._lock:
+                if self._loaded_at is loaded_at:
+                    self.reload()
+            return
+        if self._stale or (poll and now - polled_at >= poll):
+            with self._lock:
+                if self._polled_at is polled_at:
+                    self._poll()
+
+    def reload(self):
+        """Load every part from the database."""
+        versions = data_versions.read_versions(self._tables())
+        for dimension in DIMENSIONS:
+            self._load(dimension, versions)
+        self._versions = versions
+        self._stale.clear()
+        self._loaded_at = self._polled_at = time.monotonic()
+
+    def _poll(self):
+        # Versions are read before the rows, so a change committed in
+        # between is picked up again by the next poll, never missed
+        versions = data_versions.read_versions(self._tables())
+        stale, self._stale = self._stale, set()
+        for dimension, models in DIMENSIONS.items():
+            changed = any(versions[model.__tablename__] != self._versions.get(model.__tablename__) for model in models)
+            if changed or dimension in stale:
+                self._load(dimension, versions)
+        self._versions = versions
+        self._polled_at = time.monotonic()
+
+    @staticmethod
+    def _tables():
+        return [model.__tablename__ for models in DIMENSIONS.values() for model in models]
+
+    def _load(self, dimension, versions):
+        if dimension == 'categories':
+            rows = [Category(*row) for row in db.session.query(
+                ProductCategory.category_id,
+                ProductCategory.category_name,
+                ProductCategory.category_description
+            ).order_by(ProductCategory.category_id)]
+            self._category_names = {row.category_id: row.category_name for row in rows}
+            self._categories = rows
+        else:
+            shops = {row.shop_id: ShopInfo(*row) for row in db.session.query(
+                Shop.shop_id,
+                Shop.shop_name,
+                Shop.shop_image
+            )}
+            rows = [ShopLocation(*row) for row in db.session.query(
+                ShopAddress.address_id,
+                Shop.shop_id,
+                Shop.shop_name,
+                Shop.shop_image,
+                ShopAddress.city,
+                ShopAddress.area,
+                ShopAddress.landmark,
+                ShopAddress.pincode,
+                ShopAddress.latitude,
+                ShopAddress.longitude
+            ).join(
+                ShopAddress, Shop.shop_id == ShopAddress.shop_id
+            ).order_by(Shop.shop_id, ShopAddress.address_id)]
+            self._shops = shops
+            self._locations = {row.address_id: row for row in rows}
+            rows = (sorted(shops.items()), rows)
+
+        table_versions = [versions[model.__tablename__] for model in DIMENSIONS[dimension]]
+        # Versions alone miss writes that bypass the API; the checksum doesn't
+        checksum = zlib.crc32(repr(rows).encode('utf-8'))
+        self._etags[dimension] = '{}-{}-{:08x}'.format(
+            dimension, '.'.join(str(version) for version, _ in table_versions), checksum
+        )
+        self._updated_at[dimension] = max(
+            (updated_at for _, updated_at in table_versions if updated_at is not None), default=None
+        )
+
+    def etag(self, dimension):
+        """Validator of a part (``categories`` or ``shops``), for HTTP ETags."""
+        return self._etags.get(dimension)
+
+    def last_modified(self, dimension):
+        """When a part's tables last changed through the API, or None if unknown."""
+        return self._updated_at.get(dimension)
+
+    @property
+    def categories(self):
+        """All categories, by id."""
+        return self._categories
+
+    def category_name(self, category_id):
+        return self._category_names.get(category_id)
+
+    def category_ids_matching(self, text):
+        """Ids of the categories whose name contains ``text`` (case-insensitive)."""
+        text = text.lower()
+        return [
+            category.category_id for category in self._categories
+            if category.category_name and text in category.category_name.lower()
+        ]
+
+    def shop(self, shop_id):
+        return self._shops.get(shop_id)
+
+    def shop_name(self, shop_id):
+        shop = self._shops.get(shop_id)
+        return shop.shop_name if shop is not None else None
+
+    def shop_image(self, shop_id):
+        shop = self._shops.get(shop_id)
+        return shop.shop_image if shop is not None else None
+
+    def location(self, address_id):
+        """``ShopLocation`` of an address, or None if unknown."""
+        return self._locations.get(address_id)
+
+    def locations(self):
+        """Every ``ShopLocation``, by shop id then address id."""
+        return list(self._locations.values())
+
+    def mark_stale(self, dimension):
+        self._stale.add(dimension)
+
+dimensions = DimensionSnapshot()
+
+for model in (ProductCategory, Shop, ShopAddress):
+    data_versions.track(model)
+
+model_events.subscribe(ProductCategory, lambda changes: dimensions.mark_stale('categories'))
+model_events.subscribe(Shop, lambda changes: dimensions.mark_stale('shops'))
+model_events.subscribe(ShopAddress, lambda changes: dimensions.mark_stale('shops'))
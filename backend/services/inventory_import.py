@@ -0,0 +1,262 @@
+import csv
+import json
+import logging
+import time
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import insert, update
+from models import db, Shop, Product, ShopProduct
+from services import model_events, data_versions, product_offers
+from services.model_events import Change
+
+logger = logging.getLogger(__name__)
+
+# Rows per transaction; also bounds the IN (...) lists used per batch
+MAX_BATCH_SIZE = 1000
+
+# Largest value of Shop_Product.price, a DECIMAL(10, 2)
+MAX_PRICE = Decimal('99999999.99')
+
+FORMATS = ('csv', 'jsonl')
+
+def read_rows(stream, fmt):
+    """
+    Stream raw records from a CSV (with a header row) or JSONL text stream.
+
+    Yields ``(line, record, error)``: ``record`` is a dict, or None with an
+    ``error`` message when the line could not be parsed. Only the current
+    line is held in memory.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record, None
+    elif fmt == 'jsonl':
+        for line, text in enumerate(stream, 1):
+            text = text.strip()
+            if not text:
+                continue
+            try:
+                record = json.loads(text)
+            except ValueError as e:
+                yield line, None, f'Invalid JSON: {e}'
+                continue
+            if not isinstance(record, dict):
+                yield line, None, 'Expected a JSON object'
+                continue
+            yield line, record, None
+    else:
+        raise ValueError(f'Unsupported format {fmt!r}; expected one of {", ".join(FORMATS)}')
+
+def _positive_int(record, field):
+    value = record.get(field)
+    try:
+        number = int(str(value).strip())
+    except (TypeError, ValueError):
+        raise ValueError(f'{field} must be an integer')
+    if number <= 0:
+        raise ValueError(f'{field} must be positive')
+    return number
+
+def validate_row(record):
+    """
+    Normalize one feed record to Shop_Product values.
+
+    Returns:
+        dict: shop_id, product_id, price (Decimal, 2 places) and stock
+
+    Raises:
+        ValueError: If a field is missing or out of range
+    """
+    values = {
+        'shop_id': _positive_int(record, 'shop_id'),
+        'product_id': _positive_int(record, 'product_id')
+    }
+    try:
+        price = Decimal(str(record.get('price')).strip())
+    except InvalidOperation:
+        raise ValueError('price must be a number')
+    if not price.is_finite() or price < 0 or price > MAX_PRICE:
+        raise ValueError('price is out of range')
+    values['price'] = price.quantize(Decimal('0.01'))
+    try:
+        stock = int(str(record.get('stock')).strip())
+    except ValueError:
+        raise ValueError('stock must be an integer')
+    if stock < 0:
+        raise ValueError('stock cannot be negative')
+    values['stock'] = stock
+    return values
+
+class InventoryImporter:
+    """
+    Upserts price/stock feeds into ``Shop_Product`` in bounded batches.
+
+    Each batch of up to ``batch_size`` records is validated, matched against
+    existing (shop, product) offers with a few indexed lookups, written with
+    one executemany INSERT and one executemany UPDATE, and committed on its
+    own, so a failure only loses the batch in progress. After every commit
+    the ``checkpoint`` callback receives the number of source records
+    consumed so far; passing that number back as ``skip`` resumes the import.
+    """
+
+    def __init__(self, batch_size=MAX_BATCH_SIZE, max_errors=100, on_batch=None):
+        self.batch_size = min(max(batch_size, 1), MAX_BATCH_SIZE)
+        self.max_errors = max_errors
+        self.on_batch = on_batch
+        self._known_shops = set()
+
+    def run(self, rows, skip=0, checkpoint=None):
+        """
+        Import ``rows`` (as produced by ``read_rows``).
+
+        Args:
+            rows: Iterable of ``(line, record, error)``
+            skip: Records already imported by an earlier run
+            checkpoint: Optional ``checkpoint(position)`` called after each commit
+
+        Returns:
+            dict: Totals, per-batch throughput, the first rejected rows and,
+            if a batch failed, its error and the position to resume from
+        """
+        report = {
+            'position': skip,
+            'inserted': 0,
+            'updated': 0,
+            'rejected': 0,
+            'batches': [],
+            'errors': [],
+            'failed': None
+        }
+        started = time.perf_counter()
+        position = 0
+        batch = []
+        for line, record, error in rows:
+            position += 1
+            if position <= skip:
+                continue
+            batch.append((line, record, error))
+            if len(batch) >= self.batch_size:
+                if not self._run_batch(batch, position, report, checkpoint):
+                    break
+                batch = []
+        else:
+            if batch:
+                self._run_batch(batch, position, report, checkpoint)
+
+        elapsed = time.perf_counter() - started
+        written = report['inserted'] + report['updated']
+        report['seconds'] = round(elapsed, 3)
+        report['rows_per_second'] = round(written / elapsed, 1) if elapsed else None
+        return report
+
+    def _reject(self, report, line, message):
+        report['rejected'] += 1
+        if len(report['errors']) < self.max_errors:
+            report['errors'].append({'line': line, 'error': message})
+
+    def _run_batch(self, batch, position, report, checkpoint):
+        started = time.perf_counter()
+        rejected_before = report['rejected']
+        errors_before = len(report['errors'])
+
+        # Validate; a later record for the same offer overrides an earlier one
+        offers = {}
+        for line, record, error in batch:
+            if error is None:
+                try:
+                    values = validate_row(record)
+                except ValueError as e:
+                    error = str(e)
+            if error is not None:
+                self._reject(report, line, error)
+                continue
+            offers[(values['shop_id'], values['product_id'])] = (line, values)
+
+        try:
+            inserted, updated = self._write(offers, report)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception('Inventory batch ending at record %d failed', position)
+            report['rejected'] = rejected_before
+            del report['errors'][errors_before:]
+            report['failed'] = {'error': str(e), 'resume_from': report['position']}
+            return False
+
+        model_events.publish(ShopProduct, [Change('insert', values) for values in inserted] +
+                                          [Change('update', values) for values in updated])
+        report['position'] = position
+        report['inserted'] += len(inserted)
+        report['updated'] += len(updated)
+        elapsed = time.perf_counter() - started
+        stats = {
+            'batch': len(report['batches']) + 1,
+            'position': position,
+            'inserted': len(inserted),
+            'updated': len(updated),
+            'rejected': report['rejected'] - rejected_before,
+            'seconds': round(elapsed, 4),
+            'rows_per_second': round(len(batch) / elapsed, 1) if elapsed else None
+        }
+        report['batches'].append(stats)
+        if checkpoint is not None:
+            checkpoint(position)
+        if self.on_batch is not None:
+            self.on_batch(stats)
+        return True
+
+    def _write(self, offers, report):
+        if not offers:
+            return [], []
+
+        # Offers must point at existing shops and products
+        product_ids = {product_id for _, product_id in offers}
+        known_products = {
+            row.product_id for row in
+            db.session.query(Product.product_id).filter(Product.product_id.in_(product_ids))
+        }
+        unknown_shops = {shop_id for shop_id, _ in offers} - self._known_shops
+        if unknown_shops:
+            self._known_shops.update(
+                row.shop_id for row in db.session.query(Shop.shop_id).filter(Shop.shop_id.in_(unknown_shops))
+            )
+
+        by_shop = defaultdict(dict)
+        for (shop_id, product_id), (line, values) in offers.items():
+            if shop_id not in self._known_shops:
+                self._reject(report, line, f'Unknown shop_id {shop_id}')
+            elif product_id not in known_products:
+                self._reject(report, line, f'Unknown product_id {product_id}')
+            else:
+                by_shop[shop_id][product_id] = values
+
+        # Feeds usually come one shop at a time, so this is one lookup per shop
+        inserts, updates = [], []
+        for shop_id, shop_offers in by_shop.items():
+            existing = defaultdict(list)
+            for row in db.session.query(ShopProduct.shop_product_id, ShopProduct.product_id).filter(
+                ShopProduct.shop_id == shop_id,
+                ShopProduct.product_id.in_(list(shop_offers))
+            ):
+                existing[row.product_id].append(row.shop_product_id)
+            for product_id, values in shop_offers.items():
+                if product_id in existing:
+                    updates.extend(dict(values, shop_product_id=shop_product_id)
+                                   for shop_product_id in existing[product_id])
+                else:
+                    inserts.append(values)
+
+        if inserts:
+            db.session.execute(insert(ShopProduct), inserts)
+        if updates:
+            db.session.execute(update(ShopProduct), updates)
+        # Bulk statements bypass the flush that bumps versions and refreshes offers
+        data_versions.bump_rows(ShopProduct, inserts + updates)
+        product_offers.refresh_offers(
+            db.session.connection(),
+            shop_product_ids=[values['shop_product_id'] for values in updates],
+            # New rows' ids aren't returned: refresh their products
+            product_ids={values['product_id'] for values in inserts}
+        )
+        return inserts, updates
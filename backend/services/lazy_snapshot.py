@@ -0,0 +1,49 @@
+import threading
+import time
+from flask import current_app
+
+class LazySnapshot:
+    """
+    Base of the in-memory indexes built from database tables.
+
+    A snapshot is loaded on first use and rebuilt (catching writes by other
+    processes) once it is older than the ``REFRESH_SETTING`` config value,
+    in seconds; 0 never rebuilds it. Between rebuilds subclasses apply
+    committed changes from ``model_events``, skipping them while nothing is
+    loaded. Rows removed by ``ON DELETE CASCADE`` never reach the ORM, so
+    the handler of the parent table's deletes drops them too.
+
+    Subclasses implement ``_load``, which builds the whole snapshot.
+    """
+
+    REFRESH_SETTING = None
+    REFRESH_DEFAULT = 600
+
+    def __init__(self):
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._loaded_at is not None
+
+    def ensure_loaded(self):
+        refresh = current_app.config.get(self.REFRESH_SETTING, self.REFRESH_DEFAULT)
+        loaded_at = self._loaded_at
+        if loaded_at is not None and (not refresh or time.monotonic() - loaded_at < refresh):
+            return
+        with self._lock:
+            if self._loaded_at is loaded_at:
+                self.reload()
+
+    def reload(self):
+        """Rebuild the snapshot from the database."""
+        self._load()
+        self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """Rebuild on the next lookup."""
+        self._loaded_at = None
+
+    def _load(self):
+        raise NotImplementedError
@@ -0,0 +1,130 @@
+import importlib
+import pkgutil
+import re
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import Column, Index, MetaData, Table, delete, inspect, insert, select
+import migrations as migrations_package
+from models import SchemaMigration
+
+# migrations/v0001_route_indexes.py -> version 1, name 'route_indexes'
+_MODULE_NAME = re.compile(r'^v(\d+)_(\w+)$')
+
+Migration = namedtuple('Migration', ['version', 'name', 'description', 'module'])
+
+def available():
+    """
+    Every migration in the ``migrations`` package, oldest first.
+
+    A migration is a module ``v<version>_<name>.py`` with an
+    ``upgrade(connection)`` function and optionally ``downgrade(connection)``;
+    the first line of its docstring describes it.
+    """
+    found = {}
+    for module_info in pkgutil.iter_modules(migrations_package.__path__):
+        match = _MODULE_NAME.match(module_info.name)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in found:
+            raise ValueError(f'Two migrations have version {version}: {found[version].name}, {match.group(2)}')
+        module = importlib.import_module(f'{migrations_package.__name__}.{module_info.name}')
+        description = (module.__doc__ or '').strip().split('\n')[0]
+        found[version] = Migration(version, match.group(2), description, module)
+    return [found[version] for version in sorted(found)]
+
+def applied(connection):
+    """Applied version -> when it was applied (creates ``Schema_Migrations`` if missing)."""
+    SchemaMigration.__table__.create(connection, checkfirst=True)
+    return dict(connection.execute(select(SchemaMigration.version, SchemaMigration.applied_at)).all())
+
+def status(engine):
+    """``(migration, applied_at or None)`` for every available migration."""
+    with engine.begin() as connection:
+        done = applied(connection)
+    return [(migration, done.get(migration.version)) for migration in available()]
+
+def upgrade(engine, target=None, on_migration=None):
+    """
+    Apply the pending migrations up to ``target`` (default: all), oldest first.
+
+    Each migration runs in its own transaction together with its
+    ``Schema_Migrations`` row, so a failure leaves the earlier ones applied
+    and the failed one not recorded. A second process migrating at the same
+    time fails on the version primary key instead of applying twice.
+
+    Returns:
+        list: The migrations applied
+    """
+    with engine.begin() as connection:
+        done = applied(connection)
+    pending = [
+        migration for migration in available()
+        if migration.version not in done and (target is None or migration.version <= target)
+    ]
+    for migration in pending:
+        if on_migration:
+            on_migration(migration)
+        with engine.begin() as connection:
+            migration.module.upgrade(connection)
+            connection.execute(insert(SchemaMigration).values(
+                version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+            ))
+    return pending
+
+def downgrade(engine, target, on_migration=None):
+    """
+    Revert the applied migrations above ``target``, newest first.
+
+    Returns:
+        list: The migrations reverted
+    """
+    with engine.begin() as connection:
+        done = applied(connection)
+    reverting = [
+        migration for migration in reversed(available())
+        if migration.version in done and migration.version > target
+    ]
+    for migration in reverting:
+        if not hasattr(migration.module, 'downgrade'):
+            raise ValueError(f'Migration {migration.version} ({migration.name}) cannot be reverted')
+    for migration in reverting:
+        if on_migration:
+            on_migration(migration)
+        with engine.begin() as connection:
+            migration.module.downgrade(connection)
+            connection.execute(delete(SchemaMigration).where(SchemaMigration.version == migration.version))
+    return reverting
+
+def stamp(connection):
+    """Record every migration as applied without running it (schema built by ``create_all``)."""
+    done = applied(connection)
+    for migration in available():
+        if migration.version not in done:
+            connection.execute(insert(SchemaMigration).values(
+                version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+            ))
+
+def _index(name, table, columns, include):
+    # Detached table: the DDL is emitted from the migration's own column list,
+    # not from the current models
+    table = Table(table, MetaData(), *[Column(column) for column in dict.fromkeys(list(columns) + list(include))])
+    return Index(name, *[table.c[column] for column in columns], mssql_include=list(include))
+
+def create_index(connection, name, table, columns, include=()):
+    """
+    Create index ``name`` on ``table`` unless it exists. ``include`` adds
+    non-key columns on SQL Server (a covering index); other databases ignore it.
+    """
+    if any(index['name'] == name for index in inspect(connection).get_indexes(table)):
+        return False
+    _index(name, table, columns, include).create(connection)
+    return True
+
+def drop_index(connection, name, table):
+    """Drop index ``name`` of ``table`` if it exists."""
+    existing = [index for index in inspect(connection).get_indexes(table) if index['name'] == name]
+    if not existing:
+        return False
+    _index(name, table, existing[0]['column_names'], ()).drop(connection)
+    return True
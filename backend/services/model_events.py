@@ -0,0 +1,59 @@
+import logging
+from collections import defaultdict, namedtuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+# A committed row change: op is 'insert', 'update' or 'delete', values maps
+# column attribute names to the row's values as flushed.
+Change = namedtuple('Change', ['op', 'values'])
+
+logger = logging.getLogger(__name__)
+
+_subscribers = defaultdict(list)
+
+def subscribe(model, handler):
+    """
+    Call ``handler(changes)`` with the list of committed ``Change`` records for
+    ``model`` after every successful commit that touched it.
+    """
+    _subscribers[model].append(handler)
+
+def publish(model, changes):
+    """Dispatch changes made outside the ORM unit of work (e.g. bulk writes)."""
+    if not changes:
+        return
+    for handler in _subscribers.get(model, ()):
+        try:
+            handler(changes)
+        except Exception:
+            # The data is already committed; a stale derived structure must
+            # not turn a successful write into an error response.
+            logger.exception('Change handler %r failed for %s', handler, model.__name__)
+
+def _snapshot(obj):
+    mapper = inspect(obj).mapper
+    return {attr.key: getattr(obj, attr.key) for attr in mapper.column_attrs}
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changes(session, flush_context):
+    pending = session.info.setdefault('model_changes', defaultdict(list))
+    for op, objects in (('insert', session.new), ('update', session.dirty), ('delete', session.deleted)):
+        for obj in objects:
+            model = type(obj)
+            if model not in _subscribers:
+                continue
+            if op == 'update' and not session.is_modified(obj, include_collections=False):
+                continue
+            pending[model].append(Change(op, _snapshot(obj)))
+
+@event.listens_for(Session, 'after_commit')
+def _dispatch_changes(session):
+    pending = session.info.pop('model_changes', None)
+    if not pending:
+        return
+    for model, changes in pending.items():
+        publish(model, changes)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('model_changes', None)
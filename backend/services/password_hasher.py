@@ -0,0 +1,87 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from bcrypt import hashpw, checkpw, gensalt
+
+class HasherSaturated(Exception):
+    """Raised when the hashing pool and its queue are full."""
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, bounded worker pool.
+
+    bcrypt releases the GIL while hashing, so a thread pool gives real
+    parallelism and keeps slow hashes off the request threads' budget: at
+    most ``workers`` hashes run at once and at most ``queue_size`` more wait.
+    Anything beyond that is rejected immediately with ``HasherSaturated`` so
+    the caller can answer 429 instead of piling up blocked workers.
+    """
+
+    def __init__(self):
+        self.rounds = 12
+        self.workers = 0
+        self.queue_size = 0
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self._counters_lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+
+    def init_app(self, app):
+        self.rounds = app.config.get('BCRYPT_ROUNDS', 12)
+        workers = app.config.get('PASSWORD_HASH_WORKERS') or min(4, os.cpu_count() or 1)
+        queue_size = app.config.get('PASSWORD_HASH_QUEUE_SIZE', 16)
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+            self._slots = threading.BoundedSemaphore(workers + queue_size)
+            self.workers = workers
+            self.queue_size = queue_size
+
+    def _run(self, fn, *args):
+        if self._executor is None:
+            raise RuntimeError('PasswordHasher.init_app() has not been called')
+        if not self._slots.acquire(blocking=False):
+            with self._counters_lock:
+                self.rejected += 1
+            raise HasherSaturated('Password hashing capacity exceeded')
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._finished)
+        return future.result()
+
+    def _finished(self, future):
+        self._slots.release()
+        with self._counters_lock:
+            self.completed += 1
+
+    def hash(self, password):
+        """bcrypt hash of ``password`` at the configured cost, as a str."""
+        return self._run(hashpw, password.encode('utf-8'), gensalt(self.rounds)).decode('utf-8')
+
+    def verify(self, password, hashed):
+        """Check ``password`` against a stored bcrypt hash."""
+        return self._run(checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def needs_rehash(self, hashed):
+        """True when ``hashed`` was made with a lower cost than configured."""
+        try:
+            return int(hashed.split('$')[2]) < self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'rounds': self.rounds,
+            'completed': self.completed,
+            'rejected': self.rejected
+        }
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,135 @@
+from sqlalchemy import case, delete, event, func, insert, select, update
+from sqlalchemy.orm import Session
+from services.data_versions import row_values
+from utils.sql import batched
+from models import (
+    Product, ShopProduct, ShopAddress, ProductRatingSummary, ProductOffer, ProductPriceRange
+)
+
+# Product_Offers rows as the 4-way join builds them: every in-stock offer,
+# once per address of its shop, with the product's rating aggregate
+_offer_rows = select(
+    ShopProduct.shop_product_id,
+    ShopAddress.address_id,
+    Product.product_id,
+    ShopProduct.shop_id,
+    Product.product_name,
+    Product.brand,
+    Product.description,
+    Product.color,
+    Product.category_id,
+    ShopProduct.price,
+    ShopProduct.stock,
+    ShopAddress.city,
+    ShopAddress.area,
+    ShopAddress.landmark,
+    ShopAddress.latitude,
+    ShopAddress.longitude,
+    ProductRatingSummary.review_count,
+    case(
+        (ProductRatingSummary.review_count > 0, ProductRatingSummary.rating_sum / ProductRatingSummary.review_count),
+        else_=None
+    )
+).select_from(ShopProduct).join(
+    Product, ShopProduct.product_id == Product.product_id
+).join(
+    ShopAddress, ShopProduct.shop_id == ShopAddress.shop_id
+).outerjoin(
+    ProductRatingSummary, ProductRatingSummary.product_id == Product.product_id
+).where(ShopProduct.stock > 0)
+
+_offer_columns = [
+    'shop_product_id', 'address_id', 'product_id', 'shop_id', 'product_name', 'brand', 'description',
+    'color', 'category_id', 'price', 'stock', 'city', 'area', 'landmark', 'latitude', 'longitude',
+    'review_count', 'rating_average'
+]
+
+# Offer column -> the source column it is refreshed by
+_scopes = {
+    'shop_product_id': (ProductOffer.shop_product_id, ShopProduct.shop_product_id),
+    'product_id': (ProductOffer.product_id, Product.product_id),
+    'shop_id': (ProductOffer.shop_id, ShopProduct.shop_id)
+}
+
+def refresh_offers(connection, shop_product_ids=(), product_ids=(), shop_ids=(), price_product_ids=()):
+    """
+    Rebuild the ``Product_Offers`` rows of the given offers, products and
+    shops from the source tables, then the price ranges of every product
+    they touched (and of ``price_product_ids``), on ``connection`` in its
+    current transaction, so the derived rows commit or roll back with the
+    change.
+    """
+    touched = set(product_ids) | set(price_product_ids)
+    for scope, ids in (('shop_product_id', shop_product_ids), ('product_id', product_ids), ('shop_id', shop_ids)):
+        offer_column, source_column = _scopes[scope]
+        for batch in batched(sorted(set(ids))):
+            if scope != 'product_id':
+                # Products that had offers here, and those that will
+                touched.update(connection.execute(
+                    select(ProductOffer.product_id).where(offer_column.in_(batch)).distinct()
+                ).scalars())
+                touched.update(connection.execute(
+                    select(ShopProduct.product_id).where(source_column.in_(batch)).distinct()
+                ).scalars())
+            connection.execute(delete(ProductOffer).where(offer_column.in_(batch)))
+            connection.execute(insert(ProductOffer).from_select(_offer_columns, _offer_rows.where(source_column.in_(batch))))
+    refresh_price_ranges(connection, touched)
+
+def refresh_price_ranges(connection, product_ids):
+    """Recompute the ``Product_Price_Ranges`` rows of ``product_ids`` from their offers."""
+    for batch in batched(sorted({product_id for product_id in product_ids if product_id is not None})):
+        connection.execute(delete(ProductPriceRange).where(ProductPriceRange.product_id.in_(batch)))
+        connection.execute(insert(ProductPriceRange).from_select(
+            ['product_id', 'min_price', 'max_price', 'shop_count'],
+            select(
+                ProductOffer.product_id,
+                func.min(ProductOffer.price),
+                func.max(ProductOffer.price),
+                func.count(ProductOffer.shop_id.distinct())
+            ).where(ProductOffer.product_id.in_(batch)).group_by(ProductOffer.product_id)
+        ))
+
+def refresh_rating(connection, product_id):
+    """Copy a product's rating aggregate onto its offers."""
+    summary = connection.execute(
+        select(ProductRatingSummary.review_count, ProductRatingSummary.rating_sum)
+        .where(ProductRatingSummary.product_id == product_id)
+    ).first()
+    review_count, average = 0, None
+    if summary is not None and summary.review_count:
+        review_count, average = summary.review_count, summary.rating_sum / summary.review_count
+    connection.execute(
+        update(ProductOffer).where(ProductOffer.product_id == product_id)
+        .values(review_count=review_count, rating_average=average)
+    )
+
+def rebuild(connection):
+    """Rebuild both tables from scratch (backfill or repair)."""
+    connection.execute(delete(ProductPriceRange))
+    connection.execute(delete(ProductOffer))
+    connection.execute(insert(ProductOffer).from_select(_offer_columns, _offer_rows))
+    product_ids = connection.execute(select(ProductOffer.product_id).distinct()).scalars().all()
+    refresh_price_ranges(connection, product_ids)
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_changed(session, flush_context):
+    shop_product_ids, product_ids, shop_ids, price_product_ids = set(), set(), set(), set()
+    for objects, modified in ((session.new, False), (session.dirty, True), (session.deleted, False)):
+        for obj in objects:
+            if not isinstance(obj, (ShopProduct, Product, ShopAddress)):
+                continue
+            if modified and not session.is_modified(obj, include_collections=False):
+                continue
+            for values in row_values(obj, modified):
+                if isinstance(obj, ShopProduct):
+                    shop_product_ids.add(values['shop_product_id'])
+                    # A deleted offer's rows may already be gone (cascade)
+                    price_product_ids.add(values['product_id'])
+                elif isinstance(obj, Product):
+                    product_ids.add(values['product_id'])
+                else:
+                    shop_ids.add(values['shop_id'])
+    for ids in (shop_product_ids, product_ids, shop_ids, price_product_ids):
+        ids.discard(None)
+    if shop_product_ids or product_ids or shop_ids:
+        refresh_offers(session.connection(), shop_product_ids, product_ids, shop_ids, price_product_ids)
@@ -0,0 +1,57 @@
+from decimal import Decimal
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from models import db, ProductRatingSummary
+from services import product_offers
+
+def _star(rating):
+    """Histogram bucket of a rating: whole stars, clamped to 1-5."""
+    return min(5, max(1, int(rating)))
+
+def record_review(product_id, rating):
+    """
+    Fold a new review into the product's rating aggregate, in the caller's
+    transaction so the aggregate commits (or rolls back) with the review.
+
+    Uses an atomic UPDATE ... SET col = col + 1 so concurrent reviews never
+    lose increments; the first review of a product inserts the row. The new
+    average is copied onto the product's ``Product_Offers`` rows.
+    """
+    rating = Decimal(str(rating))
+    bucket = getattr(ProductRatingSummary, f'rating_{_star(rating)}')
+    increment = update(ProductRatingSummary).where(
+        ProductRatingSummary.product_id == product_id
+    ).values({
+        ProductRatingSummary.review_count: ProductRatingSummary.review_count + 1,
+        ProductRatingSummary.rating_sum: ProductRatingSummary.rating_sum + rating,
+        bucket: bucket + 1
+    }).execution_options(synchronize_session=False)
+
+    if not db.session.execute(increment).rowcount:
+        summary = ProductRatingSummary(product_id=product_id, review_count=1, rating_sum=rating,
+                                       rating_1=0, rating_2=0, rating_3=0, rating_4=0, rating_5=0)
+        setattr(summary, bucket.key, 1)
+        try:
+            with db.session.begin_nested():
+                db.session.add(summary)
+        except IntegrityError:
+            # Another request created the row first
+            db.session.execute(increment)
+    product_offers.refresh_rating(db.session.connection(), product_id)
+
+def rating_summary(product_id):
+    """Average, count and histogram of a product's ratings."""
+    return format_summary(db.session.get(ProductRatingSummary, product_id))
+
+def format_summary(summary):
+    if summary is None or not summary.review_count:
+        return {
+            'average': None,
+            'count': 0,
+            'histogram': {str(star): 0 for star in range(1, 6)}
+        }
+    return {
+        'average': round(float(summary.rating_sum) / summary.review_count, 2),
+        'count': summary.review_count,
+        'histogram': {str(star): getattr(summary, f'rating_{star}') for star in range(1, 6)}
+    }
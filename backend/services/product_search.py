@@ -0,0 +1,79 @@
+from models import db, Product, ProductCategory
+from utils.text_index import InvertedIndex
+from services import model_events
+from services.lazy_snapshot import LazySnapshot
+
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'brand': 2.0,
+    'category': 1.5,
+    'color': 1.0,
+    'description': 1.0
+}
+
+class ProductSearchIndex(LazySnapshot):
+    """
+    Full-text index over the product catalog, loaded lazily from ``Products``
+    and maintained incrementally from committed product changes.
+    """
+
+    REFRESH_SETTING = 'SEARCH_INDEX_REFRESH_SECONDS'
+
+    def __init__(self):
+        super().__init__()
+        self.index = InvertedIndex(FIELD_WEIGHTS)
+        self._category_names = {}
+
+    def _load(self):
+        categories = db.session.query(ProductCategory.category_id, ProductCategory.category_name).all()
+        category_names = {row.category_id: row.category_name for row in categories}
+
+        products = db.session.query(
+            Product.product_id,
+            Product.product_name,
+            Product.brand,
+            Product.description,
+            Product.color,
+            Product.category_id
+        ).yield_per(1000)
+
+        index = InvertedIndex(FIELD_WEIGHTS)
+        for product in products:
+            index.add(product.product_id, self._fields(product._asdict(), category_names))
+
+        self.index = index
+        self._category_names = category_names
+
+    def _fields(self, product, category_names):
+        return {
+            'name': product['product_name'],
+            'brand': product['brand'],
+            'category': category_names.get(product['category_id']),
+            'color': product['color'],
+            'description': product['description']
+        }
+
+    def search(self, query, limit=None):
+        """Return ``(product_id, score)`` for products matching ``query``, best first."""
+        self.ensure_loaded()
+        return self.index.search(query, limit)
+
+    def apply_product_changes(self, changes):
+        if not self.loaded:
+            return
+        for change in changes:
+            values = change.values
+            if change.op == 'delete':
+                self.index.remove(values['product_id'])
+            else:
+                self.index.add(values['product_id'], self._fields(values, self._category_names))
+
+    def apply_category_changes(self, changes):
+        # Renames touch every product of the category; they are rare, so
+        # schedule a full rebuild instead of tracking products per category
+        self.invalidate()
+
+product_search = ProductSearchIndex()
+
+model_events.subscribe(Product, product_search.apply_product_changes)
+model_events.subscribe(ProductCategory, product_search.apply_category_changes)
@@ -0,0 +1,201 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+from models import db, Product, ProductCategory, SearchHistory
+from utils.prefix_index import PrefixIndex
+from utils.text_index import tokenize
+from services import model_events
+from services.lazy_snapshot import LazySnapshot
+
+# Suggestion types; on equal popularity categories come first, then brands
+KINDS = ('category', 'brand', 'product')
+_KIND_RANK = {kind: rank for rank, kind in enumerate(KINDS)}
+
+# Most searched distinct terms of the history window used for weighting
+MAX_HISTORY_TERMS = 10000
+
+def normalize(text):
+    """Lower-case words of ``text`` joined by single spaces (the form keys are stored in)."""
+    return ' '.join(tokenize(text))
+
+def _word_suffixes(key):
+    # 'apple iphone 15' completes 'app', 'iph' and '15'
+    words = key.split(' ')
+    return [' '.join(words[start:]) for start in range(len(words))]
+
+class Phrase:
+    """A suggestion: its display text and what it is weighted by."""
+
+    __slots__ = ('kind', 'key', 'text', 'products', 'searches')
+
+    def __init__(self, kind, key, text, searches=0):
+        self.kind = kind
+        self.key = key
+        self.text = text
+        self.products = 0
+        self.searches = searches
+
+    def order(self):
+        return (-self.searches, -self.products, _KIND_RANK[self.kind], self.key)
+
+class ProductSuggestIndex(LazySnapshot):
+    """
+    Typeahead completions over product names, brands and category names.
+
+    Every phrase is indexed under each of its word suffixes, so a prefix of
+    any word boundary completes it. Phrases are ordered by how often they
+    were searched in the last ``SUGGEST_HISTORY_DAYS`` days (the searches
+    whose every word occurs in the phrase), then by how many products they
+    cover. Loaded lazily, kept current from committed product changes and
+    rebuilt (popularity included) every ``SUGGEST_REFRESH_SECONDS``.
+    """
+
+    REFRESH_SETTING = 'SUGGEST_REFRESH_SECONDS'
+
+    def __init__(self):
+        super().__init__()
+        self.index = PrefixIndex()
+        self._phrases = {}
+        self._products = {}  # product_id -> (product, brand, category) phrase ids
+        self._category_names = {}
+        self._terms_by_word = {}  # a search term's smallest word -> [(its words, count)]
+
+    def _load(self):
+        """Rebuild from the catalog and the search history window."""
+        config = current_app.config
+        category_names = dict(db.session.query(ProductCategory.category_id, ProductCategory.category_name).all())
+        products = db.session.query(
+            Product.product_id,
+            Product.product_name,
+            Product.brand,
+            Product.category_id
+        ).filter(Product.category_id.isnot(None)).yield_per(1000)
+
+        phrases, contributions = {}, {}
+        for product in products:
+            ids = self._phrase_ids(product._asdict(), category_names)
+            contributions[product.product_id] = ids
+            for phrase_id, text in ids:
+                phrase = phrases.get(phrase_id)
+                if phrase is None:
+                    phrase = phrases[phrase_id] = Phrase(phrase_id[0], phrase_id[1], text)
+                phrase.products += 1
+
+        since = datetime.utcnow() - timedelta(days=config.get('SUGGEST_HISTORY_DAYS', 30))
+        history = db.session.query(SearchHistory.search_item, func.count()).filter(
+            SearchHistory.timestamp >= since
+        ).group_by(SearchHistory.search_item).order_by(func.count().desc()).limit(MAX_HISTORY_TERMS).all()
+        term_counts = {}
+        for search_item, count in history:
+            term = normalize(search_item)
+            if term:
+                term_counts[term] = term_counts.get(term, 0) + count
+        self._add_searches(phrases, term_counts)
+
+        index = PrefixIndex(k=config.get('SUGGEST_MAX_RESULTS', 20))
+        index.load((phrase_id, _word_suffixes(phrase.key), phrase.order()) for phrase_id, phrase in phrases.items())
+
+        self.index = index
+        self._phrases = phrases
+        self._products = {product_id: tuple(phrase_id for phrase_id, _ in ids) for product_id, ids in contributions.items()}
+        self._category_names = category_names
+        terms_by_word = {}
+        for term, count in term_counts.items():
+            words = frozenset(term.split(' '))
+            terms_by_word.setdefault(min(words), []).append((words, count))
+        self._terms_by_word = terms_by_word
+
+    def _phrase_ids(self, product, category_names):
+        """``((kind, key), display text)`` of the phrases a product contributes to."""
+        ids = []
+        for kind, text in (
+            ('product', product['product_name']),
+            ('brand', product['brand']),
+            ('category', category_names.get(product['category_id']))
+        ):
+            key = normalize(text)
+            if key:
+                ids.append(((kind, key), text.strip()))
+        return ids
+
+    @staticmethod
+    def _add_searches(phrases, term_counts):
+        # A search counts for every phrase containing all of its words
+        by_word = {}
+        for phrase_id, phrase in phrases.items():
+            for word in set(phrase.key.split(' ')):
+                by_word.setdefault(word, set()).add(phrase_id)
+        for term, count in term_counts.items():
+            postings = [by_word.get(word) for word in set(term.split(' '))]
+            if not all(postings):
+                continue
+            postings.sort(key=len)
+            for phrase_id in postings[0].intersection(*postings[1:]):
+                phrases[phrase_id].searches += count
+
+    def _searches(self, key):
+        words = frozenset(key.split(' '))
+        return sum(
+            count
+            for word in words
+            for term_words, count in self._terms_by_word.get(word, ())
+            if term_words <= words
+        )
+
+    def suggest(self, query, limit=10):
+        """``{'text', 'type'}`` of the best completions of ``query``."""
+        self.ensure_loaded()
+        prefix = normalize(query)
+        if query[-1:].isspace() and prefix:
+            # 'apple ' completes words after 'apple', not 'applesauce'
+            prefix += ' '
+        phrases = self._phrases
+        suggestions = []
+        for phrase_id in self.index.top(prefix, limit):
+            phrase = phrases.get(phrase_id)
+            if phrase is not None:
+                suggestions.append({'text': phrase.text, 'type': phrase.kind})
+        return suggestions
+
+    def apply_product_changes(self, changes):
+        if not self.loaded:
+            return
+        with self._lock:
+            for change in changes:
+                values = change.values
+                product_id = values['product_id']
+                old = self._products.pop(product_id, ())
+                new = ()
+                if change.op != 'delete' and values.get('category_id') is not None:
+                    new = self._phrase_ids(values, self._category_names)
+                    self._products[product_id] = tuple(phrase_id for phrase_id, _ in new)
+                new_ids = {phrase_id for phrase_id, _ in new}
+                for phrase_id in old:
+                    if phrase_id not in new_ids:
+                        self._count(phrase_id, None, -1)
+                for phrase_id, text in new:
+                    if phrase_id not in old:
+                        self._count(phrase_id, text, 1)
+
+    def _count(self, phrase_id, text, delta):
+        phrase = self._phrases.get(phrase_id)
+        if phrase is None:
+            if delta < 0:
+                return
+            phrase = self._phrases[phrase_id] = Phrase(phrase_id[0], phrase_id[1], text, self._searches(phrase_id[1]))
+        phrase.products += delta
+        if phrase.products <= 0:
+            del self._phrases[phrase_id]
+            self.index.remove(phrase_id)
+        else:
+            self.index.add(phrase_id, _word_suffixes(phrase.key), phrase.order())
+
+    def apply_category_changes(self, changes):
+        # A rename changes the category phrase of every product in it; rare,
+        # so rebuild on the next lookup
+        self.invalidate()
+
+product_suggest = ProductSuggestIndex()
+
+model_events.subscribe(Product, product_suggest.apply_product_changes)
+model_events.subscribe(ProductCategory, product_suggest.apply_category_changes)
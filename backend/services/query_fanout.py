@@ -0,0 +1,106 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from flask import current_app
+from middleware.profiling import request_profiler
+
+class QueryFanout:
+    """
+    Runs a request's independent read queries at the same time, each on its
+    own pooled connection, so a detail endpoint waits for its slowest query
+    instead of the sum of all of them.
+
+    ``run(*loaders)`` calls every loader and returns their results in order.
+    The first loader runs on the calling thread with the request's session;
+    up to ``QUERY_FANOUT_PER_REQUEST - 1`` others run on a shared pool of
+    ``QUERY_FANOUT_WORKERS`` threads, each in a fresh app context (and so a
+    fresh session and connection). Loaders beyond the per-request cap, or
+    that find every worker busy, run on the calling thread after the first,
+    so a saturated pool degrades to sequential execution instead of queueing.
+
+    Loaders must only read the database and must not use ``request``; rows
+    they return outlive their session, so return column rows or loaded
+    objects, not lazy relationships. When the request is profiled, the
+    statements pooled loaders run are added to its profile.
+    """
+
+    def __init__(self):
+        self.workers = 0
+        self.per_request = 1
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self._counters_lock = threading.Lock()
+        self.parallel = 0
+        self.inline = 0
+
+    def init_app(self, app):
+        workers = app.config.get('QUERY_FANOUT_WORKERS', 8)
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+            if workers:
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='query-fanout')
+                self._slots = threading.BoundedSemaphore(workers)
+            self.workers = workers
+            self.per_request = max(app.config.get('QUERY_FANOUT_PER_REQUEST', 3), 1)
+
+    def run(self, *loaders):
+        """Results of ``loaders`` (no-argument callables), in order."""
+        if self._executor is None or len(loaders) < 2:
+            return [loader() for loader in loaders]
+
+        app = current_app._get_current_object()
+        profiled = request_profiler.profiling_request()
+        futures = {}
+        for index in range(1, min(len(loaders), self.per_request)):
+            if not self._slots.acquire(blocking=False):
+                break
+            try:
+                future = self._executor.submit(self._in_app_context, app, loaders[index], profiled)
+            except Exception:
+                self._slots.release()
+                raise
+            future.add_done_callback(self._finished)
+            futures[index] = future
+
+        results = [None] * len(loaders)
+        try:
+            for index, loader in enumerate(loaders):
+                if index not in futures:
+                    results[index] = loader()
+        finally:
+            # Pooled loaders finish before this returns or raises; an error
+            # of theirs must not replace one raised here
+            wait(futures.values())
+        for index, future in futures.items():
+            results[index], profile = future.result()
+            if profile is not None:
+                request_profiler.merge(profile)
+        with self._counters_lock:
+            self.parallel += len(futures)
+            self.inline += len(loaders) - len(futures)
+        return results
+
+    @staticmethod
+    def _in_app_context(app, loader, profiled):
+        # Own app context: own scoped session, removed (connection returned) on exit.
+        # Returns (result, profile of its statements or None)
+        with app.app_context():
+            if profiled:
+                return request_profiler.run_detached(loader)
+            return loader(), None
+
+    def _finished(self, future):
+        self._slots.release()
+
+    def stats(self):
+        with self._counters_lock:
+            return {
+                'workers': self.workers,
+                'per_request': self.per_request,
+                'parallel': self.parallel,
+                'inline': self.inline
+            }
+
+query_fanout = QueryFanout()
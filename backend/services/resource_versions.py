@@ -0,0 +1,93 @@
+import hashlib
+import logging
+from sqlalchemy.exc import SQLAlchemyError
+from models import db, Product, ShopProduct, ProductReview, Shop, ShopAddress, ShopTiming, ShopOwner
+from services import data_versions
+from services.data_versions import row_key
+from services.dimensions import dimensions
+
+logger = logging.getLogger(__name__)
+
+# Searches list every offer, but a single Shop_Product counter would be
+# bumped by every inventory write and queue concurrent writers on its row
+# lock: offer writes bump one of OFFER_STRIPES counters, chosen by shop
+OFFER_STRIPES = 32
+
+def validator(name, keys=(), parts=(), extra=(), versions=None, refresh_dimensions=True):
+    """
+    ``(etag, last_modified)`` of a response built from the ``Data_Versions``
+    counters ``keys``, the dimension snapshot ``parts`` and any request
+    ``extra`` values that change the representation. Costs one small
+    primary-key lookup (none without ``keys``); the body is never hashed.
+
+    Returns None when the counters can't be read, so the response is sent
+    without validators instead of failing. Callers that read the counters
+    themselves (the async views) pass them in ``versions``; on the event
+    loop they also refresh the snapshot themselves, off the loop, and pass
+    ``refresh_dimensions=False`` so nothing here touches the sync engine.
+    """
+    try:
+        if versions is None:
+            versions = data_versions.read_versions(keys) if keys else {}
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.warning('Data_Versions unavailable, sending %s without validators: %s', name, e)
+        return None
+
+    if refresh_dimensions:
+        dimensions.ensure_fresh()
+    tokens = [name]
+    tokens.extend(f'{key}={versions[key][0]}' for key in keys)
+    tokens.extend(dimensions.etag(part) or '' for part in parts)
+    tokens.extend(str(value) for value in extra)
+    etag = hashlib.sha1('|'.join(tokens).encode('utf-8')).hexdigest()[:24]
+
+    moments = [updated_at for _, updated_at in versions.values()]
+    moments.extend(dimensions.last_modified(part) for part in parts)
+    moments = [moment for moment in moments if moment is not None]
+    return etag, max(moments) if moments else None
+
+def product_keys(product_id):
+    return [row_key(Product, product_id)]
+
+def product_validator(product_id, extra=(), versions=None, refresh_dimensions=True):
+    # Shop names/images and the category name come from the snapshot
+    return validator('product', product_keys(product_id), ('categories', 'shops'), extra, versions,
+                     refresh_dimensions)
+
+def shop_validator(shop_id, extra=()):
+    # Products are listed by name: any product edit counts, as do owner edits
+    return validator('shop', [row_key(Shop, shop_id), Product.__tablename__, ShopOwner.__tablename__],
+                     ('categories',), extra)
+
+def offer_stripe_key(shop_id):
+    return f'{ShopProduct.__tablename__}#{shop_id % OFFER_STRIPES}'
+
+def search_validator(extra=()):
+    return validator('search', [
+        Product.__tablename__, ShopAddress.__tablename__, ShopTiming.__tablename__,
+        *(offer_stripe_key(stripe) for stripe in range(OFFER_STRIPES))
+    ], ('categories', 'shops'), extra)
+
+def categories_validator(extra=()):
+    return validator('categories', parts=('categories',), extra=extra)
+
+def _product_keys(values):
+    return [row_key(Product, values['product_id'])]
+
+def _shop_keys(values):
+    return [row_key(Shop, values['shop_id'])]
+
+def _offer_keys(values):
+    # Offers appear on both the product and the shop page, and in searches
+    shop_id = values['shop_id']
+    return [row_key(Product, values['product_id']), row_key(Shop, shop_id),
+            offer_stripe_key(shop_id) if shop_id is not None else None]
+
+data_versions.track(Product, rows=_product_keys)
+data_versions.track(ShopProduct, table=False, rows=_offer_keys)
+data_versions.track(ProductReview, table=False, rows=_product_keys)
+data_versions.track(Shop, table=False, rows=_shop_keys)
+data_versions.track(ShopAddress, table=False, rows=_shop_keys)
+data_versions.track(ShopTiming, rows=_shop_keys)
+data_versions.track(ShopOwner)
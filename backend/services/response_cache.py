@@ -0,0 +1,117 @@
+from models import Product, ShopProduct, ProductReview, Shop, ShopAddress, ShopTiming, ShopOwner
+from utils.cache import LRUCache, LocalSharedCache, RedisCache, TieredCache, MISSING
+from services import model_events
+
+class ResponseCache:
+    """
+    Read-through cache of product and shop detail payloads.
+
+    Entries are dropped as soon as a commit touches the data they were built
+    from (reviews, stock/price, shop details); see the subscriptions below.
+    Callers that know the version of the data (the response ETag) pass it
+    along; it is part of the key, so changes committed by other processes
+    are never served from this process' cache. The latest version used for
+    each product and shop is remembered, so invalidation deletes the
+    versioned entry (in both tiers) along with the unversioned one; older
+    versions can no longer be requested and age out.
+    """
+
+    def __init__(self):
+        self.cache = TieredCache(LRUCache())
+        self.enabled = True
+        self._versions = LRUCache(ttl=None)  # (kind, id) -> latest version
+
+    def init_app(self, app):
+        backend = app.config.get('CACHE_BACKEND', 'local')
+        self.enabled = backend != 'none'
+        local = LRUCache(
+            maxsize=app.config.get('CACHE_LOCAL_MAXSIZE', 1024),
+            ttl=app.config.get('CACHE_LOCAL_TTL', 60)
+        )
+        shared = None
+        if backend == 'redis':
+            shared = RedisCache(app.config['CACHE_REDIS_URL'], ttl=app.config.get('CACHE_SHARED_TTL', 300))
+        elif backend == 'shared-local':
+            shared = LocalSharedCache(ttl=app.config.get('CACHE_SHARED_TTL', 300))
+        self.cache = TieredCache(local, shared)
+        self._versions = LRUCache(maxsize=local.maxsize, ttl=None)
+
+    @staticmethod
+    def entry_key(kind, entity_id, version=None):
+        return f'{kind}:{entity_id}' + (f'@{version}' if version else '')
+
+    def _key(self, kind, entity_id, version):
+        if version:
+            self._versions.set((kind, entity_id), version)
+        return self.entry_key(kind, entity_id, version)
+
+    def product(self, product_id, loader, version=None):
+        """Cached product detail payload, built by ``loader`` on a miss."""
+        if not self.enabled:
+            return loader()
+        return self.cache.get_or_load(self._key('product', product_id, version), loader)
+
+    async def product_async(self, product_id, loader, version=None):
+        """``product`` with a coroutine ``loader`` (for the async views)."""
+        if not self.enabled:
+            return await loader()
+        key = self._key('product', product_id, version)
+        value = self.cache.get(key, MISSING)
+        if value is MISSING:
+            value = await loader()
+            if value is not None:
+                self.cache.set(key, value)
+        return value
+
+    def shop(self, shop_id, loader, version=None):
+        """Cached shop detail payload, built by ``loader`` on a miss."""
+        if not self.enabled:
+            return loader()
+        return self.cache.get_or_load(self._key('shop', shop_id, version), loader)
+
+    def invalidate_product(self, product_id):
+        self._invalidate('product', product_id)
+
+    def invalidate_shop(self, shop_id):
+        self._invalidate('shop', shop_id)
+
+    def _invalidate(self, kind, entity_id):
+        self.cache.delete(self.entry_key(kind, entity_id))
+        version = self._versions.get((kind, entity_id))
+        if version is not None:
+            self._versions.delete((kind, entity_id))
+            self.cache.delete(self.entry_key(kind, entity_id, version))
+
+    def stats(self):
+        return dict(self.cache.stats(), enabled=self.enabled)
+
+    # Invalidation hooks, fired after commit
+
+    def on_offer_changes(self, changes):
+        # Stock and price appear on both the product and the shop page
+        for change in changes:
+            self.invalidate_product(change.values['product_id'])
+            self.invalidate_shop(change.values['shop_id'])
+
+    def on_product_changes(self, changes):
+        for change in changes:
+            self.invalidate_product(change.values['product_id'])
+
+    def on_shop_changes(self, changes):
+        for change in changes:
+            self.invalidate_shop(change.values['shop_id'])
+
+    def on_owner_changes(self, changes):
+        # Owners are not keyed by shop; owner edits are rare, start over
+        self.cache.clear()
+        self._versions.clear()
+
+response_cache = ResponseCache()
+
+model_events.subscribe(ShopProduct, response_cache.on_offer_changes)
+model_events.subscribe(ProductReview, response_cache.on_product_changes)
+model_events.subscribe(Product, response_cache.on_product_changes)
+model_events.subscribe(Shop, response_cache.on_shop_changes)
+model_events.subscribe(ShopAddress, response_cache.on_shop_changes)
+model_events.subscribe(ShopTiming, response_cache.on_shop_changes)
+model_events.subscribe(ShopOwner, response_cache.on_owner_changes)
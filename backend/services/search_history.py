@@ -0,0 +1,187 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from sqlalchemy import insert
+from models import db, SearchHistory
+
+logger = logging.getLogger(__name__)
+
+# Queued by shutdown() to wake a writer blocked on an empty queue
+_WAKE = object()
+
+class RollingSearchAggregate:
+    """
+    Popular search terms over a sliding window, kept in memory.
+
+    Counts live in one Counter per minute; buckets older than the window are
+    dropped as new searches arrive, so reads never touch the database.
+    """
+
+    def __init__(self, window_minutes=60):
+        self.window_minutes = window_minutes
+        self._buckets = deque()  # (minute, Counter)
+        self._lock = threading.Lock()
+
+    def add(self, term, now=None):
+        now = time.time() if now is None else now
+        minute = int(now // 60)
+        with self._lock:
+            if not self._buckets or self._buckets[-1][0] != minute:
+                self._buckets.append((minute, Counter()))
+            self._buckets[-1][1][term] += 1
+            self._expire(minute)
+
+    def _expire(self, minute):
+        while self._buckets and self._buckets[0][0] <= minute - self.window_minutes:
+            self._buckets.popleft()
+
+    def popular(self, limit=10, window_minutes=None):
+        """``(term, count)`` for the most searched terms in the window."""
+        window = min(window_minutes or self.window_minutes, self.window_minutes)
+        minute = int(time.time() // 60)
+        totals = Counter()
+        with self._lock:
+            self._expire(minute)
+            for bucket_minute, counts in self._buckets:
+                if bucket_minute > minute - window:
+                    totals.update(counts)
+        return totals.most_common(limit)
+
+class SearchHistoryWriter:
+    """
+    Buffered, asynchronous writer for ``Search_History``.
+
+    ``record`` only enqueues; a background thread drains the bounded queue
+    and writes one bulk INSERT per batch, whenever ``batch_size`` events are
+    waiting or ``flush_interval`` seconds have passed. When the queue is
+    full, events are dropped and counted rather than slowing searches down.
+    Pending events are flushed on shutdown.
+    """
+
+    def __init__(self):
+        self.aggregate = RollingSearchAggregate()
+        self.enabled = False
+        self._app = None
+        self._queue = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._counters_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def init_app(self, app):
+        self._app = app
+        self.enabled = app.config.get('SEARCH_HISTORY_ENABLED', True)
+        self.batch_size = app.config.get('SEARCH_HISTORY_BATCH_SIZE', 200)
+        self.flush_interval = app.config.get('SEARCH_HISTORY_FLUSH_SECONDS', 2.0)
+        self._queue = queue.Queue(maxsize=app.config.get('SEARCH_HISTORY_QUEUE_SIZE', 10000))
+        self.aggregate = RollingSearchAggregate(app.config.get('SEARCH_HISTORY_WINDOW_MINUTES', 60))
+
+    def record(self, user_id, search_item):
+        """Queue one search for writing and count it in the rolling aggregate."""
+        term = (search_item or '').strip()[:255]
+        if not term or not self.enabled:
+            return
+        self.aggregate.add(term.lower())
+        self._ensure_started()
+        try:
+            self._queue.put_nowait({'user_id': user_id, 'search_item': term, 'timestamp': datetime.utcnow()})
+        except queue.Full:
+            with self._counters_lock:
+                self.dropped += 1
+
+    def _ensure_started(self):
+        # Started on first use so CLI commands and tests don't spawn a thread
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='search-history-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+        # Drain whatever is left on shutdown
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                break
+            self._write(batch)
+
+    def _collect(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                event = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if event is not _WAKE:
+                batch.append(event)
+        return batch
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if event is not _WAKE:
+                batch.append(event)
+        return batch
+
+    def _write(self, batch):
+        with self._app.app_context():
+            try:
+                db.session.execute(insert(SearchHistory), batch)
+                db.session.commit()
+                with self._counters_lock:
+                    self.written += len(batch)
+                    self.batches += 1
+            except Exception:
+                db.session.rollback()
+                with self._counters_lock:
+                    self.failed += len(batch)
+                logger.exception('Failed to write %d search history rows', len(batch))
+
+    def shutdown(self, timeout=10):
+        """Stop the writer thread after flushing queued events."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        try:
+            self._queue.put_nowait(_WAKE)
+        except queue.Full:
+            pass  # not blocked waiting, then
+        thread.join(timeout)
+        self._thread = None
+
+    def stats(self):
+        with self._counters_lock:
+            return {
+                'enabled': self.enabled,
+                'queued': self._queue.qsize() if self._queue is not None else 0,
+                'written': self.written,
+                'batches': self.batches,
+                'dropped': self.dropped,
+                'failed': self.failed
+            }
+
+search_history = SearchHistoryWriter()
@@ -0,0 +1,113 @@
+import datetime
+from collections import defaultdict
+from dateutil import tz
+from flask import current_app
+from models import db, Shop, ShopTiming
+from utils.timing_index import TimingIndex, weekly_intervals, minute_of_week
+from services import model_events
+from services.lazy_snapshot import LazySnapshot
+
+class ShopHours(LazySnapshot):
+    """
+    Weekly opening hours of every shop, loaded lazily from ``Shop_Timings``
+    and kept in sync with committed timing changes.
+    """
+
+    REFRESH_SETTING = 'SHOP_HOURS_REFRESH_SECONDS'
+
+    def __init__(self):
+        super().__init__()
+        self.index = TimingIndex()
+        self._timings = defaultdict(dict)  # shop_id -> timing_id -> (day, open, close)
+        self._shop_of = {}  # timing_id -> shop_id
+
+    def _load(self):
+        timings = defaultdict(dict)
+        for row in db.session.query(
+            ShopTiming.timing_id,
+            ShopTiming.shop_id,
+            ShopTiming.day,
+            ShopTiming.open_time,
+            ShopTiming.close_time
+        ):
+            timings[row.shop_id][row.timing_id] = (row.day, row.open_time, row.close_time)
+
+        self._timings = timings
+        self._shop_of = {timing_id: shop_id for shop_id, rows in timings.items() for timing_id in rows}
+        self.index.rebuild({shop_id: weekly_intervals(rows.values()) for shop_id, rows in timings.items()})
+
+    def minute_at(self, open_now=False, open_at=None):
+        """
+        Minute of the week to filter on, in the shops' time zone (``SHOP_TIMEZONE``),
+        or None when neither ``open_now`` nor ``open_at`` is given.
+
+        ``open_at`` is an ISO 8601 date-time (naive values are taken as shop
+        local time) or an ``HH:MM`` time today.
+
+        Raises:
+            ValueError: If ``open_at`` cannot be parsed
+        """
+        if not open_now and not open_at:
+            return None
+        zone = tz.gettz(current_app.config.get('SHOP_TIMEZONE', 'Asia/Kolkata'))
+        now = datetime.datetime.now(zone)
+        if not open_at:
+            return minute_of_week(now)
+        try:
+            moment = datetime.datetime.fromisoformat(open_at)
+        except ValueError:
+            moment = datetime.datetime.combine(now.date(), datetime.time.fromisoformat(open_at))
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(zone)
+        return minute_of_week(moment)
+
+    def is_open(self, shop_id, minute):
+        """True if the shop is open at ``minute`` of the week; shops without timings are not."""
+        self.ensure_loaded()
+        return self.index.is_open(shop_id, minute)
+
+    def open_filter(self, minute):
+        """``batch_filter`` keeping result rows whose ``shop_id`` is open at ``minute``."""
+        self.ensure_loaded()
+        index = self.index
+        return lambda rows: [row for row in rows if index.is_open(row.shop_id, minute)]
+
+    def apply_timing_changes(self, changes):
+        if not self.loaded:
+            return
+        touched = set()
+        for change in changes:
+            values = change.values
+            timing_id = values['timing_id']
+            # A timing moved to another shop leaves its old one
+            previous = self._shop_of.pop(timing_id, None)
+            if previous is not None:
+                self._timings[previous].pop(timing_id, None)
+                touched.add(previous)
+            if change.op != 'delete':
+                self._timings[values['shop_id']][timing_id] = (
+                    values['day'], values['open_time'], values['close_time']
+                )
+                self._shop_of[timing_id] = values['shop_id']
+                touched.add(values['shop_id'])
+        for shop_id in touched:
+            timings = self._timings.get(shop_id)
+            if timings:
+                self.index.set(shop_id, weekly_intervals(timings.values()))
+            else:
+                self._timings.pop(shop_id, None)
+                self.index.remove(shop_id)
+
+    def apply_shop_changes(self, changes):
+        if not self.loaded:
+            return
+        for change in changes:
+            if change.op == 'delete':
+                for timing_id in self._timings.pop(change.values['shop_id'], {}):
+                    self._shop_of.pop(timing_id, None)
+                self.index.remove(change.values['shop_id'])
+
+shop_hours = ShopHours()
+
+model_events.subscribe(ShopTiming, shop_hours.apply_timing_changes)
+model_events.subscribe(Shop, shop_hours.apply_shop_changes)
@@ -0,0 +1,73 @@
+from models import db, Shop, ShopAddress
+from utils.geo_index import GeoIndex
+from services import model_events
+from services.lazy_snapshot import LazySnapshot
+
+class ShopLocator(LazySnapshot):
+    """
+    Spatial index of shop addresses, loaded lazily from ``Shop_Address`` and
+    kept in sync with committed address changes. Index keys are address ids.
+    """
+
+    REFRESH_SETTING = 'GEO_INDEX_REFRESH_SECONDS'
+    REFRESH_DEFAULT = 300
+
+    def __init__(self, cell_size=0.05):
+        super().__init__()
+        self.index = GeoIndex(cell_size)
+        self._shop_of = {}
+
+    def _load(self):
+        rows = db.session.query(
+            ShopAddress.address_id,
+            ShopAddress.shop_id,
+            ShopAddress.latitude,
+            ShopAddress.longitude
+        ).filter(
+            ShopAddress.latitude.isnot(None),
+            ShopAddress.longitude.isnot(None)
+        ).all()
+
+        self._shop_of = {row.address_id: row.shop_id for row in rows}
+        self.index.rebuild((row.address_id, row.latitude, row.longitude) for row in rows)
+
+    def within(self, lat, lng, radius_km, limit=None):
+        """Return ``(address_id, shop_id, distance_km)`` nearest first."""
+        self.ensure_loaded()
+        return self._with_shops(self.index.within(lat, lng, radius_km, limit))
+
+    def nearest(self, lat, lng, k, max_distance=None):
+        """Return the ``k`` nearest ``(address_id, shop_id, distance_km)``."""
+        self.ensure_loaded()
+        return self._with_shops(self.index.nearest(lat, lng, k, max_distance))
+
+    def _with_shops(self, matches):
+        shop_of = self._shop_of
+        return [(address_id, shop_of.get(address_id), distance) for address_id, distance in matches]
+
+    def apply_address_changes(self, changes):
+        if not self.loaded:
+            return
+        for change in changes:
+            values = change.values
+            address_id = values['address_id']
+            if change.op == 'delete' or values['latitude'] is None or values['longitude'] is None:
+                self.index.remove(address_id)
+                self._shop_of.pop(address_id, None)
+            else:
+                self._shop_of[address_id] = values['shop_id']
+                self.index.insert(address_id, values['latitude'], values['longitude'])
+
+    def apply_shop_changes(self, changes):
+        deleted = {change.values['shop_id'] for change in changes if change.op == 'delete'}
+        if not deleted or not self.loaded:
+            return
+        for address_id, shop_id in list(self._shop_of.items()):
+            if shop_id in deleted:
+                self.index.remove(address_id)
+                self._shop_of.pop(address_id, None)
+
+shop_locator = ShopLocator()
+
+model_events.subscribe(ShopAddress, shop_locator.apply_address_changes)
+model_events.subscribe(Shop, shop_locator.apply_shop_changes)
@@ -0,0 +1,125 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from utils.geo_index import GeoIndex
+from utils.helpers import haversine_distances
+
+
+def brute_force(points, lat, lon):
+    """``(key, distance_km)`` of every point, nearest first."""
+    keys = list(points)
+    coords = np.array([points[key] for key in keys]).reshape(-1, 2)
+    distances = haversine_distances(lat, lon, coords[:, 0], coords[:, 1])
+    return sorted(zip(keys, distances.tolist()), key=lambda match: (match[1], match[0]))
+
+
+def assert_same_matches(found, expected):
+    assert [key for key, _ in found] == [key for key, _ in expected]
+    assert [distance for _, distance in found] == pytest.approx([distance for _, distance in expected])
+
+
+def random_points(rnd, count, lat=19.0, lon=72.8, spread=1.0):
+    return {
+        key: (lat + rnd.uniform(-spread, spread), lon + rnd.uniform(-spread, spread))
+        for key in range(count)
+    }
+
+
+@pytest.fixture
+def rnd():
+    return random.Random(7)
+
+
+def test_empty_index():
+    index = GeoIndex()
+    assert len(index) == 0
+    assert index.within(19.0, 72.8, 50) == []
+    assert index.nearest(19.0, 72.8, 5) == []
+
+
+@pytest.mark.parametrize('radius', [0.5, 5, 25, 150])
+def test_within_matches_brute_force(rnd, radius):
+    points = random_points(rnd, 2000)
+    index = GeoIndex(cell_size=0.05)
+    index.rebuild((key, lat, lon) for key, (lat, lon) in points.items())
+    for _ in range(20):
+        lat, lon = 19.0 + rnd.uniform(-1, 1), 72.8 + rnd.uniform(-1, 1)
+        expected = [match for match in brute_force(points, lat, lon) if match[1] <= radius]
+        assert_same_matches(index.within(lat, lon, radius), expected)
+        assert_same_matches(index.within(lat, lon, radius, limit=3), expected[:3])
+
+
+@pytest.mark.parametrize('k', [1, 10, 2500])
+def test_nearest_matches_brute_force(rnd, k):
+    points = random_points(rnd, 2000)
+    index = GeoIndex(cell_size=0.05)
+    index.rebuild((key, lat, lon) for key, (lat, lon) in points.items())
+    for _ in range(20):
+        # Origins inside and well outside the populated area
+        lat, lon = 19.0 + rnd.uniform(-3, 3), 72.8 + rnd.uniform(-3, 3)
+        expected = brute_force(points, lat, lon)
+        assert_same_matches(index.nearest(lat, lon, k), expected[:k])
+        cutoff = expected[min(k, len(expected)) - 1][1] / 2
+        assert_same_matches(index.nearest(lat, lon, k, max_distance=cutoff),
+                            [match for match in expected[:k] if match[1] <= cutoff])
+
+
+def test_nearest_with_no_positive_k():
+    index = GeoIndex()
+    index.insert('a', 19.0, 72.8)
+    assert index.nearest(19.0, 72.8, 0) == []
+
+
+def test_across_the_antimeridian():
+    index = GeoIndex(cell_size=0.5)
+    index.insert('east', 0.0, 179.9)
+    index.insert('west', 0.0, -179.9)
+    index.insert('far', 0.0, 170.0)
+    assert [key for key, _ in index.within(0.0, 179.95, 50)] == ['east', 'west']
+    assert [key for key, _ in index.nearest(0.0, -179.95, 2)] == ['west', 'east']
+
+
+def test_near_the_pole(rnd):
+    points = {key: (89.0 + rnd.uniform(0, 0.99), rnd.uniform(-180, 180)) for key in range(300)}
+    index = GeoIndex(cell_size=0.5)
+    index.rebuild((key, lat, lon) for key, (lat, lon) in points.items())
+    expected = brute_force(points, 89.9, 10.0)
+    assert_same_matches(index.within(89.9, 10.0, 60), [match for match in expected if match[1] <= 60])
+    assert_same_matches(index.nearest(89.9, 10.0, 15), expected[:15])
+
+
+def test_insert_moves_remove_and_reinsert(rnd):
+    points = random_points(rnd, 500)
+    index = GeoIndex(cell_size=0.05)
+    for key, (lat, lon) in points.items():
+        index.insert(key, lat, lon)
+    for key in range(0, 500, 3):
+        index.remove(key)
+        del points[key]
+    for key in range(1, 500, 3):
+        # Re-inserting an indexed key moves it
+        points[key] = (19.0 + rnd.uniform(-1, 1), 72.8 + rnd.uniform(-1, 1))
+        index.insert(key, *points[key])
+    for key in range(0, 60, 3):
+        points[key] = (19.0 + rnd.uniform(-1, 1), 72.8 + rnd.uniform(-1, 1))
+        index.insert(key, *points[key])
+    index.remove('never indexed')
+
+    assert len(index) == len(points)
+    for _ in range(10):
+        lat, lon = 19.0 + rnd.uniform(-1, 1), 72.8 + rnd.uniform(-1, 1)
+        expected = brute_force(points, lat, lon)
+        assert_same_matches(index.within(lat, lon, 20), [match for match in expected if match[1] <= 20])
+        assert_same_matches(index.nearest(lat, lon, 7), expected[:7])
+
+
+def test_rebuild_replaces_contents():
+    index = GeoIndex()
+    index.insert('old', 19.0, 72.8)
+    index.rebuild([('new', 19.0, 72.8)])
+    assert 'old' not in index and 'new' in index
+    assert index.nearest(19.0, 72.8, 5) == [('new', pytest.approx(0.0))]
+    assert math.isclose(index.within(19.0, 72.8, 1)[0][1], 0.0, abs_tol=1e-9)
@@ -0,0 +1,161 @@
+import base64
+import random
+
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from utils.pagination import decode_cursor, encode_cursor, fetch_page, fetch_ranked_page
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = 'items'
+    item_id = Column(Integer, primary_key=True)
+    group_id = Column(Integer, nullable=False)
+    name = Column(String(20))
+
+
+def item_key(row):
+    return (row.group_id, row.item_id)
+
+
+def keep_even(batch):
+    return [row for row in batch if row.item_id % 2 == 0]
+
+
+@pytest.fixture(scope='module')
+def session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    rnd = random.Random(3)
+    with Session(engine) as session:
+        # Few groups, so the ordering key needs its tiebreak column
+        session.add_all(Item(item_id=item_id, group_id=rnd.randint(1, 8), name=f'item {item_id}')
+                        for item_id in range(1, 238))
+        session.commit()
+        yield session
+
+
+def all_pages(fetch):
+    """Rows of every page, following ``next_cursor`` until ``has_next`` is False."""
+    rows, after = [], None
+    while True:
+        page, has_next, next_cursor = fetch(after)
+        rows.extend(page)
+        if not has_next:
+            assert next_cursor is None
+            return rows
+        after = decode_cursor(next_cursor, 2)
+
+
+@pytest.mark.parametrize('values', [[1, 2], ['b', 17], [None, 'x'], [3.5, 'naïve, "quoted"']])
+def test_cursor_round_trip(values):
+    cursor = encode_cursor(values)
+    assert '=' not in cursor and '/' not in cursor and '+' not in cursor
+    assert decode_cursor(cursor, len(values)) == values
+
+
+@pytest.mark.parametrize('cursor', [
+    '', 'not a cursor', '%%%', 'é', encode_cursor([1, 2])[:-3], encode_cursor([1, 2]) + 'AAAA'
+])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 2)
+
+
+def test_cursor_of_another_shape_is_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor([1, 2, 3]), 2)
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor([]), 2)
+    # Valid base64 JSON that isn't a list
+    forged = base64.urlsafe_b64encode(b'{"0": 1, "1": 2}').decode('ascii').rstrip('=')
+    with pytest.raises(ValueError):
+        decode_cursor(forged, 2)
+
+
+@pytest.mark.parametrize('values', [['x', 1], [1.5, 1], [True, 1], [None, 1], [[1], 1]])
+def test_cursor_with_edited_values_is_rejected(values):
+    cursor = encode_cursor(values)
+    assert decode_cursor(cursor, 2) == values
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 2, (int, int))
+
+
+@pytest.mark.parametrize('descending', [False, True])
+@pytest.mark.parametrize('batch_filter', [None, keep_even])
+@pytest.mark.parametrize('per_page', [1, 7, 50, 500])
+def test_fetch_page_matches_brute_force(session, descending, batch_filter, per_page):
+    everything = session.query(Item).all()
+    expected = sorted(everything, key=item_key, reverse=descending)
+    if batch_filter is not None:
+        expected = batch_filter(expected)
+    query = session.query(Item)
+    order = (Item.group_id, Item.item_id)
+
+    def fetch(after=None, page=1):
+        return fetch_page(query, order, item_key, per_page, page=page, after=after,
+                          batch_filter=batch_filter, descending=descending)
+
+    assert all_pages(fetch) == expected
+
+    # Page numbers give the same slices as cursors
+    for page in range(1, len(expected) // per_page + 3):
+        rows, has_next, _ = fetch(page=page)
+        assert rows == expected[(page - 1) * per_page:page * per_page]
+        assert has_next == (len(expected) > page * per_page)
+
+
+def test_fetch_page_of_empty_result(session):
+    query = session.query(Item).filter(Item.item_id < 0)
+    assert fetch_page(query, (Item.item_id,), lambda row: (row.item_id,), 10) == ([], False, None)
+    assert fetch_page(query, (Item.item_id,), lambda row: (row.item_id,), 10, batch_filter=keep_even) == ([], False, None)
+
+
+@pytest.mark.parametrize('batch_filter', [None, keep_even])
+@pytest.mark.parametrize('per_page', [1, 9, 100])
+@pytest.mark.parametrize('chunk_size', [1, 4, 200])
+def test_fetch_ranked_page_matches_brute_force(session, batch_filter, per_page, chunk_size):
+    rnd = random.Random(per_page * 31 + chunk_size)
+    # Ranked group ids include ones without rows
+    ranked_ids = rnd.sample(range(0, 12), 12)
+    everything = session.query(Item).all()
+    rank_of = {group_id: rank for rank, group_id in enumerate(ranked_ids)}
+    expected = sorted(everything, key=lambda row: (rank_of[row.group_id], row.item_id))
+    if batch_filter is not None:
+        expected = batch_filter(expected)
+    query = session.query(Item)
+
+    def fetch(after=None, page=1):
+        return fetch_ranked_page(
+            query, Item.group_id, ranked_ids,
+            row_id=lambda row: row.group_id,
+            tiebreak=lambda row: row.item_id,
+            per_page=per_page, page=page, after=after,
+            batch_filter=batch_filter, chunk_size=chunk_size
+        )
+
+    assert all_pages(fetch) == expected
+    for page in (1, 2, len(expected) // per_page + 1, len(expected) // per_page + 2):
+        rows, has_next, _ = fetch(page=page)
+        assert rows == expected[(page - 1) * per_page:page * per_page]
+        assert has_next == (len(expected) > page * per_page)
+
+
+def test_fetch_ranked_page_without_ranked_ids(session):
+    rows = fetch_ranked_page(session.query(Item), Item.group_id, [], row_id=lambda row: row.group_id,
+                             tiebreak=lambda row: row.item_id, per_page=10)
+    assert rows == ([], False, None)
+
+
+def test_fetch_ranked_page_with_edited_rank(session):
+    ranked_ids = list(range(12))
+
+    def fetch(after=None):
+        return fetch_ranked_page(session.query(Item), Item.group_id, ranked_ids, row_id=lambda row: row.group_id,
+                                 tiebreak=lambda row: row.item_id, per_page=5, after=after)
+
+    assert fetch([-3, 0]) == fetch()
+    assert fetch([len(ranked_ids) + 5, 0]) == ([], False, None)
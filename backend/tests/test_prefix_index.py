@@ -0,0 +1,189 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from models import db, Product, ProductCategory, SearchHistory
+from services.product_suggest import product_suggest
+from utils.prefix_index import PrefixIndex
+
+SYLLABLES = ['ap', 'ple', 'pho', 'ne', 'pro', 'max', 'a', 'b', 'ring', 'go', 'ld', ' ']
+
+
+def random_keys(rnd):
+    return [''.join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(1, 4))).strip() for _ in range(rnd.randint(0, 3))]
+
+
+def brute_force_top(entries, prefix, limit):
+    """Ids of the ``limit`` best entries with a key starting with ``prefix``."""
+    if not prefix:
+        return []
+    matching = sorted((order, entry_id) for entry_id, (keys, order) in entries.items()
+                      if any(key.startswith(prefix) for key in keys))
+    return [entry_id for _, entry_id in matching[:limit]]
+
+
+def prefixes_of(entries, rnd, count=150):
+    keys = [key for entry_keys, _ in entries.values() for key in entry_keys if key]
+    prefixes = {'a', 'ap', 'p', 'zz', ' ', 'ring'}
+    for _ in range(count):
+        if keys:
+            key = rnd.choice(keys)
+            prefixes.add(key[:rnd.randint(1, len(key))])
+    return sorted(prefixes)
+
+
+def assert_matches_brute_force(index, entries, rnd, k):
+    for prefix in prefixes_of(entries, rnd):
+        for limit in (1, 3, k):
+            assert index.top(prefix, limit) == brute_force_top(entries, prefix, limit), prefix
+
+
+def test_empty_index_and_prefix():
+    index = PrefixIndex(k=5)
+    assert index.top('a') == []
+    index.load([(1, ['apple'], (0,))])
+    assert index.top('') == []
+    assert index.top('b') == []
+    assert index.top('ap') == [1]
+
+
+@pytest.mark.parametrize('scan_limit', [1, 4, 256])
+def test_load_matches_brute_force(scan_limit):
+    rnd = random.Random(scan_limit)
+    entries = {entry_id: (random_keys(rnd), (rnd.randint(0, 20), entry_id % 3)) for entry_id in range(400)}
+    index = PrefixIndex(k=6, scan_limit=scan_limit)
+    index.load((entry_id, keys, order) for entry_id, (keys, order) in entries.items())
+    entries = {entry_id: entry for entry_id, entry in entries.items() if any(entry[0])}
+    assert len(index) == len(entries)
+    assert_matches_brute_force(index, entries, rnd, 6)
+
+
+@pytest.mark.parametrize('scan_limit', [1, 4, 32])
+def test_add_remove_and_re_add_match_brute_force(scan_limit):
+    rnd = random.Random(100 + scan_limit)
+    entries = {entry_id: (random_keys(rnd), (rnd.randint(0, 20),)) for entry_id in range(200)}
+    index = PrefixIndex(k=5, scan_limit=scan_limit)
+    index.load((entry_id, keys, order) for entry_id, (keys, order) in entries.items())
+    entries = {entry_id: entry for entry_id, entry in entries.items() if any(entry[0])}
+
+    for step in range(600):
+        entry_id = rnd.randrange(260)
+        if rnd.random() < 0.35:
+            index.remove(entry_id)
+            entries.pop(entry_id, None)
+        else:
+            # New entries, re-added ones and new keys or orders for existing ones
+            keys, order = random_keys(rnd), (rnd.randint(0, 20),)
+            index.add(entry_id, keys, order)
+            if any(keys):
+                entries[entry_id] = (keys, order)
+            else:
+                entries.pop(entry_id, None)
+        if step % 50 == 0:
+            # Lookups in between fill the wide-prefix caches that later changes must keep current
+            assert_matches_brute_force(index, entries, rnd, 5)
+    assert len(index) == len(entries)
+    assert all((entry_id in index) == (entry_id in entries) for entry_id in range(260))
+    assert_matches_brute_force(index, entries, rnd, 5)
+
+
+def test_limit_is_capped_at_k():
+    index = PrefixIndex(k=3, scan_limit=1)
+    index.load((entry_id, ['same'], (entry_id,)) for entry_id in range(10))
+    assert index.top('s', 10) == [0, 1, 2]
+    assert index.top('s') == [0, 1, 2]
+    index.remove(1)
+    assert index.top('sa', 2) == [0, 2]
+
+
+def test_an_entry_counts_once_per_prefix():
+    index = PrefixIndex(k=5, scan_limit=1)
+    index.load([(1, ['apple pie', 'apple', 'pie'], (0,)), (2, ['apricot'], (1,))])
+    assert index.top('ap') == [1, 2]
+    assert index.top('p') == [1]
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI='sqlite://',
+        SUGGEST_MAX_RESULTS=20,
+        SUGGEST_HISTORY_DAYS=30,
+        SUGGEST_REFRESH_SECONDS=0
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        product_suggest.invalidate()
+
+
+def test_suggestions_follow_committed_product_changes(app):
+    rnd = random.Random(4)
+    categories = [ProductCategory(category_name=name) for name in ('Phones', 'Jewelry', 'Laptops')]
+    db.session.add_all(categories)
+    db.session.commit()
+    words = ['Phone', 'Pro', 'Ring', 'Gold', 'Laptop', 'Max', 'Air']
+    brands = ['Apple', 'Samsung', 'Tanishq']
+
+    def random_product(product=None):
+        product = product or Product()
+        product.product_name = f'{rnd.choice(words)} {rnd.choice(words)} {rnd.randint(1, 5)}'
+        product.brand = rnd.choice(brands)
+        product.category_id = rnd.choice([category.category_id for category in categories] + [None])
+        return product
+
+    db.session.add_all(random_product() for _ in range(40))
+    db.session.add_all(SearchHistory(search_item=rnd.choice(['ring', 'gold ring', 'phone pro', 'apple']),
+                                     timestamp=datetime.utcnow() - timedelta(days=rnd.randint(0, 40)))
+                       for _ in range(50))
+    db.session.commit()
+
+    queries = ['p', 'ph', 'pro', 'r', 'ring ', 'gold r', 'sam', 'a', 'l', 'jew', 'x']
+    product_suggest.reload()
+    for _ in range(40):
+        products = Product.query.all()
+        action = rnd.random()
+        if action < 0.4:
+            db.session.add(random_product())
+        elif action < 0.8:
+            random_product(rnd.choice(products))
+        else:
+            db.session.delete(rnd.choice(products))
+        db.session.commit()
+
+    incremental = {query: product_suggest.suggest(query, 20) for query in queries}
+    product_suggest.reload()
+    assert incremental == {query: product_suggest.suggest(query, 20) for query in queries}
+    assert any(incremental.values())
+
+
+def test_suggestions_ranked_by_recent_searches(app):
+    jewelry = ProductCategory(category_name='Jewelry')
+    db.session.add(jewelry)
+    db.session.flush()
+    db.session.add_all([
+        Product(product_name='Ringer Phone 2', brand='Nokia', category_id=jewelry.category_id),
+        Product(product_name='Ring Gold 1', brand='Tanishq', category_id=jewelry.category_id),
+        Product(product_name='Ring Silver 3', brand='Tanishq', category_id=None)
+    ])
+    now = datetime.utcnow()
+    db.session.add_all([SearchHistory(search_item='Gold  ring', timestamp=now) for _ in range(3)])
+    # Outside the SUGGEST_HISTORY_DAYS window
+    db.session.add_all([SearchHistory(search_item='phone', timestamp=now - timedelta(days=40)) for _ in range(9)])
+    db.session.commit()
+    product_suggest.reload()
+
+    assert product_suggest.suggest('RIN', 5) == [
+        {'text': 'Ring Gold 1', 'type': 'product'},
+        {'text': 'Ringer Phone 2', 'type': 'product'}
+    ]
+    # A trailing space completes the words after 'ring', not longer words
+    assert product_suggest.suggest('ring ', 5) == [{'text': 'Ring Gold 1', 'type': 'product'}]
+    assert product_suggest.suggest('go', 5) == [{'text': 'Ring Gold 1', 'type': 'product'}]
+    assert product_suggest.suggest('t', 5) == [{'text': 'Tanishq', 'type': 'brand'}]
+    assert product_suggest.suggest('', 5) == [] and product_suggest.suggest('zz', 5) == []
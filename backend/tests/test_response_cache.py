@@ -0,0 +1,46 @@
+from services.response_cache import ResponseCache
+from utils.cache import LRUCache, LocalSharedCache, TieredCache
+
+
+def make_cache():
+    cache = ResponseCache()
+    cache.cache = TieredCache(LRUCache(ttl=None), LocalSharedCache(ttl=None))
+    return cache
+
+
+def counting_loader(calls, value):
+    def loader():
+        calls.append(value)
+        return value
+    return loader
+
+
+def test_invalidation_drops_the_versioned_entry_in_both_tiers():
+    cache = make_cache()
+    calls = []
+    assert cache.product(1, counting_loader(calls, 'a'), 'v1') == 'a'
+    assert cache.product(1, counting_loader(calls, 'b'), 'v1') == 'a'
+    assert calls == ['a']
+
+    cache.invalidate_product(1)
+    assert cache.cache.local.get('product:1@v1') is None
+    assert cache.cache.shared.get('product:1@v1') is None
+    assert cache.product(1, counting_loader(calls, 'c'), 'v1') == 'c'
+
+
+def test_invalidation_without_versions():
+    cache = make_cache()
+    calls = []
+    cache.shop(3, counting_loader(calls, 'a'))
+    cache.invalidate_shop(3)
+    assert cache.shop(3, counting_loader(calls, 'b')) == 'b'
+    assert calls == ['a', 'b']
+
+
+def test_invalidating_one_entity_keeps_the_others():
+    cache = make_cache()
+    calls = []
+    cache.product(1, counting_loader(calls, 'p1'), 'v1')
+    cache.product(2, counting_loader(calls, 'p2'), 'v7')
+    cache.invalidate_product(1)
+    assert cache.product(2, counting_loader(calls, 'new'), 'v7') == 'p2'
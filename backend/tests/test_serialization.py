@@ -0,0 +1,117 @@
+from collections import namedtuple
+from datetime import date, datetime, time
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+from utils.serialization import FLOAT, HH_MM, ISO, RowSerializer, wants_columns
+
+FIELDS = (
+    'shop_id',
+    ('name', 'shop_name'),
+    ('price', 'price', FLOAT),
+    ('created_at', 'created_at', ISO),
+    ('opens', 'open_time', HH_MM),
+    ('label', 'shop_name', str.upper),
+    ("it's", 'shop_id')
+)
+
+ShopRow = namedtuple('ShopRow', ['shop_id', 'shop_name', 'price', 'created_at', 'open_time'])
+# Same columns, another order: a different row shape
+ReorderedRow = namedtuple('ReorderedRow', ['open_time', 'price', 'created_at', 'shop_name', 'shop_id', 'extra'])
+
+
+class ShopObject:
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+
+def reference(row):
+    """The dict ``FIELDS`` describe, built field by field."""
+    def convert(value, conversion):
+        return None if value is None else conversion(value)
+    return {
+        'shop_id': row.shop_id,
+        'name': row.shop_name,
+        'price': convert(row.price, float),
+        'created_at': convert(row.created_at, lambda value: value.isoformat()),
+        'opens': convert(row.open_time, lambda value: value.strftime('%H:%M')),
+        'label': convert(row.shop_name, str.upper),
+        "it's": row.shop_id
+    }
+
+
+ROWS = [
+    ShopRow(1, 'Corner store', Decimal('19.99'), datetime(2024, 5, 1, 9, 30, 15), time(9, 5)),
+    ShopRow(2, None, None, None, None),
+    ShopRow(3, 'Late night', Decimal('0'), date(2024, 1, 2), time(23, 59))
+]
+
+
+def test_dicts_and_lists_match_the_reference():
+    serializer = RowSerializer(*FIELDS)
+    expected = [reference(row) for row in ROWS]
+    assert serializer.dicts(ROWS) == expected
+    assert serializer.lists(ROWS) == [list(item.values()) for item in expected]
+    assert [serializer.to_dict(row) for row in ROWS] == expected
+    assert serializer.columns == [name for name in expected[0]]
+
+
+def test_row_shapes_are_compiled_separately():
+    serializer = RowSerializer(*FIELDS)
+    objects = [ShopObject(**row._asdict()) for row in ROWS]
+    reordered = [ReorderedRow(row.open_time, row.price, row.created_at, row.shop_name, row.shop_id, 'x') for row in ROWS]
+    expected = [reference(row) for row in ROWS]
+    assert serializer.dicts(ROWS) == expected
+    assert serializer.dicts(objects) == expected
+    assert serializer.dicts(reordered) == expected
+    assert serializer.dicts(ROWS) == expected
+
+
+def test_sqlalchemy_result_rows():
+    engine = create_engine('sqlite://')
+    with engine.connect() as connection:
+        rows = connection.execute(text(
+            "SELECT 7 AS shop_id, 'Kiosk' AS shop_name, 2.5 AS price, NULL AS created_at, NULL AS open_time"
+        )).all()
+    assert RowSerializer(*FIELDS).dicts(rows) == [{
+        'shop_id': 7, 'name': 'Kiosk', 'price': 2.5, 'created_at': None, 'opens': None, 'label': 'KIOSK', "it's": 7
+    }]
+
+
+def test_missing_column():
+    serializer = RowSerializer('shop_id', 'city')
+    with pytest.raises(KeyError, match='city'):
+        serializer.dicts(ROWS)
+
+
+def test_extra_values_and_payloads():
+    serializer = RowSerializer('shop_id', ('price', 'price', FLOAT))
+    rows = ROWS[:2]
+    assert serializer.dicts(rows, distance=[1.5, 2.5]) == [
+        {'shop_id': 1, 'price': 19.99, 'distance': 1.5},
+        {'shop_id': 2, 'price': None, 'distance': 2.5}
+    ]
+    assert serializer.payload(rows, 'shops', distance=[1.5, 2.5]) == {
+        'shops': serializer.dicts(rows, distance=[1.5, 2.5])
+    }
+    assert serializer.payload(rows, 'shops', columnar=True, distance=[1.5, 2.5]) == {
+        'columns': ['shop_id', 'price', 'distance'],
+        'rows': [[1, 19.99, 1.5], [2, None, 2.5]]
+    }
+
+
+def test_empty_rows():
+    serializer = RowSerializer(*FIELDS)
+    assert serializer.dicts([]) == [] and serializer.lists([]) == []
+    assert serializer.payload([], 'shops', columnar=True) == {'columns': serializer.columns, 'rows': []}
+
+
+@pytest.mark.parametrize('query_string, expected', [
+    ('', False), ('shape=columns', True), ('shape=COLUMNS', True), ('shape=rows', False)
+])
+def test_wants_columns(query_string, expected):
+    with Flask(__name__).test_request_context(f'/?{query_string}'):
+        assert wants_columns() is expected
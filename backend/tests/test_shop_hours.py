@@ -0,0 +1,162 @@
+import datetime
+import random
+
+import pytest
+from flask import Flask
+
+from models import db, Shop, ShopOwner, ShopTiming
+from services.shop_hours import shop_hours
+from utils.timing_index import (
+    MINUTES_PER_DAY, MINUTES_PER_WEEK, TimingIndex, day_index, minute_of_week, weekly_intervals
+)
+
+DAY_NAMES = ['Monday', 'tue', 'Wed', 'THURSDAY', 'fri', 'Saturday', 'sun']
+
+
+def open_by_rows(rows, minute):
+    """Whether any ``(day, open, close)`` row covers ``minute``, checked row by row."""
+    for day, open_time, close_time in rows:
+        index = day_index(day)
+        if index is None or open_time is None or close_time is None:
+            continue
+        start = open_time.hour * 60 + open_time.minute
+        end = close_time.hour * 60 + close_time.minute
+        if end == MINUTES_PER_DAY - 1:
+            end = MINUTES_PER_DAY
+        length = end - start if end > start else end - start + MINUTES_PER_DAY
+        if (minute - index * MINUTES_PER_DAY - start) % MINUTES_PER_WEEK < length:
+            return True
+    return False
+
+
+def random_time(rnd):
+    return datetime.time(rnd.randrange(24), rnd.choice([0, 15, 30, 45, 59]))
+
+
+def random_rows(rnd):
+    rows = []
+    for _ in range(rnd.randint(0, 9)):
+        open_time = random_time(rnd)
+        close_time = rnd.choice([random_time(rnd), open_time, datetime.time(23, 59), datetime.time(0, 0)])
+        rows.append((rnd.choice(DAY_NAMES + ['Funday', '', None]), open_time, rnd.choice([close_time, close_time, None])))
+    return rows
+
+
+def test_day_index():
+    assert [day_index(name) for name in DAY_NAMES] == list(range(7))
+    assert day_index(' Thu ') == 3
+    assert day_index('mo') is None and day_index('') is None and day_index(None) is None
+    assert day_index('Funday') is None
+
+
+def test_minute_of_week():
+    # 2024-01-01 was a Monday
+    assert minute_of_week(datetime.datetime(2024, 1, 1, 0, 0)) == 0
+    assert minute_of_week(datetime.datetime(2024, 1, 3, 13, 45)) == 2 * MINUTES_PER_DAY + 13 * 60 + 45
+    assert minute_of_week(datetime.datetime(2024, 1, 7, 23, 59)) == MINUTES_PER_WEEK - 1
+
+
+def test_overnight_and_round_the_clock_hours():
+    late = weekly_intervals([('Friday', datetime.time(18, 0), datetime.time(2, 0))])
+    assert late == [(4 * MINUTES_PER_DAY + 18 * 60, 5 * MINUTES_PER_DAY + 2 * 60)]
+    # Sunday night runs into Monday morning
+    assert weekly_intervals([('Sunday', datetime.time(22, 0), datetime.time(3, 0))]) == [
+        (0, 3 * 60), (6 * MINUTES_PER_DAY + 22 * 60, MINUTES_PER_WEEK)
+    ]
+    assert weekly_intervals([('Mon', datetime.time(9, 0), datetime.time(9, 0))]) == [(9 * 60, MINUTES_PER_DAY + 9 * 60)]
+    assert weekly_intervals([('Mon', datetime.time(9, 0), datetime.time(23, 59))]) == [(9 * 60, MINUTES_PER_DAY)]
+
+
+def test_intervals_match_rows_at_every_minute():
+    rnd = random.Random(5)
+    index = TimingIndex()
+    shops = {shop_id: random_rows(rnd) for shop_id in range(40)}
+    index.rebuild({shop_id: weekly_intervals(rows) for shop_id, rows in shops.items()})
+    for shop_id, rows in shops.items():
+        intervals = index.intervals(shop_id)
+        # Sorted, disjoint and within the week
+        assert all(0 <= start < end <= MINUTES_PER_WEEK for start, end in intervals)
+        assert all(previous[1] < following[0] for previous, following in zip(intervals, intervals[1:]))
+        for minute in range(MINUTES_PER_WEEK):
+            assert index.is_open(shop_id, minute) == open_by_rows(rows, minute), (rows, minute)
+        # Minutes past the end of the week wrap around
+        assert index.is_open(shop_id, MINUTES_PER_WEEK + 30) == open_by_rows(rows, 30)
+
+
+def test_index_set_remove_and_unknown_keys():
+    index = TimingIndex()
+    assert not index.is_open('unknown', 0) and index.intervals('unknown') == []
+    index.set('shop', [(60, 120)])
+    assert index.is_open('shop', 60) and index.is_open('shop', 119) and not index.is_open('shop', 120)
+    index.set('shop', [])
+    assert 'shop' in index and not index.is_open('shop', 60)
+    index.remove('shop')
+    index.remove('shop')
+    assert 'shop' not in index and len(index) == 0
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI='sqlite://',
+        SHOP_TIMEZONE='Asia/Kolkata',
+        SHOP_HOURS_REFRESH_SECONDS=0
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        shop_hours.invalidate()
+
+
+def test_minute_at(app):
+    assert shop_hours.minute_at() is None
+    assert shop_hours.minute_at(open_at='2024-01-01T01:00') == 60
+    # Aware times are converted to the shops' zone (UTC+05:30)
+    assert shop_hours.minute_at(open_at='2024-01-01T00:00:00+00:00') == 5 * 60 + 30
+    assert shop_hours.minute_at(open_at='13:45') % MINUTES_PER_DAY == 13 * 60 + 45
+    assert 0 <= shop_hours.minute_at(open_now=True) < MINUTES_PER_WEEK
+    with pytest.raises(ValueError):
+        shop_hours.minute_at(open_at='tomorrow')
+
+
+def test_committed_changes_match_a_reload(app):
+    rnd = random.Random(9)
+    owner = ShopOwner(owner_name='Owner')
+    db.session.add(owner)
+    db.session.flush()
+    shops = [Shop(shop_name=f'Shop {i}', owner_id=owner.owner_id) for i in range(6)]
+    db.session.add_all(shops)
+    db.session.commit()
+    shop_ids = [shop.shop_id for shop in shops]
+    shop_hours.reload()
+
+    for _ in range(60):
+        timings = ShopTiming.query.all()
+        action = rnd.random()
+        if action < 0.5 or not timings:
+            open_time = random_time(rnd)
+            db.session.add(ShopTiming(shop_id=rnd.choice(shop_ids), day=rnd.choice(DAY_NAMES),
+                                      open_time=open_time, close_time=random_time(rnd)))
+        elif action < 0.7:
+            timing = rnd.choice(timings)
+            timing.close_time = random_time(rnd)
+            # Timings can move to another shop
+            timing.shop_id = rnd.choice(shop_ids)
+        else:
+            db.session.delete(rnd.choice(timings))
+        db.session.commit()
+
+    incremental = {shop_id: shop_hours.index.intervals(shop_id) for shop_id in shop_ids}
+    shop_hours.reload()
+    assert incremental == {shop_id: shop_hours.index.intervals(shop_id) for shop_id in shop_ids}
+    assert any(incremental.values())
+
+    # Deleting a shop drops its hours (its timings go by ON DELETE CASCADE)
+    shop_id = next(shop_id for shop_id, intervals in incremental.items() if intervals)
+    db.session.delete(db.session.get(Shop, shop_id))
+    db.session.commit()
+    assert shop_id not in shop_hours.index
+    assert not any(shop_hours.is_open(shop_id, minute) for minute in range(0, MINUTES_PER_WEEK, 30))
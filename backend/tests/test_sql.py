@@ -0,0 +1,16 @@
+import pytest
+
+from utils.sql import ID_BATCH_SIZE, batched
+
+
+@pytest.mark.parametrize('count', [0, 1, 999, 1000, 1001, 2500])
+def test_batched_keeps_order_and_size(count):
+    ids = list(range(count, 0, -1))
+    batches = list(batched(ids))
+    assert [item for batch in batches for item in batch] == ids
+    assert all(0 < len(batch) <= ID_BATCH_SIZE for batch in batches)
+    assert len(batches) == -(-count // ID_BATCH_SIZE)
+
+
+def test_batched_accepts_any_iterable():
+    assert list(batched((i for i in range(7)), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
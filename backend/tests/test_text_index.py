@@ -0,0 +1,169 @@
+import math
+import random
+
+import pytest
+
+from utils.text_index import InvertedIndex, tokenize
+
+WEIGHTS = {'name': 3.0, 'brand': 2.0, 'description': 1.0}
+VOCABULARY = ['phone', 'phones', 'photo', 'pho', 'laptop', 'lap', 'lapel', 'ring', 'rings', 'ringer',
+              'gold', 'golden', 'go', 'x', 'book', 'booklet', 'pro', 'max', 'probe', 'a1']
+
+
+def bm25_reference(docs, query, k1=1.2, b=0.75, min_prefix=2):
+    """Scores computed from scratch over ``docs`` (id -> fields), as ``InvertedIndex.search`` documents them."""
+    frequencies = {}
+    for doc_id, fields in docs.items():
+        tf = {}
+        for field, weight in WEIGHTS.items():
+            for token in tokenize(fields.get(field)):
+                tf[token] = tf.get(token, 0.0) + weight
+        frequencies[doc_id] = tf
+    tokens = list(dict.fromkeys(tokenize(query)))
+    if not tokens or not docs:
+        return []
+    doc_count = len(docs)
+    average_length = sum(sum(tf.values()) for tf in frequencies.values()) / doc_count or 1.0
+    df = {}
+    for tf in frequencies.values():
+        for term in tf:
+            df[term] = df.get(term, 0) + 1
+
+    results = []
+    for doc_id, tf in frequencies.items():
+        length = sum(tf.values())
+        total = 0.0
+        for token in tokens:
+            best = 0.0
+            for term, frequency in tf.items():
+                if term != token and (len(token) < min_prefix or not term.startswith(token)):
+                    continue
+                idf = math.log(1 + (doc_count - df[term] + 0.5) / (df[term] + 0.5))
+                if term != token:
+                    idf *= len(token) / len(term)
+                norm = k1 * (1 - b + b * length / average_length)
+                best = max(best, idf * frequency * (k1 + 1) / (frequency + norm))
+            if not best:
+                break
+            total += best
+        else:
+            results.append((doc_id, total))
+    return sorted(results, key=lambda item: (-item[1], item[0]))
+
+
+def assert_same_ranking(found, expected):
+    assert [doc_id for doc_id, _ in found] == [doc_id for doc_id, _ in expected]
+    assert [score for _, score in found] == pytest.approx([score for _, score in expected])
+
+
+def random_doc(rnd):
+    def words(count):
+        return ' '.join(rnd.choice(VOCABULARY) for _ in range(count))
+    return {
+        'name': words(rnd.randint(1, 4)).title(),
+        'brand': rnd.choice(['Apple', 'Samsung', 'Tanishq', None]),
+        'description': words(rnd.randint(0, 8)) + rnd.choice(['', '.', '!', ', ok'])
+    }
+
+
+def random_query(rnd):
+    words = [rnd.choice(VOCABULARY + ['unknown', 'p', 'la', 'gol', 'APPLE', 'sam']) for _ in range(rnd.randint(1, 3))]
+    return rnd.choice([' ', '-', ', ']).join(words)
+
+
+@pytest.fixture
+def rnd():
+    return random.Random(11)
+
+
+def test_tokenize():
+    assert tokenize('iPhone 15, Pro-Max!') == ['iphone', '15', 'pro', 'max']
+    assert tokenize(None) == []
+    assert tokenize('  ...  ') == []
+
+
+def test_empty_index_and_empty_query():
+    index = InvertedIndex(WEIGHTS)
+    assert index.search('phone') == []
+    index.add(1, {'name': 'Phone'})
+    assert index.search('') == []
+    assert index.search(' ,.- ') == []
+
+
+def test_search_matches_brute_force(rnd):
+    docs = {doc_id: random_doc(rnd) for doc_id in range(300)}
+    index = InvertedIndex(WEIGHTS)
+    for doc_id, fields in docs.items():
+        index.add(doc_id, fields)
+    for _ in range(200):
+        query = random_query(rnd)
+        assert_same_ranking(index.search(query), bm25_reference(docs, query))
+        assert_same_ranking(index.search(query, limit=5), bm25_reference(docs, query)[:5])
+
+
+def test_add_remove_and_re_add_match_a_fresh_index(rnd):
+    docs = {}
+    index = InvertedIndex(WEIGHTS)
+    for step in range(1500):
+        doc_id = rnd.randrange(100)
+        if rnd.random() < 0.3:
+            index.remove(doc_id)
+            docs.pop(doc_id, None)
+        else:
+            # Adding an indexed id replaces the document
+            docs[doc_id] = random_doc(rnd)
+            index.add(doc_id, docs[doc_id])
+    index.remove('never indexed')
+
+    fresh = InvertedIndex(WEIGHTS)
+    for doc_id, fields in docs.items():
+        fresh.add(doc_id, fields)
+    assert len(index) == len(docs)
+    for _ in range(100):
+        query = random_query(rnd)
+        assert_same_ranking(index.search(query), fresh.search(query))
+        assert_same_ranking(index.search(query), bm25_reference(docs, query))
+
+
+def test_terms_of_removed_documents_stop_matching():
+    index = InvertedIndex(WEIGHTS)
+    index.add(1, {'name': 'Golden ring'})
+    index.add(2, {'name': 'Gold chain'})
+    index.remove(1)
+    assert [doc_id for doc_id, _ in index.search('golde')] == []
+    assert [doc_id for doc_id, _ in index.search('gol')] == [2]
+    index.add(1, {'name': 'Golden ring'})
+    assert [doc_id for doc_id, _ in index.search('golde')] == [1]
+    index.clear()
+    assert len(index) == 0 and index.search('gold') == []
+
+
+def test_prefixes_shorter_than_min_prefix_match_exactly():
+    index = InvertedIndex(WEIGHTS, min_prefix=2)
+    index.add(1, {'name': 'X ray'})
+    index.add(2, {'name': 'Xbox'})
+    assert [doc_id for doc_id, _ in index.search('x')] == [1]
+    assert sorted(doc_id for doc_id, _ in index.search('xb')) == [2]
+
+
+def test_completed_word_outranks_longer_words():
+    index = InvertedIndex(WEIGHTS)
+    index.add('exact', {'name': 'Ring'})
+    index.add('longer', {'name': 'Ringer'})
+    assert [doc_id for doc_id, _ in index.search('ring')] == ['exact', 'longer']
+
+
+def test_field_weights():
+    index = InvertedIndex(WEIGHTS)
+    index.add('in name', {'name': 'Laptop', 'description': 'fast'})
+    index.add('in description', {'name': 'Sleeve', 'description': 'laptop'})
+    assert [doc_id for doc_id, _ in index.search('laptop')] == ['in name', 'in description']
+
+
+def test_prefix_expansions_are_capped():
+    index = InvertedIndex(WEIGHTS, max_expansions=2)
+    for doc_id, word in enumerate(['proa', 'prob', 'proc', 'prod']):
+        index.add(doc_id, {'name': word})
+    # Only the first two vocabulary terms with the prefix are considered
+    assert sorted(doc_id for doc_id, _ in index.search('pro')) == [0, 1]
+    assert [doc_id for doc_id, _ in index.search('prod')] == [3]
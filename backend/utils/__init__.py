@@ -1,18 +1,40 @@
 # Utils package initialization
 from .helpers import (
     calculate_distance,
+    bounding_box,
+    haversine_distances,
+    haversine_matrix,
+    rank_by_distance,
+    nearest_within,
     filter_shops_by_distance,
     format_shop_timings,
     validate_email,
     validate_phone,
     paginate_results
 )
+from .pagination import (
+    encode_cursor,
+    decode_cursor,
+    keyset_after,
+    fetch_page,
+    fetch_ranked_page
+)
 
 __all__ = [
     'calculate_distance',
+    'bounding_box',
+    'haversine_distances',
+    'haversine_matrix',
+    'rank_by_distance',
+    'nearest_within',
     'filter_shops_by_distance', 
     'format_shop_timings',
     'validate_email',
     'validate_phone',
-    'paginate_results'
+    'paginate_results',
+    'encode_cursor',
+    'decode_cursor',
+    'keyset_after',
+    'fetch_page',
+    'fetch_ranked_page'
 ]
@@ -0,0 +1,214 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+try:
+    import redis
+except ImportError:  # optional shared backend
+    redis = None
+
+MISSING = object()
+
+
+class CacheStats:
+    """Thread-safe hit/miss/eviction counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def record(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None
+            }
+
+
+class LRUCache:
+    """
+    Bounded in-process cache with least-recently-used eviction and a
+    per-entry time to live.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.stats.record('hits')
+                    return value
+                del self._entries[key]
+                self.stats.record('expirations')
+        self.stats.record('misses')
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self.stats.record('evictions', evicted)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class LocalSharedCache:
+    """
+    Stand-in for a shared cache server, for development and tests.
+
+    Values are stored JSON-encoded in a process-wide dict, so they behave like
+    entries read back from a remote store (every read returns a fresh copy).
+    """
+
+    _store: Dict[str, tuple] = {}
+    _store_lock = threading.Lock()
+
+    def __init__(self, ttl: Optional[float] = 300):
+        self.ttl = ttl
+        self.stats = CacheStats()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._store_lock:
+            entry = self._store.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.time():
+                del self._store[key]
+                entry = None
+                self.stats.record('expirations')
+        if entry is None:
+            self.stats.record('misses')
+            return default
+        self.stats.record('hits')
+        return json.loads(entry[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        with self._store_lock:
+            self._store[key] = (json.dumps(value), time.time() + ttl if ttl else None)
+
+    def delete(self, key: str) -> None:
+        with self._store_lock:
+            self._store.pop(key, None)
+
+    def clear(self) -> None:
+        with self._store_lock:
+            self._store.clear()
+
+
+class RedisCache:
+    """Shared cache backed by Redis; values are stored JSON-encoded."""
+
+    def __init__(self, url: str, ttl: Optional[float] = 300, prefix: str = 'nearbuy:'):
+        if redis is None:
+            raise RuntimeError('The redis package is required for the redis cache backend')
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.stats = CacheStats()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            self.stats.record('misses')
+            return default
+        self.stats.record('hits')
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, json.dumps(value), ex=int(ttl) if ttl else None)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+class TieredCache:
+    """
+    Read-through cache: an in-process LRU in front of an optional shared
+    backend. Lookups try the local tier, then the shared one (refilling the
+    local tier), then call the loader and populate both.
+    """
+
+    def __init__(self, local: LRUCache, shared=None):
+        self.local = local
+        self.shared = shared
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.local.get(key, MISSING)
+        if value is MISSING and self.shared is not None:
+            value = self.shared.get(key, MISSING)
+            if value is not MISSING:
+                self.local.set(key, value)
+        return default if value is MISSING else value
+
+    def set(self, key: str, value: Any) -> None:
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for ``key``, calling ``loader`` on a miss.
+        A loader result of None (e.g. not found) is returned but not cached."""
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def clear(self) -> None:
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {'local': dict(self.local.stats.as_dict(), size=len(self.local), maxsize=self.local.maxsize)}
+        if self.shared is not None:
+            stats['shared'] = dict(self.shared.stats.as_dict(), backend=type(self.shared).__name__)
+        return stats
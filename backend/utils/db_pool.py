@@ -0,0 +1,166 @@
+import bisect
+import threading
+import time
+from typing import Any, Dict, Mapping
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+# Upper bounds (milliseconds) of the checkout wait histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class PoolWaitStats:
+    """Thread-safe histogram of how long checkouts waited for a connection."""
+
+    def __init__(self, buckets_ms=WAIT_BUCKETS_MS):
+        self._lock = threading.Lock()
+        self.buckets_ms = tuple(buckets_ms)
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = [0] * (len(self.buckets_ms) + 1)
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_ms = 0.0
+            self.max_ms = 0.0
+
+    def record(self, wait_ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets_ms, wait_ms)] += 1
+            self.checkouts += 1
+            self.total_ms += wait_ms
+            self.max_ms = max(self.max_ms, wait_ms)
+            if timed_out:
+                self.timeouts += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            bounds = list(self.buckets_ms) + [None]  # None: above the last bound
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'mean_ms': round(self.total_ms / self.checkouts, 3) if self.checkouts else None,
+                'max_ms': round(self.max_ms, 3),
+                'histogram': [{'le_ms': bound, 'count': count} for bound, count in zip(bounds, self.counts)]
+            }
+
+
+# Shared by every InstrumentedQueuePool, so the numbers survive pool
+# recreation (engine.dispose()) and cover all of the app's engines
+pool_wait_stats = PoolWaitStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waited in ``_do_get``.
+
+    The wait covers queueing for a free connection and, when the pool is
+    below its overflow limit, opening a new one; checkouts that hit
+    ``pool_timeout`` are counted as timeouts.
+    """
+
+    _local = threading.local()
+
+    def _do_get(self):
+        # QueuePool._do_get retries by calling itself; time the outer call only
+        if getattr(self._local, 'timing', False):
+            return super()._do_get()
+        self._local.timing = True
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self._local.timing = False
+            pool_wait_stats.record((time.perf_counter() - start) * 1000, timed_out)
+
+
+def pool_status(pool) -> Dict[str, Any]:
+    """Live occupancy of ``pool`` (a QueuePool) plus the wait histogram."""
+    status = {'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': pool.overflow(),
+            'max_overflow': pool._max_overflow,
+            'timeout': pool.timeout()
+        })
+    status['wait'] = pool_wait_stats.as_dict()
+    return status
+
+
+def engine_options(config: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    ``SQLALCHEMY_ENGINE_OPTIONS`` built from the ``DB_*`` config values.
+
+    Args:
+        config: Flask app config (or any mapping with the same keys)
+
+    Returns:
+        dict: Keyword arguments for ``create_engine``
+    """
+    uri = config.get('SQLALCHEMY_DATABASE_URI') or ''
+    if uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') in ('sqlite:', 'sqlite')):
+        # In-memory SQLite needs its single shared connection
+        return {}
+
+    options = {
+        'pool_size': config.get('DB_POOL_SIZE', 10),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True)
+    }
+    if config.get('DB_POOL_INSTRUMENT', True):
+        options['poolclass'] = InstrumentedQueuePool
+    if uri.startswith('mssql+pyodbc'):
+        # One round trip per executemany batch instead of one per row
+        options['fast_executemany'] = config.get('DB_FAST_EXECUTEMANY', True)
+    return options
+
+
+# Sync driver -> asyncio driver of the same database, for the async engine
+ASYNC_DRIVERS = {
+    'mssql+pyodbc': 'mssql+aioodbc',
+    'mssql': 'mssql+aioodbc',
+    'sqlite+pysqlite': 'sqlite+aiosqlite',
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+    'postgresql': 'postgresql+asyncpg'
+}
+
+
+def async_database_uri(uri: str) -> str:
+    """
+    The asyncio-driver version of a ``SQLALCHEMY_DATABASE_URI``.
+
+    Raises:
+        ValueError: If no asyncio driver is known for the URI's dialect
+    """
+    scheme, sep, rest = uri.partition('://')
+    if not sep or scheme not in ASYNC_DRIVERS:
+        raise ValueError(f'No asyncio driver known for {scheme!r}; set ASYNC_DATABASE_URL')
+    return f'{ASYNC_DRIVERS[scheme]}://{rest}'
+
+
+def async_engine_options(config: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    ``create_async_engine`` options from the ``DB_*`` config values: the same
+    pool limits as the sync engine, on SQLAlchemy's asyncio queue pool.
+    """
+    uri = config.get('SQLALCHEMY_DATABASE_URI') or ''
+    if uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') in ('sqlite:', 'sqlite')):
+        return {}
+    return {
+        'pool_size': config.get('DB_POOL_SIZE', 10),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True)
+    }
@@ -0,0 +1,232 @@
+import math
+import threading
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .helpers import EARTH_RADIUS_KM, haversine_distances, nearest_within, rank_by_distance
+
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+
+
+class _Cell:
+    """Points of one grid cell, with packed coordinate arrays built on demand."""
+
+    __slots__ = ('points', '_packed')
+
+    def __init__(self):
+        self.points: Dict[Hashable, Tuple[float, float]] = {}
+        self._packed = None
+
+    def set(self, key: Hashable, point: Tuple[float, float]) -> None:
+        self.points[key] = point
+        self._packed = None
+
+    def discard(self, key: Hashable) -> None:
+        if self.points.pop(key, None) is not None:
+            self._packed = None
+
+    def packed(self):
+        if self._packed is None:
+            keys = list(self.points)
+            coords = np.array(list(self.points.values()), dtype=np.float64).reshape(-1, 2)
+            self._packed = (keys, coords[:, 0].copy(), coords[:, 1].copy())
+        return self._packed
+
+
+class GeoIndex:
+    """
+    In-memory spatial index over (latitude, longitude) points.
+
+    Points are bucketed into a uniform grid of ``cell_size`` degrees, so a
+    radius or k-nearest query only looks at the handful of cells around the
+    origin instead of every point. Each cell keeps packed coordinate arrays,
+    so candidate distances are computed in one vectorized Haversine pass.
+    """
+
+    def __init__(self, cell_size: float = 0.05):
+        self.cell_size = cell_size
+        self._lon_cells = int(math.ceil(360 / cell_size))
+        self._cells: Dict[Tuple[int, int], _Cell] = {}
+        self._points: Dict[Hashable, Tuple[float, float]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._points
+
+    def _cell_of(self, lat: float, lon: float) -> Tuple[int, int]:
+        row = int(math.floor(lat / self.cell_size))
+        col = int(math.floor((lon + 180) / self.cell_size)) % self._lon_cells
+        return row, col
+
+    def insert(self, key: Hashable, lat: float, lon: float) -> None:
+        """Add a point, or move it if the key is already indexed."""
+        point = (float(lat), float(lon))
+        with self._lock:
+            self._discard(key)
+            self._points[key] = point
+            cell = self._cell_of(*point)
+            if cell not in self._cells:
+                self._cells[cell] = _Cell()
+            self._cells[cell].set(key, point)
+
+    def remove(self, key: Hashable) -> None:
+        with self._lock:
+            self._discard(key)
+
+    def _discard(self, key: Hashable) -> None:
+        point = self._points.pop(key, None)
+        if point is None:
+            return
+        cell = self._cell_of(*point)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket.points:
+                del self._cells[cell]
+
+    def rebuild(self, points: Iterable[Tuple[Hashable, float, float]]) -> None:
+        """Replace the whole index with ``(key, lat, lon)`` points."""
+        cells: Dict[Tuple[int, int], _Cell] = {}
+        indexed: Dict[Hashable, Tuple[float, float]] = {}
+        for key, lat, lon in points:
+            point = (float(lat), float(lon))
+            indexed[key] = point
+            cell = self._cell_of(*point)
+            if cell not in cells:
+                cells[cell] = _Cell()
+            cells[cell].set(key, point)
+        with self._lock:
+            self._cells = cells
+            self._points = indexed
+
+    def _gather(self, cells: Iterable[Tuple[int, int]]):
+        keys: List[Hashable] = []
+        lats, lons = [], []
+        for cell in cells:
+            bucket = self._cells.get(cell)
+            if bucket is None:
+                continue
+            cell_keys, cell_lats, cell_lons = bucket.packed()
+            keys.extend(cell_keys)
+            lats.append(cell_lats)
+            lons.append(cell_lons)
+        if not keys:
+            empty = np.empty(0, dtype=np.float64)
+            return keys, empty, empty
+        return keys, np.concatenate(lats), np.concatenate(lons)
+
+    def _cells_in_box(self, lat: float, lon: float, radius_km: float) -> List[Tuple[int, int]]:
+        dlat = radius_km / KM_PER_DEGREE
+        min_row = int(math.floor((lat - dlat) / self.cell_size))
+        max_row = int(math.floor((lat + dlat) / self.cell_size))
+
+        # Longitude degrees shrink towards the poles; near them take every column
+        max_abs_lat = min(abs(lat) + dlat, 90)
+        cos_lat = math.cos(math.radians(max_abs_lat))
+        if cos_lat < 1e-6 or dlat / cos_lat >= 180:
+            cols = None
+        else:
+            dlon = dlat / cos_lat
+            first = int(math.floor((lon - dlon + 180) / self.cell_size))
+            last = int(math.floor((lon + dlon + 180) / self.cell_size))
+            cols = {col % self._lon_cells for col in range(first, last + 1)}
+
+        box_size = (max_row - min_row + 1) * (len(cols) if cols is not None else self._lon_cells)
+        if box_size > len(self._cells):
+            # Sparse index: cheaper to test the occupied cells than walk the box
+            return [
+                cell for cell in self._cells
+                if min_row <= cell[0] <= max_row and (cols is None or cell[1] in cols)
+            ]
+        if cols is None:
+            cols = range(self._lon_cells)
+        return [(row, col) for row in range(min_row, max_row + 1) for col in cols]
+
+    def within(self, lat: float, lon: float, radius_km: float,
+               limit: Optional[int] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Find points within ``radius_km`` of the origin.
+
+        Returns:
+            List of ``(key, distance_km)`` ordered by distance, nearest first
+        """
+        with self._lock:
+            keys, lats, lons = self._gather(self._cells_in_box(lat, lon, radius_km))
+        if not keys:
+            return []
+        indices, distances = nearest_within(lat, lon, lats, lons, radius_km, limit)
+        return [(keys[i], d) for i, d in zip(indices.tolist(), distances.tolist())]
+
+    def nearest(self, lat: float, lon: float, k: int,
+                max_distance: Optional[float] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Find the ``k`` points nearest to the origin, expanding ring by ring
+        around the origin's cell until no unvisited cell can hold a closer point.
+
+        Returns:
+            List of ``(key, distance_km)`` ordered by distance, nearest first
+        """
+        if k <= 0:
+            return []
+
+        keys: List[Hashable] = []
+        distances = []
+        kth = math.inf
+        with self._lock:
+            total = len(self._points)
+            center_row, center_col = self._cell_of(lat, lon)
+            ring = 0
+            while len(keys) < total:
+                if ring > 0:
+                    # Any point in this ring is at least (ring - 1) cells away
+                    # along one axis; the longitude gap is the shorter one.
+                    band_lat = min(abs(lat) + ring * self.cell_size, 90)
+                    gap = math.radians((ring - 1) * self.cell_size)
+                    lower_bound = 2 * EARTH_RADIUS_KM * math.asin(
+                        min(1.0, math.cos(math.radians(band_lat)) * math.sin(min(gap, math.pi) / 2))
+                    )
+                    if lower_bound > kth:
+                        break
+                    if max_distance is not None and lower_bound > max_distance:
+                        break
+                    if (2 * ring + 1) ** 2 > 4 * len(self._cells):
+                        # The rings now dwarf the occupied cells: finish with a scan
+                        keys, lats, lons = self._gather(list(self._cells))
+                        distances = [haversine_distances(lat, lon, lats, lons)]
+                        break
+
+                ring_keys, ring_lats, ring_lons = self._gather(
+                    self._ring_cells(center_row, center_col, ring)
+                )
+                if ring_keys:
+                    keys.extend(ring_keys)
+                    distances.append(haversine_distances(lat, lon, ring_lats, ring_lons))
+                    if len(keys) >= k:
+                        candidates = np.concatenate(distances)
+                        distances = [candidates]
+                        kth = float(np.partition(candidates, k - 1)[k - 1])
+                ring += 1
+
+        if not keys:
+            return []
+        indices, found = rank_by_distance(np.concatenate(distances), max_distance, k)
+        return [(keys[i], d) for i, d in zip(indices.tolist(), found.tolist())]
+
+    def _ring_cells(self, row: int, col: int, ring: int) -> List[Tuple[int, int]]:
+        if ring == 0:
+            return [(row, col)]
+        width = min(2 * ring + 1, self._lon_cells)
+        cols = {(col - ring + offset) % self._lon_cells for offset in range(width)}
+        cells = set()
+        for c in cols:
+            cells.add((row - ring, c))
+            cells.add((row + ring, c))
+        if ring <= self._lon_cells // 2:
+            for r in range(row - ring + 1, row + ring):
+                cells.add((r, (col - ring) % self._lon_cells))
+                cells.add((r, (col + ring) % self._lon_cells))
+        return list(cells)
@@ -1,5 +1,8 @@
 import math
 from typing import Tuple, Optional
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
@@ -22,10 +25,119 @@ def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
     c = 2 * math.asin(math.sqrt(a))
     
-    # Radius of Earth in kilometers
-    r = 6371
+    return c * EARTH_RADIUS_KM
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    Latitude/longitude box that contains every point within a radius.
+    
+    Useful as an index-friendly SQL pre-filter before an exact distance check.
+    Near the poles or the antimeridian the longitude range is widened to the
+    full [-180, 180].
+    
+    Args:
+        lat, lon: Center latitude and longitude in decimal degrees
+        radius_km: Radius in kilometers
+    
+    Returns:
+        Tuple of (min_lat, max_lat, min_lon, max_lon) in decimal degrees
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat < 1e-6:
+        return min_lat, max_lat, -180.0, 180.0
+    dlon = dlat / cos_lat
+    if lon - dlon < -180 or lon + dlon > 180:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, lon - dlon, lon + dlon
+
+def haversine_distances(lat: float, lon: float, lats, lons) -> np.ndarray:
+    """
+    Vectorized Haversine distance from one origin to N points.
+    
+    Args:
+        lat, lon: Origin latitude and longitude in decimal degrees
+        lats, lons: Array-likes of N latitudes and longitudes in decimal degrees
+    
+    Returns:
+        Float64 array of N distances in kilometers
+    """
+    lat1 = math.radians(lat)
+    lats2 = np.radians(np.asarray(lats, dtype=np.float64))
+    dlat = lats2 - lat1
+    dlon = np.radians(np.asarray(lons, dtype=np.float64)) - math.radians(lon)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lats2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def haversine_matrix(origin_lats, origin_lons, lats, lons) -> np.ndarray:
+    """
+    Vectorized Haversine distances from M origins to N points.
+    
+    Args:
+        origin_lats, origin_lons: Array-likes of M origin coordinates in decimal degrees
+        lats, lons: Array-likes of N point coordinates in decimal degrees
+    
+    Returns:
+        Float64 array of shape (M, N) with distances in kilometers
+    """
+    lat1 = np.radians(np.asarray(origin_lats, dtype=np.float64))[:, None]
+    lon1 = np.radians(np.asarray(origin_lons, dtype=np.float64))[:, None]
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))[None, :]
+    lon2 = np.radians(np.asarray(lons, dtype=np.float64))[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def rank_by_distance(distances, max_distance: Optional[float] = None,
+                     k: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Apply a distance cutoff and keep the k smallest of precomputed distances.
+    
+    Args:
+        distances: Array of N distances in kilometers
+        max_distance: Optional cutoff in kilometers
+        k: Optional number of nearest points to keep
+    
+    Returns:
+        Tuple of (indices into ``distances``, distances), ordered nearest first
+    """
+    distances = np.asarray(distances, dtype=np.float64)
+    indices = np.arange(distances.size)
+    
+    if max_distance is not None:
+        mask = distances <= max_distance
+        indices = indices[mask]
+        distances = distances[mask]
     
-    return c * r
+    if k is not None and k < distances.size:
+        if k <= 0:
+            return indices[:0], distances[:0]
+        # Only the k best need ordering
+        top = np.argpartition(distances, k - 1)[:k]
+        indices = indices[top]
+        distances = distances[top]
+    
+    order = np.argsort(distances, kind='stable')
+    return indices[order], distances[order]
+
+def nearest_within(lat: float, lon: float, lats, lons,
+                   max_distance: Optional[float] = None,
+                   k: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rank N points by distance from an origin.
+    
+    Args:
+        lat, lon: Origin latitude and longitude in decimal degrees
+        lats, lons: Array-likes of N latitudes and longitudes in decimal degrees
+        max_distance: Optional cutoff in kilometers
+        k: Optional number of nearest points to keep
+    
+    Returns:
+        Tuple of (indices into the input arrays, distances in kilometers),
+        ordered nearest first
+    """
+    return rank_by_distance(haversine_distances(lat, lon, lats, lons), max_distance, k)
 
 def filter_shops_by_distance(shops: list, user_lat: float, user_lon: float, max_distance: float = 10) -> list:
     """
@@ -40,21 +152,21 @@ def filter_shops_by_distance(shops: list, user_lat: float, user_lon: float, max_
     Returns:
         Filtered list of shops within the specified distance
     """
+    located = [shop for shop in shops if shop.get('latitude') and shop.get('longitude')]
+    if not located:
+        return []
+    
+    lats = np.fromiter((float(shop['latitude']) for shop in located), dtype=np.float64, count=len(located))
+    lons = np.fromiter((float(shop['longitude']) for shop in located), dtype=np.float64, count=len(located))
+    indices, distances = nearest_within(user_lat, user_lon, lats, lons, max_distance)
+    
     nearby_shops = []
+    for index, distance in zip(indices.tolist(), distances.tolist()):
+        shop = located[index]
+        shop['distance'] = round(distance, 2)
+        nearby_shops.append(shop)
     
-    for shop in shops:
-        if shop.get('latitude') and shop.get('longitude'):
-            distance = calculate_distance(
-                user_lat, user_lon,
-                float(shop['latitude']), float(shop['longitude'])
-            )
-            
-            if distance <= max_distance:
-                shop['distance'] = round(distance, 2)
-                nearby_shops.append(shop)
-    
-    # Sort by distance
-    return sorted(nearby_shops, key=lambda x: x.get('distance', float('inf')))
+    return nearby_shops
 
 def format_shop_timings(timings: list) -> dict:
     """
@@ -0,0 +1,146 @@
+import hashlib
+from datetime import timezone
+from functools import wraps
+from urllib.parse import urlencode
+from flask import current_app, g, request
+
+# Cache-Control for responses without a blueprint policy, and for anything
+# that isn't a successful GET
+DEFAULT_CACHE_CONTROL = 'no-store'
+
+# lookup(etag) -> ready response or None, consulted before a conditional view runs
+_representation_caches = []
+
+def register_representation_cache(lookup):
+    """
+    Let ``lookup(etag)`` answer a conditional GET whose validators didn't
+    match, with a stored representation of that ETag for the current
+    request (e.g. its compressed bytes), so the view doesn't run. Views
+    decorated with ``representations=False`` are never answered this way.
+    """
+    _representation_caches.append(lookup)
+
+def conditional(validator, representations=True):
+    """
+    Decorate a GET view with validators from ``validator(**view_args)``,
+    which returns ``(etag, last_modified)`` or None (no validators).
+
+    The validators are computed before the view runs: a request whose
+    ``If-None-Match`` (or, without it, ``If-Modified-Since``) still matches
+    gets an empty ``304`` and the view is skipped, so anything a request
+    must do even when it is answered that way (e.g. recording a search)
+    belongs in ``validator``. Otherwise a stored representation (see
+    ``register_representation_cache``) or the view's ``200`` response is
+    sent with ``ETag`` and ``Last-Modified``; pass ``representations=False``
+    for a view that must run whenever the client has no current copy.
+
+    The ETag sent covers the query arguments as well as the data version,
+    since views read their parameters from them. The version's own ETag is
+    left in ``g.etag`` for views that cache by version.
+
+    ETags are weak: the validators track the data, not the bytes, and the
+    same version is sent under different content encodings.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                validators = validator(*args, **kwargs)
+            except ValueError:
+                # Invalid parameters; the view reports them
+                validators = None
+            if validators is None:
+                return view(*args, **kwargs)
+
+            etag, last_modified = _normalize(validators)
+            response = _revalidate(etag, last_modified, representations)
+            if response is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            return _with_validators(response, etag, last_modified)
+        return wrapper
+    return decorator
+
+def async_conditional(validator, representations=True):
+    """``conditional`` for coroutine views; ``validator`` is a coroutine too."""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(*args, **kwargs):
+            try:
+                validators = await validator(*args, **kwargs)
+            except ValueError:
+                validators = None
+            if validators is None:
+                return await view(*args, **kwargs)
+
+            etag, last_modified = _normalize(validators)
+            response = _revalidate(etag, last_modified, representations)
+            if response is None:
+                response = current_app.make_response(await view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            return _with_validators(response, etag, last_modified)
+        return wrapper
+    return decorator
+
+def _normalize(validators):
+    etag, last_modified = validators
+    if last_modified is not None:
+        # Stored as naive UTC; HTTP dates have whole seconds
+        last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+    g.etag = etag
+    return _with_arguments(etag), last_modified
+
+def _with_arguments(etag):
+    # One ETag per data version and normalized query string (argument order
+    # doesn't matter); unchanged for a request without arguments
+    arguments = sorted(request.args.items(multi=True))
+    if not arguments:
+        return etag
+    return hashlib.sha1(f'{etag}?{urlencode(arguments)}'.encode('utf-8')).hexdigest()[:24]
+
+def _revalidate(etag, last_modified, representations):
+    # 304 if the client's copy is current, else a stored representation or None
+    if _not_modified(etag, last_modified):
+        return current_app.response_class(status=304)
+    return _cached_representation(etag) if representations else None
+
+def _with_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # The stream format can come from the Accept header
+    response.vary.add('Accept')
+    return response
+
+def _cached_representation(etag):
+    for lookup in _representation_caches:
+        response = lookup(etag)
+        if response is not None:
+            return response
+    return None
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+def apply_cache_control(blueprint):
+    """
+    Give the blueprint's responses the ``Cache-Control`` configured for it in
+    ``CACHE_CONTROL`` (by blueprint name), unless the view set one. Only
+    successful GET/HEAD responses get the policy; everything else is
+    ``no-store``.
+    """
+    @blueprint.after_request
+    def cache_control(response):
+        if 'Cache-Control' not in response.headers:
+            policy = DEFAULT_CACHE_CONTROL
+            if request.method in ('GET', 'HEAD') and response.status_code in (200, 304):
+                policy = current_app.config.get('CACHE_CONTROL', {}).get(blueprint.name, DEFAULT_CACHE_CONTROL)
+            response.headers['Cache-Control'] = policy
+        return response
+    return blueprint
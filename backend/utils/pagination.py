@@ -0,0 +1,183 @@
+import base64
+import json
+from typing import Callable, Optional, Sequence, Tuple
+from sqlalchemy import and_, or_
+
+def encode_cursor(values: Sequence) -> str:
+    """
+    Encode keyset values into an opaque, URL-safe cursor string.
+
+    Args:
+        values: Values of the ordering columns for the last row of a page
+
+    Returns:
+        Cursor string to hand back to the client
+    """
+    raw = json.dumps(list(values), separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str, size: int, types: Optional[Sequence[type]] = None) -> list:
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    Args:
+        cursor: Cursor string from the client
+        size: Expected number of keyset values
+        types: Optional exact type of each value (e.g. ``(int, int)``); a
+            cursor edited by the client can hold anything JSON can
+
+    Returns:
+        List of keyset values
+
+    Raises:
+        ValueError: If the cursor is malformed or a value has the wrong type
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Invalid cursor')
+    if types is not None and any(type(value) is not expected for value, expected in zip(values, types)):
+        raise ValueError('Invalid cursor')
+    return values
+
+def keyset_after(columns: Sequence, values: Sequence, descending: bool = False):
+    """
+    Build the seek predicate ``(c1, c2, ...) > (v1, v2, ...)`` (or ``<`` for
+    descending order) for keyset pagination, spelled out as OR/AND terms
+    since SQL Server has no row-value comparison.
+    """
+    terms = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        beyond = column < values[i] if descending else column > values[i]
+        terms.append(and_(*equal, beyond))
+    return or_(*terms)
+
+def fetch_page(query, order_columns: Sequence, key: Callable, per_page: int,
+               page: int = 1, after: Optional[Sequence] = None,
+               batch_filter: Optional[Callable] = None,
+               descending: bool = False) -> Tuple[list, bool, Optional[str]]:
+    """
+    Fetch one page of a query in the database instead of slicing a full list.
+
+    Rows are ordered by ``order_columns``; with ``after`` (decoded cursor
+    values) the page starts right after that key using a seek predicate,
+    otherwise ``page`` is turned into an OFFSET. ``batch_filter`` drops rows
+    that can only be checked in Python (it receives and returns a list, so it
+    can vectorize); the query is then walked in keyset batches until the
+    page is full.
+
+    Args:
+        query: SQLAlchemy query without ORDER BY
+        order_columns: Columns that uniquely order the rows
+        key: Function returning the ordering values of a result row
+        per_page: Number of rows per page
+        page: Page number (1-indexed), used when ``after`` is not given
+        after: Keyset values of the last row already returned
+        batch_filter: Optional function returning the kept rows of a batch
+        descending: Order by every column descending instead of ascending
+
+    Returns:
+        Tuple of (rows, has_next, next_cursor)
+    """
+    if batch_filter is None:
+        rows = page_query(query, order_columns, per_page, page, after, descending).all()
+        return split_page(rows, key, per_page)
+
+    query = query.order_by(*(column.desc() if descending else column for column in order_columns))
+    skip = 0 if after is not None else (page - 1) * per_page
+    wanted = skip + per_page + 1
+    batch_size = max(2 * per_page, 50)
+    rows = []
+    while len(rows) < wanted:
+        batch_query = query if after is None else query.filter(keyset_after(order_columns, after, descending))
+        batch = batch_query.limit(batch_size).all()
+        rows.extend(batch_filter(batch))
+        if len(batch) < batch_size:
+            break
+        after = key(batch[-1])
+    return split_page(rows[skip:], key, per_page)
+
+def page_query(query, order_columns: Sequence, per_page: int, page: int = 1,
+               after: Optional[Sequence] = None, descending: bool = False):
+    """
+    The query for one page as ``fetch_page`` runs it (without a
+    ``batch_filter``): ordered, seeked past ``after`` or offset to ``page``,
+    and limited to one row more than the page so ``split_page`` can tell
+    whether another page follows. Lets callers run it themselves, e.g. on an
+    async session.
+    """
+    query = query.order_by(*(column.desc() if descending else column for column in order_columns))
+    if after is not None:
+        query = query.filter(keyset_after(order_columns, after, descending))
+    else:
+        query = query.offset((page - 1) * per_page)
+    return query.limit(per_page + 1)
+
+def split_page(rows: list, key: Callable, per_page: int) -> Tuple[list, bool, Optional[str]]:
+    """
+    Cut rows fetched past the end of a page (``page_query``) down to the
+    page: returns ``(rows, has_next, next_cursor)`` like ``fetch_page``.
+    """
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    next_cursor = encode_cursor(key(rows[-1])) if has_next else None
+    return rows, has_next, next_cursor
+
+def fetch_ranked_page(query, id_column, ranked_ids: Sequence, row_id: Callable, tiebreak: Callable,
+                      per_page: int, page: int = 1, after: Optional[Sequence] = None,
+                      batch_filter: Optional[Callable] = None,
+                      chunk_size: int = 200) -> Tuple[list, bool, Optional[str]]:
+    """
+    Fetch one page of a query in an externally computed order, e.g. ids
+    ranked by a search index.
+
+    The ranked ids are walked in chunks, each chunk fetched with an
+    ``id_column IN (...)`` filter, so the database only returns rows for the
+    ids that can land on the requested page. Cursors are ``[rank, tiebreak]``.
+
+    Args:
+        query: SQLAlchemy query without ORDER BY
+        id_column: Column holding the ranked ids
+        ranked_ids: Ids in the desired order
+        row_id: Function returning the ranked id of a result row
+        tiebreak: Function returning a value ordering rows that share an id
+        per_page: Number of rows per page
+        page: Page number (1-indexed), used when ``after`` is not given
+        after: Decoded ``[rank, tiebreak]`` cursor of the last row returned
+        batch_filter: Optional function returning the kept rows of a batch
+        chunk_size: Number of ids fetched per query
+
+    Returns:
+        Tuple of (rows, has_next, next_cursor)
+    """
+    skip = 0 if after is not None else (page - 1) * per_page
+    wanted = skip + per_page + 1
+    # A negative rank can only come from an edited cursor: start over
+    position = max(int(after[0]), 0) if after is not None else 0
+    ranked = []
+
+    while len(ranked) < wanted and position < len(ranked_ids):
+        chunk = ranked_ids[position:position + chunk_size]
+        rank_of = {doc_id: position + offset for offset, doc_id in enumerate(chunk)}
+        batch = query.filter(id_column.in_(chunk)).all()
+        batch.sort(key=lambda row: (rank_of[row_id(row)], tiebreak(row)))
+        if after is not None and position == int(after[0]):
+            batch = [row for row in batch
+                     if (rank_of[row_id(row)], tiebreak(row)) > (position, after[1])]
+        if batch_filter is not None and batch:
+            batch = batch_filter(batch)
+        ranked.extend((rank_of[row_id(row)], row) for row in batch)
+        position += len(chunk)
+
+    ranked = ranked[skip:]
+    has_next = len(ranked) > per_page
+    ranked = ranked[:per_page]
+    next_cursor = None
+    if has_next:
+        rank, row = ranked[-1]
+        next_cursor = encode_cursor((rank, tiebreak(row)))
+    return [row for _, row in ranked], has_next, next_cursor
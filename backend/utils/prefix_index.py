@@ -0,0 +1,138 @@
+import bisect
+import heapq
+import threading
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class PrefixIndex:
+    """
+    Top-k prefix completion over a sorted array of keys.
+
+    Each entry has one or more keys and an ``order`` (entries with the
+    smallest order come first). The keys of all entries are kept in one sorted
+    list, so the keys starting with a prefix form a contiguous range found by
+    binary search. Narrow ranges (at most ``scan_limit`` keys) are ranked on
+    the fly. The top ``k`` of wider ones (short prefixes) are cached per
+    prefix and built from the cached tops of their one-character-longer
+    prefixes, so no lookup ranks a large range: all of them are computed on
+    ``load``, offered every new entry, and dropped when one of their entries
+    is removed, to be rebuilt from their children on the next lookup.
+
+    Entry ids must be hashable and comparable with each other (they break
+    ties between equal orders).
+    """
+
+    def __init__(self, k: int = 10, scan_limit: int = 256):
+        self.k = k
+        self.scan_limit = scan_limit
+        self._keys: List[Tuple[str, Hashable]] = []  # sorted (key, entry id)
+        self._entry_keys: Dict[Hashable, Tuple[str, ...]] = {}
+        self._orders: Dict[Hashable, tuple] = {}
+        self._top: Dict[str, List[tuple]] = {}  # wide prefix -> top k (order, entry id)
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entry_keys)
+
+    def __contains__(self, entry_id: Hashable) -> bool:
+        return entry_id in self._entry_keys
+
+    def load(self, entries: Iterable[Tuple[Hashable, Iterable[str], tuple]]) -> None:
+        """Replace the contents with ``(entry id, keys, order)`` entries."""
+        keys, entry_keys, orders = [], {}, {}
+        for entry_id, entry_key_list, order in entries:
+            entry_key_list = tuple(dict.fromkeys(key for key in entry_key_list if key))
+            if not entry_key_list:
+                continue
+            entry_keys[entry_id] = entry_key_list
+            orders[entry_id] = order
+            keys.extend((key, entry_id) for key in entry_key_list)
+        keys.sort()
+        with self._lock:
+            self._keys, self._entry_keys, self._orders, self._top = keys, entry_keys, orders, {}
+            if len(keys) > self.scan_limit:
+                self._top_of('', 0, len(keys))
+
+    def add(self, entry_id: Hashable, keys: Iterable[str], order: tuple) -> None:
+        """Index an entry under ``keys``, replacing any previous version with the same id."""
+        keys = tuple(dict.fromkeys(key for key in keys if key))
+        with self._lock:
+            self._remove(entry_id)
+            if not keys:
+                return
+            self._entry_keys[entry_id] = keys
+            self._orders[entry_id] = order
+            item = (order, entry_id)
+            for key in keys:
+                bisect.insort(self._keys, (key, entry_id))
+                for length in range(1, len(key) + 1):
+                    top = self._top.get(key[:length])
+                    if top is not None:
+                        self._offer(top, item)
+
+    def remove(self, entry_id: Hashable) -> None:
+        with self._lock:
+            self._remove(entry_id)
+
+    def _remove(self, entry_id: Hashable) -> None:
+        keys = self._entry_keys.pop(entry_id, None)
+        if keys is None:
+            return
+        item = (self._orders.pop(entry_id), entry_id)
+        for key in keys:
+            position = bisect.bisect_left(self._keys, (key, entry_id))
+            if position < len(self._keys) and self._keys[position] == (key, entry_id):
+                del self._keys[position]
+            for length in range(1, len(key) + 1):
+                top = self._top.get(key[:length])
+                if top is not None and item in top:
+                    del self._top[key[:length]]
+
+    def _offer(self, top: List[tuple], item: tuple) -> None:
+        if item in top or (len(top) >= self.k and item >= top[-1]):
+            return
+        bisect.insort(top, item)
+        if len(top) > self.k:
+            top.pop()
+
+    def _rank(self, start: int, end: int, limit: int) -> List[tuple]:
+        # An entry with several keys in the range counts once
+        return heapq.nsmallest(limit, {(self._orders[entry_id], entry_id) for _, entry_id in self._keys[start:end]})
+
+    def _top_of(self, prefix: str, start: int, end: int) -> List[tuple]:
+        """Cached top ``k`` of the wide range ``keys[start:end]`` of ``prefix``."""
+        top = self._top.get(prefix)
+        if top is not None:
+            return top
+        keys, depth = self._keys, len(prefix)
+        candidates = set()
+        position = start
+        while position < end:
+            key, entry_id = keys[position]
+            if len(key) == depth:
+                candidates.add((self._orders[entry_id], entry_id))
+                position += 1
+                continue
+            child = key[:depth + 1]
+            child_end = bisect.bisect_left(keys, (child + '\uffff',), position, end)
+            if child_end - position > self.scan_limit:
+                candidates.update(self._top_of(child, position, child_end))
+            else:
+                candidates.update((self._orders[other], other) for _, other in keys[position:child_end])
+            position = child_end
+        top = self._top[prefix] = heapq.nsmallest(self.k, candidates)
+        return top
+
+    def top(self, prefix: str, limit: Optional[int] = None) -> List[Hashable]:
+        """Ids of the best ``limit`` (at most ``k``) entries with a key starting with ``prefix``."""
+        limit = min(limit or self.k, self.k)
+        if not prefix:
+            return []
+        with self._lock:
+            start = bisect.bisect_left(self._keys, (prefix,))
+            end = bisect.bisect_left(self._keys, (prefix + '\uffff',), start)
+            if end - start <= self.scan_limit:
+                items = self._rank(start, end, limit)
+            else:
+                items = self._top_of(prefix, start, end)
+            return [entry_id for _, entry_id in items[:limit]]
@@ -0,0 +1,121 @@
+from typing import Any, Dict, List, Sequence
+from flask import request
+
+# Conversions applied to a field, inlined into the compiled converters
+FLOAT = 'float'   # Numeric/Decimal -> float
+ISO = 'iso'       # date/datetime/time -> ISO 8601 string
+HH_MM = 'hh_mm'   # time -> 'HH:MM'
+
+_INLINE = {
+    FLOAT: 'None if {v} is None else float({v})',
+    ISO: 'None if {v} is None else {v}.isoformat()',
+    HH_MM: "None if {v} is None else {v}.strftime('%H:%M')"
+}
+
+
+class RowSerializer:
+    """
+    Turns query result rows into JSON-ready dicts or lists.
+
+    Fields are given as ``name``, ``(name, source)`` or ``(name, source,
+    conversion)``, where ``source`` is the row attribute (default: ``name``)
+    and ``conversion`` is FLOAT, ISO, HH_MM or any callable; None values pass
+    through unconverted. The first time a row shape is seen (the columns of
+    a result row, or the class of an ORM object), a converter is generated
+    for it with plain index/attribute lookups and the conversions inlined,
+    so each row costs a single function call.
+    """
+
+    def __init__(self, *fields):
+        self.fields = []
+        for field in fields:
+            if isinstance(field, str):
+                field = (field,)
+            name, source, conversion = (tuple(field) + (None, None))[:3]
+            self.fields.append((name, source or name, conversion))
+        self.columns = [name for name, _, _ in self.fields]
+        self._compiled = {}
+
+    def _compile(self, keys):
+        namespace = {}
+        dict_items = []
+        list_items = []
+        for position, (name, source, conversion) in enumerate(self.fields):
+            if keys is None:
+                value = f'row.{source}'
+            else:
+                try:
+                    value = f'row[{keys.index(source)}]'
+                except ValueError:
+                    raise KeyError(f'Result rows have no column {source!r}') from None
+            if conversion is None:
+                expression = value
+            elif conversion in _INLINE:
+                expression = _INLINE[conversion].format(v=value)
+            else:
+                namespace[f'_convert{position}'] = conversion
+                expression = f'None if {value} is None else _convert{position}({value})'
+            dict_items.append(f'{name!r}: {expression}')
+            list_items.append(expression)
+
+        source_code = (
+            'def to_dict(row):\n'
+            f'    return {{{", ".join(dict_items)}}}\n'
+            'def to_list(row):\n'
+            f'    return [{", ".join(list_items)}]\n'
+        )
+        exec(compile(source_code, f'<row serializer {self.columns}>', 'exec'), namespace)
+        return namespace['to_dict'], namespace['to_list']
+
+    def _converters(self, row):
+        # Result rows expose their columns; ORM objects are keyed by class
+        keys = getattr(row, '_fields', None)
+        shape = keys if keys is not None else type(row)
+        converters = self._compiled.get(shape)
+        if converters is None:
+            converters = self._compiled[shape] = self._compile(list(keys) if keys is not None else None)
+        return converters
+
+    def to_dict(self, row) -> Dict[str, Any]:
+        return self._converters(row)[0](row)
+
+    def to_list(self, row) -> List[Any]:
+        return self._converters(row)[1](row)
+
+    def dicts(self, rows: Sequence, **extra: Sequence) -> List[Dict[str, Any]]:
+        """
+        Rows as dicts; each ``extra`` keyword adds a field with one value per row.
+        """
+        if not rows:
+            return []
+        to_dict = self._converters(rows[0])[0]
+        result = [to_dict(row) for row in rows]
+        for name, values in extra.items():
+            for item, value in zip(result, values):
+                item[name] = value
+        return result
+
+    def lists(self, rows: Sequence, **extra: Sequence) -> List[List[Any]]:
+        """Rows as lists in ``columns`` order, followed by any ``extra`` values."""
+        if not rows:
+            return []
+        to_list = self._converters(rows[0])[1]
+        result = [to_list(row) for row in rows]
+        for values in extra.values():
+            for item, value in zip(result, values):
+                item.append(value)
+        return result
+
+    def payload(self, rows: Sequence, key: str, columnar: bool = False, **extra: Sequence) -> Dict[str, Any]:
+        """
+        ``{key: [dict, ...]}``, or ``{'columns': [...], 'rows': [[...], ...]}``
+        when ``columnar`` is set.
+        """
+        if columnar:
+            return {'columns': self.columns + list(extra), 'rows': self.lists(rows, **extra)}
+        return {key: self.dicts(rows, **extra)}
+
+
+def wants_columns() -> bool:
+    """True when the current request asked for the column-oriented payload (``shape=columns``)."""
+    return request.args.get('shape', '').lower() == 'columns'
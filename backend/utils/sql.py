@@ -0,0 +1,16 @@
+from itertools import islice
+from typing import Iterable, Iterator, List
+
+# Keep IN (...) lists well under SQL Server's 2100 parameter limit
+ID_BATCH_SIZE = 1000
+
+def batched(ids: Iterable, size: int = ID_BATCH_SIZE) -> Iterator[List]:
+    """
+    Split ``ids`` into lists of at most ``size`` items, in order, for
+    ``column.in_(batch)`` filters.
+    """
+    iterator = iter(ids)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
@@ -0,0 +1,122 @@
+import datetime
+import json
+import logging
+from decimal import Decimal
+from flask import Response, request, stream_with_context
+
+try:
+    import orjson
+except ImportError:  # optional faster encoder
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Stream formats and their content types
+STREAM_MIMETYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson'
+}
+
+# Bytes gathered before a chunk is handed to the server; one write per row
+# would cost more in syscalls than it saves in latency
+CHUNK_SIZE = 16384
+
+
+def json_default(obj):
+    """Encode the column types the JSON encoders don't handle by themselves."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+if orjson is not None:
+    def dumps(obj):
+        """Compact JSON for ``obj`` as bytes (orjson when installed)."""
+        return orjson.dumps(obj, default=json_default)
+else:
+    def dumps(obj):
+        """Compact JSON for ``obj`` as bytes (orjson when installed)."""
+        return json.dumps(obj, default=json_default, separators=(',', ':')).encode('utf-8')
+
+
+def stream_format():
+    """
+    Streaming format requested by the current request, or None for a regular response.
+
+    ``?stream=ndjson`` or an ``Accept: application/x-ndjson`` header select
+    NDJSON; ``?stream=json`` (or ``?stream=1``) selects a chunked JSON document.
+    """
+    requested = request.args.get('stream', '').lower()
+    if requested in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    if requested in ('json', '1', 'true', 'yes'):
+        return 'json'
+    if request.accept_mimetypes.best == STREAM_MIMETYPES['ndjson']:
+        return 'ndjson'
+    return None
+
+
+def _buffered(pieces, size=CHUNK_SIZE):
+    buffer = bytearray()
+    for piece in pieces:
+        buffer += piece
+        if len(buffer) >= size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def iter_json(items, key, head=None, trailer=None):
+    """
+    Encode ``{**head, key: [*items], **trailer()}`` one item at a time.
+
+    ``trailer`` is called after the last item, so it can report values
+    that are only known once the items have been produced.
+    """
+    head = dumps(head)[:-1] + b',' if head else b'{'
+    yield head + dumps(key) + b':['
+    for index, item in enumerate(items):
+        yield dumps(item) if index == 0 else b',' + dumps(item)
+    tail = trailer() if trailer is not None else None
+    yield b'],' + dumps(tail)[1:] if tail else b']}'
+
+
+def iter_ndjson(items, head=None, trailer=None):
+    """One JSON document per line: ``head`` first, then the items, then ``trailer()``."""
+    if head:
+        yield dumps(head) + b'\n'
+    for item in items:
+        yield dumps(item) + b'\n'
+    tail = trailer() if trailer is not None else None
+    if tail:
+        yield dumps(tail) + b'\n'
+
+
+def stream_response(items, key, fmt, head=None, trailer=None):
+    """
+    Streaming response for ``items`` in ``fmt`` (see ``stream_format``).
+
+    Args:
+        items: Iterable of JSON-serializable rows, consumed lazily
+        key: Name of the items array in the ``json`` format
+        fmt: 'json' or 'ndjson'
+        head: Optional dict of fields sent before the items
+        trailer: Optional callable returning a dict of fields sent after them
+
+    Returns:
+        Response: Chunked response; the request context stays available
+        while ``items`` is consumed
+    """
+    pieces = iter_ndjson(items, head, trailer) if fmt == 'ndjson' else iter_json(items, key, head, trailer)
+
+    def generate():
+        try:
+            yield from _buffered(pieces)
+        except Exception:
+            # Headers are already sent; a truncated body is all we can signal
+            logger.exception('Streaming response failed')
+
+    return Response(stream_with_context(generate()), mimetype=STREAM_MIMETYPES[fmt])
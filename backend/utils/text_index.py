@@ -0,0 +1,147 @@
+import bisect
+import math
+import re
+import threading
+from typing import Dict, Hashable, List, Mapping, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lower-case word tokens of a piece of text."""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    Incrementally maintained inverted index with field weights, prefix
+    matching and BM25 relevance ranking.
+
+    Each document is a mapping of field name to text. A term's frequency in a
+    document is the sum of the weights of the fields it occurs in, so a match
+    in a heavily weighted field (e.g. the product name) counts for more.
+    """
+
+    def __init__(self, field_weights: Mapping[str, float], k1: float = 1.2, b: float = 0.75,
+                 min_prefix: int = 2, max_expansions: int = 256):
+        self.field_weights = dict(field_weights)
+        self.k1 = k1
+        self.b = b
+        self.min_prefix = min_prefix
+        self.max_expansions = max_expansions
+        self._postings: Dict[str, Dict[Hashable, float]] = {}
+        self._doc_terms: Dict[Hashable, Tuple[str, ...]] = {}
+        self._doc_length: Dict[Hashable, float] = {}
+        self._total_length = 0.0
+        self._terms: List[str] = []  # sorted vocabulary for prefix lookups
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_length)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._doc_length
+
+    def _weigh(self, fields: Mapping[str, Optional[str]]) -> Dict[str, float]:
+        weights: Dict[str, float] = {}
+        for field, weight in self.field_weights.items():
+            for token in tokenize(fields.get(field)):
+                weights[token] = weights.get(token, 0.0) + weight
+        return weights
+
+    def add(self, doc_id: Hashable, fields: Mapping[str, Optional[str]]) -> None:
+        """Index a document, replacing any previous version with the same id."""
+        weights = self._weigh(fields)
+        with self._lock:
+            self._remove(doc_id)
+            for term, weight in weights.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    bisect.insort(self._terms, term)
+                postings[doc_id] = weight
+            length = sum(weights.values())
+            self._doc_terms[doc_id] = tuple(weights)
+            self._doc_length[doc_id] = length
+            self._total_length += length
+
+    def remove(self, doc_id: Hashable) -> None:
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: Hashable) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_length.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                position = bisect.bisect_left(self._terms, term)
+                if position < len(self._terms) and self._terms[position] == term:
+                    del self._terms[position]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings = {}
+            self._doc_terms = {}
+            self._doc_length = {}
+            self._total_length = 0.0
+            self._terms = []
+
+    def _expand(self, token: str) -> List[str]:
+        """Indexed terms matching a query token exactly or by prefix."""
+        if len(token) < self.min_prefix:
+            return [token] if token in self._postings else []
+        start = bisect.bisect_left(self._terms, token)
+        end = bisect.bisect_left(self._terms, token + '\uffff', start)
+        return self._terms[start:min(end, start + self.max_expansions)]
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Find documents matching every query token (exactly or as a prefix)
+        and rank them by BM25.
+
+        Returns:
+            List of ``(doc_id, score)`` ordered by descending score
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        with self._lock:
+            doc_count = len(self._doc_length)
+            if not doc_count:
+                return []
+            average_length = self._total_length / doc_count or 1.0
+            scores: Optional[Dict[Hashable, float]] = None
+
+            for token in tokens:
+                token_scores: Dict[Hashable, float] = {}
+                for term in self._expand(token):
+                    postings = self._postings[term]
+                    df = len(postings)
+                    idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                    # A completed word outranks the longer words it is a prefix of
+                    if term != token:
+                        idf *= len(token) / len(term)
+                    for doc_id, tf in postings.items():
+                        if scores is not None and doc_id not in scores:
+                            continue
+                        norm = self.k1 * (1 - self.b + self.b * self._doc_length[doc_id] / average_length)
+                        score = idf * tf * (self.k1 + 1) / (tf + norm)
+                        if score > token_scores.get(doc_id, 0.0):
+                            token_scores[doc_id] = score
+
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {doc_id: scores[doc_id] + score for doc_id, score in token_scores.items()}
+                if not scores:
+                    return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit is not None else ranked
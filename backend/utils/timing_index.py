@@ -0,0 +1,117 @@
+import bisect
+import datetime
+import threading
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+
+def day_index(day: str) -> Optional[int]:
+    """0 for Monday .. 6 for Sunday; accepts full or abbreviated names, None if unknown."""
+    name = (day or '').strip().lower()
+    if len(name) < 3:
+        return None
+    for index, full in enumerate(DAYS):
+        if full.startswith(name):
+            return index
+    return None
+
+
+def minute_of_week(moment: datetime.datetime) -> int:
+    """Minutes since Monday 00:00 of ``moment``'s week (in its own wall-clock time)."""
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def _minute_of_day(value: datetime.time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def weekly_intervals(timings: Iterable[Tuple[str, Optional[datetime.time], Optional[datetime.time]]]) -> List[Tuple[int, int]]:
+    """
+    Merge ``(day, open_time, close_time)`` rows into sorted, disjoint
+    ``[start, end)`` minute-of-week intervals.
+
+    A close time at or before the open time means the shop closes after
+    midnight (e.g. 18:00-02:00); equal times mean open around the clock.
+    A 23:59 close counts as midnight. Hours running past Sunday midnight
+    wrap around to Monday. Rows without a known day or times are skipped.
+    """
+    raw = []
+    for day, open_time, close_time in timings:
+        index = day_index(day)
+        if index is None or open_time is None or close_time is None:
+            continue
+        start = _minute_of_day(open_time)
+        end = _minute_of_day(close_time)
+        if end == MINUTES_PER_DAY - 1:
+            end = MINUTES_PER_DAY
+        if end <= start:
+            end += MINUTES_PER_DAY
+        start += index * MINUTES_PER_DAY
+        end += index * MINUTES_PER_DAY
+        if end > MINUTES_PER_WEEK:
+            raw.append((0, end - MINUTES_PER_WEEK))
+            end = MINUTES_PER_WEEK
+        raw.append((start, end))
+
+    merged = []
+    for start, end in sorted(raw):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class TimingIndex:
+    """
+    Weekly opening hours of many keys (shops), for "open at" lookups.
+
+    Each key's hours are stored as parallel sorted arrays of interval starts
+    and ends in minutes of the week, so checking whether a key is open at a
+    given minute is one bisect.
+    """
+
+    def __init__(self):
+        self._hours: Dict[Hashable, Tuple[List[int], List[int]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._hours)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._hours
+
+    def set(self, key: Hashable, intervals: List[Tuple[int, int]]) -> None:
+        """Replace ``key``'s hours with ``weekly_intervals`` output (empty: never open)."""
+        hours = ([start for start, _ in intervals], [end for _, end in intervals])
+        with self._lock:
+            self._hours[key] = hours
+
+    def remove(self, key: Hashable) -> None:
+        with self._lock:
+            self._hours.pop(key, None)
+
+    def rebuild(self, hours: Dict[Hashable, List[Tuple[int, int]]]) -> None:
+        fresh = {
+            key: ([start for start, _ in intervals], [end for _, end in intervals])
+            for key, intervals in hours.items()
+        }
+        with self._lock:
+            self._hours = fresh
+
+    def is_open(self, key: Hashable, minute: int) -> bool:
+        """True if ``key`` is open at ``minute`` of the week; unknown keys are closed."""
+        hours = self._hours.get(key)
+        if hours is None:
+            return False
+        starts, ends = hours
+        position = bisect.bisect_right(starts, minute % MINUTES_PER_WEEK) - 1
+        return position >= 0 and minute % MINUTES_PER_WEEK < ends[position]
+
+    def intervals(self, key: Hashable) -> List[Tuple[int, int]]:
+        hours = self._hours.get(key)
+        return list(zip(*hours)) if hours else []
@@ -46,6 +46,7 @@ CREATE TABLE Shop_Address (
     longitude DECIMAL(10,6),
     FOREIGN KEY (shop_id) REFERENCES Shops(shop_id) ON DELETE CASCADE
 );
+CREATE INDEX IX_Shop_Address_shop ON Shop_Address (shop_id);
 
 -- Shop_Timings Table 
 CREATE TABLE Shop_Timings (
@@ -56,6 +57,7 @@ CREATE TABLE Shop_Timings (
     close_time TIME,
     FOREIGN KEY (shop_id) REFERENCES Shops(shop_id) ON DELETE CASCADE
 );
+CREATE INDEX IX_Shop_Timings_shop ON Shop_Timings (shop_id) INCLUDE (day, open_time, close_time);
 
 -- Product_Categories Table 
 CREATE TABLE Product_Categories (
@@ -87,6 +89,8 @@ CREATE TABLE Shop_Product (
     FOREIGN KEY (shop_id) REFERENCES Shops(shop_id) ON DELETE CASCADE,
     FOREIGN KEY (product_id) REFERENCES Products(product_id) ON DELETE CASCADE
 );
+CREATE INDEX IX_Shop_Product_product ON Shop_Product (product_id, stock) INCLUDE (shop_id, price);
+CREATE INDEX IX_Shop_Product_shop ON Shop_Product (shop_id, product_id) INCLUDE (price, stock);
 
 -- Product_Reviews Table 
 CREATE TABLE Product_Reviews (
@@ -99,6 +103,20 @@ CREATE TABLE Product_Reviews (
     FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
     FOREIGN KEY (product_id) REFERENCES Products(product_id) ON DELETE CASCADE
 );
+CREATE INDEX IX_Product_Reviews_product ON Product_Reviews (product_id, review_id);
+
+-- Product_Rating_Summary Table (maintained by the API on every new review)
+CREATE TABLE Product_Rating_Summary (
+    product_id INT PRIMARY KEY,
+    review_count INT NOT NULL DEFAULT 0,
+    rating_sum DECIMAL(12,1) NOT NULL DEFAULT 0,
+    rating_1 INT NOT NULL DEFAULT 0,
+    rating_2 INT NOT NULL DEFAULT 0,
+    rating_3 INT NOT NULL DEFAULT 0,
+    rating_4 INT NOT NULL DEFAULT 0,
+    rating_5 INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (product_id) REFERENCES Products(product_id) ON DELETE CASCADE
+);
 
 -- Product_Images Table 
 CREATE TABLE Product_Images (
@@ -116,3 +134,70 @@ CREATE TABLE Search_History (
     timestamp DATETIME DEFAULT GETDATE(),
     FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
 );
+CREATE INDEX IX_Search_History_timestamp ON Search_History (timestamp) INCLUDE (search_item);
+CREATE INDEX IX_Search_History_user ON Search_History (user_id, timestamp) INCLUDE (search_item);
+
+-- Data_Versions Table (bumped by the API in every transaction that changes a
+-- tracked table; polled by API processes to refresh in-memory snapshots)
+CREATE TABLE Data_Versions (
+    table_name NVARCHAR(100) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL DEFAULT GETDATE()
+);
+
+-- Product_Offers Table (one row per in-stock offer and shop address: the
+-- search/product detail join, maintained by the API on every write)
+CREATE TABLE Product_Offers (
+    shop_product_id INT NOT NULL,
+    address_id INT NOT NULL,
+    product_id INT NOT NULL,
+    shop_id INT NOT NULL,
+    product_name NVARCHAR(200),
+    brand NVARCHAR(100),
+    description NVARCHAR(1000),
+    color NVARCHAR(50),
+    category_id INT,
+    price DECIMAL(10,2),
+    stock INT,
+    city NVARCHAR(100),
+    area NVARCHAR(200),
+    landmark NVARCHAR(200),
+    latitude DECIMAL(10,6),
+    longitude DECIMAL(10,6),
+    review_count INT,
+    rating_average DECIMAL(3,2),
+    PRIMARY KEY (shop_product_id, address_id),
+    -- Cascading FKs to Products or Shop_Address as well would give SQL Server
+    -- multiple cascade paths; the API removes those rows itself
+    FOREIGN KEY (shop_product_id) REFERENCES Shop_Product(shop_product_id) ON DELETE CASCADE
+);
+CREATE INDEX IX_Product_Offers_product ON Product_Offers (product_id, shop_product_id);
+CREATE INDEX IX_Product_Offers_shop ON Product_Offers (shop_id);
+CREATE INDEX IX_Product_Offers_city ON Product_Offers (city);
+CREATE INDEX IX_Product_Offers_location ON Product_Offers (latitude, longitude);
+
+-- Product_Price_Ranges Table (per-product rollup of Product_Offers)
+CREATE TABLE Product_Price_Ranges (
+    product_id INT PRIMARY KEY,
+    min_price DECIMAL(10,2),
+    max_price DECIMAL(10,2),
+    shop_count INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (product_id) REFERENCES Products(product_id) ON DELETE CASCADE
+);
+
+-- Revoked_Tokens Table (logged-out JWTs by SHA-256, shared by every API
+-- process until the token would have expired)
+CREATE TABLE Revoked_Tokens (
+    token_digest NVARCHAR(64) PRIMARY KEY,
+    expires_at DATETIME NOT NULL
+);
+CREATE INDEX IX_Revoked_Tokens_expires ON Revoked_Tokens (expires_at);
+
+-- Schema_Migrations Table (versions applied by `flask --app app migrate`;
+-- this script already contains every migration up to the one recorded here)
+CREATE TABLE Schema_Migrations (
+    version INT PRIMARY KEY,
+    name NVARCHAR(200) NOT NULL,
+    applied_at DATETIME NOT NULL DEFAULT GETDATE()
+);
+INSERT INTO Schema_Migrations (version, name) VALUES (1, 'route_indexes'), (2, 'search_history_timestamp'), (3, 'revoked_tokens'), (4, 'search_history_user');
@@ -0,0 +1,36 @@
+-- Add and backfill Product_Rating_Summary on an existing NearBuy database
+USE NearBuy;
+GO
+
+IF OBJECT_ID('Product_Rating_Summary', 'U') IS NULL
+CREATE TABLE Product_Rating_Summary (
+    product_id INT PRIMARY KEY,
+    review_count INT NOT NULL DEFAULT 0,
+    rating_sum DECIMAL(12,1) NOT NULL DEFAULT 0,
+    rating_1 INT NOT NULL DEFAULT 0,
+    rating_2 INT NOT NULL DEFAULT 0,
+    rating_3 INT NOT NULL DEFAULT 0,
+    rating_4 INT NOT NULL DEFAULT 0,
+    rating_5 INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (product_id) REFERENCES Products(product_id) ON DELETE CASCADE
+);
+GO
+
+-- Rebuild every aggregate from the reviews
+DELETE FROM Product_Rating_Summary;
+
+INSERT INTO Product_Rating_Summary
+    (product_id, review_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5)
+SELECT
+    product_id,
+    COUNT(*),
+    SUM(rating),
+    SUM(CASE WHEN FLOOR(rating) <= 1 THEN 1 ELSE 0 END),
+    SUM(CASE WHEN FLOOR(rating) = 2 THEN 1 ELSE 0 END),
+    SUM(CASE WHEN FLOOR(rating) = 3 THEN 1 ELSE 0 END),
+    SUM(CASE WHEN FLOOR(rating) = 4 THEN 1 ELSE 0 END),
+    SUM(CASE WHEN FLOOR(rating) >= 5 THEN 1 ELSE 0 END)
+FROM Product_Reviews
+WHERE product_id IS NOT NULL AND rating IS NOT NULL
+GROUP BY product_id;
+GO
@@ -0,0 +1,18 @@
+-- Add Data_Versions on an existing NearBuy database
+USE NearBuy;
+GO
+
+IF OBJECT_ID('Data_Versions', 'U') IS NULL
+CREATE TABLE Data_Versions (
+    table_name NVARCHAR(100) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL DEFAULT GETDATE()
+);
+GO
+
+-- Start every tracked table at version 1 (the API adds missing rows itself)
+INSERT INTO Data_Versions (table_name, version)
+SELECT t.table_name, 1
+FROM (VALUES ('Product_Categories'), ('Shops'), ('Shop_Address')) AS t(table_name)
+WHERE NOT EXISTS (SELECT 1 FROM Data_Versions d WHERE d.table_name = t.table_name);
+GO
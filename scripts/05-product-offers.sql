@@ -0,0 +1,71 @@
+-- Add and backfill Product_Offers and Product_Price_Ranges on an existing NearBuy database
+-- (same as `flask --app app rebuild-offers`)
+USE NearBuy;
+GO
+
+IF OBJECT_ID('Product_Offers', 'U') IS NULL
+BEGIN
+CREATE TABLE Product_Offers (
+    shop_product_id INT NOT NULL,
+    address_id INT NOT NULL,
+    product_id INT NOT NULL,
+    shop_id INT NOT NULL,
+    product_name NVARCHAR(200),
+    brand NVARCHAR(100),
+    description NVARCHAR(1000),
+    color NVARCHAR(50),
+    category_id INT,
+    price DECIMAL(10,2),
+    stock INT,
+    city NVARCHAR(100),
+    area NVARCHAR(200),
+    landmark NVARCHAR(200),
+    latitude DECIMAL(10,6),
+    longitude DECIMAL(10,6),
+    review_count INT,
+    rating_average DECIMAL(3,2),
+    PRIMARY KEY (shop_product_id, address_id),
+    -- Cascading FKs to Products or Shop_Address as well would give SQL Server
+    -- multiple cascade paths; the API removes those rows itself
+    FOREIGN KEY (shop_product_id) REFERENCES Shop_Product(shop_product_id) ON DELETE CASCADE
+);
+CREATE INDEX IX_Product_Offers_product ON Product_Offers (product_id, shop_product_id);
+CREATE INDEX IX_Product_Offers_shop ON Product_Offers (shop_id);
+CREATE INDEX IX_Product_Offers_city ON Product_Offers (city);
+CREATE INDEX IX_Product_Offers_location ON Product_Offers (latitude, longitude);
+END
+GO
+
+IF OBJECT_ID('Product_Price_Ranges', 'U') IS NULL
+CREATE TABLE Product_Price_Ranges (
+    product_id INT PRIMARY KEY,
+    min_price DECIMAL(10,2),
+    max_price DECIMAL(10,2),
+    shop_count INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (product_id) REFERENCES Products(product_id) ON DELETE CASCADE
+);
+GO
+
+-- Rebuild both tables from the source tables
+DELETE FROM Product_Price_Ranges;
+DELETE FROM Product_Offers;
+
+INSERT INTO Product_Offers
+    (shop_product_id, address_id, product_id, shop_id, product_name, brand, description, color,
+     category_id, price, stock, city, area, landmark, latitude, longitude, review_count, rating_average)
+SELECT
+    sp.shop_product_id, sa.address_id, p.product_id, sp.shop_id, p.product_name, p.brand,
+    p.description, p.color, p.category_id, sp.price, sp.stock, sa.city, sa.area, sa.landmark,
+    sa.latitude, sa.longitude, rs.review_count,
+    CASE WHEN rs.review_count > 0 THEN rs.rating_sum / rs.review_count END
+FROM Shop_Product sp
+JOIN Products p ON sp.product_id = p.product_id
+JOIN Shop_Address sa ON sp.shop_id = sa.shop_id
+LEFT JOIN Product_Rating_Summary rs ON rs.product_id = p.product_id
+WHERE sp.stock > 0;
+
+INSERT INTO Product_Price_Ranges (product_id, min_price, max_price, shop_count)
+SELECT product_id, MIN(price), MAX(price), COUNT(DISTINCT shop_id)
+FROM Product_Offers
+GROUP BY product_id;
+GO